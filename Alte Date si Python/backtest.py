@@ -0,0 +1,122 @@
+import numpy as np
+
+# Backtest istoric pentru toată grila de ponderi deodată.
+#
+# Randamentele zilnice ale activelor (panelul aliniat din return_panel.build_calendar_panel)
+# sunt transformate în creșterea cumulată a fiecărui activ, G (zile x active). Valoarea tuturor
+# portofoliilor cumpărare-și-păstrare este atunci un singur produs matriceal, G @ Wᵀ
+# (zile x seturi de ponderi). Cu reechilibrare periodică, creșterea este raportată la începutul
+# fiecărei perioade, iar valorile de la sfârșitul perioadelor sunt înmulțite cumulat - tot un
+# singur produs matriceal. Componenta de obligațiuni are o rată anuală constantă, acumulată pe
+# zilele calendaristice dintre rânduri.
+
+TRADING_DAYS_PER_YEAR = 252
+DAYS_PER_YEAR = 365.25
+
+
+def bond_log_returns(dates, annual_rate):
+    """
+    Randamentele logaritmice ale unei obligațiuni cu rată anuală constantă, pe rândurile panelului.
+
+    Primul rând acoperă o zi lucrătoare (nu există dată anterioară în panel).
+    """
+    days = np.diff(np.asarray(dates, dtype='datetime64[D]')).astype(np.float64)
+    days = np.concatenate(([365.0 / TRADING_DAYS_PER_YEAR], days))
+    return np.log1p(annual_rate) * days / DAYS_PER_YEAR
+
+
+def common_window(panel):
+    """
+    Rândurile [start, end) în care toate activele au început și niciunul nu s-a terminat.
+
+    Returns:
+        tuple: (start, end) - indecșii ferestrei comune în panel.
+    """
+    present = ~np.isnan(panel)
+    if not present.any(axis=0).all():
+        raise ValueError("Cel puțin un activ nu are niciun randament în panel.")
+    start = int(present.argmax(axis=0).max())
+    end = int(len(panel) - present[::-1].argmax(axis=0).max())
+    if end - start < 2:
+        raise ValueError("Activele nu au o perioadă comună suficientă pentru backtest.")
+    return start, end
+
+
+def _portfolio_values(log_growth, weights, rebalance_every):
+    """ Valoarea portofoliilor (zile x seturi), pornind de la 1, pentru un bloc de ponderi. """
+    if not rebalance_every:
+        return np.exp(log_growth) @ weights.T
+    num_rows = len(log_growth)
+    period = np.arange(num_rows) // rebalance_every
+    period_starts = np.arange(0, num_rows, rebalance_every)
+    # Creșterea fiecărui activ de la ultima reechilibrare (sfârșitul perioadei precedente)
+    anchor = np.vstack((np.zeros((1, log_growth.shape[1])), log_growth[period_starts[1:] - 1]))
+    relative = np.exp(log_growth - anchor[period]) @ weights.T
+    period_ends = np.minimum(period_starts + rebalance_every, num_rows) - 1
+    carried = np.vstack((np.ones((1, len(weights))), np.cumprod(relative[period_ends[:-1]], axis=0)))
+    return carried[period] * relative
+
+
+def backtest_weight_grid(dates, panel, weights, bond_rate=None, rebalance_every=None,
+                         risk_free_rate=None, trading_days_per_year=TRADING_DAYS_PER_YEAR,
+                         chunk_size=2048, return_curves=False):
+    """
+    Backtestul istoric al tuturor seturilor de ponderi pe panelul de randamente.
+
+    Args:
+        dates (np.ndarray): Datele panelului, forma (T,).
+        panel (np.ndarray): Randamentele logaritmice zilnice (T, N), NaN pentru lipsuri; se
+            folosește fereastra comună (common_window), iar lipsurile din interior sunt 0.
+        weights (np.ndarray): Ponderile (zecimal), forma (W, N) sau (W, N + 1) cu bond_rate;
+            prima coloană este atunci componenta de obligațiuni.
+        bond_rate (float, optional): Rata anuală a obligațiunilor (ex: 0.066).
+        rebalance_every (int, optional): Reechilibrare la ponderile inițiale la fiecare
+            rebalance_every rânduri (ex: 21 lunar, 63 trimestrial); None - cumpărare și păstrare.
+        risk_free_rate (float, optional): Rata fără risc pentru Sharpe (implicit bond_rate sau 0).
+        trading_days_per_year (int): Factorul de anualizare a volatilității.
+        chunk_size (int): Numărul de seturi de ponderi evaluate odată (limitează memoria).
+        return_curves (bool): Întoarce și valoarea zilnică a fiecărui portofoliu (T, W).
+
+    Returns:
+        dict: "final_value", "cagr", "volatility", "sharpe", "max_drawdown" (forma (W,)),
+            "start_date", "end_date", "num_days" și, opțional, "dates" și "equity_curves".
+    """
+    start, end = common_window(np.asarray(panel, dtype=float))
+    dates = np.asarray(dates, dtype='datetime64[ns]')[start:end]
+    log_returns = np.nan_to_num(np.asarray(panel, dtype=float)[start:end], nan=0.0)
+    if bond_rate is not None:
+        log_returns = np.column_stack((bond_log_returns(dates, bond_rate), log_returns))
+    weights = np.atleast_2d(np.asarray(weights, dtype=float))
+    if weights.shape[1] != log_returns.shape[1]:
+        raise ValueError(f"Ponderile au {weights.shape[1]} coloane, dar există {log_returns.shape[1]} active (inclusiv obligațiunile).")
+    if risk_free_rate is None:
+        risk_free_rate = bond_rate or 0.0
+
+    log_growth = np.cumsum(log_returns, axis=0)
+    # Data de start este ziua dinaintea primului randament (aproximată cu o zi lucrătoare)
+    years = ((dates[-1] - dates[0]) / np.timedelta64(1, 'D') + 365.0 / trading_days_per_year) / DAYS_PER_YEAR
+
+    num_sets = len(weights)
+    results = {key: np.empty(num_sets) for key in ("final_value", "cagr", "volatility", "sharpe", "max_drawdown")}
+    curves = np.empty((len(dates), num_sets)) if return_curves else None
+    for block_start in range(0, num_sets, chunk_size):
+        block = slice(block_start, min(block_start + chunk_size, num_sets))
+        values = _portfolio_values(log_growth, weights[block], rebalance_every)
+        daily_log = np.diff(np.log(values), axis=0, prepend=0.0)
+        final_value = values[-1]
+        volatility = daily_log.std(axis=0) * np.sqrt(trading_days_per_year)
+        cagr = final_value ** (1.0 / years) - 1
+        drawdown = values / np.maximum(np.maximum.accumulate(values, axis=0), 1.0) - 1
+
+        results["final_value"][block] = final_value
+        results["cagr"][block] = cagr
+        results["volatility"][block] = volatility
+        results["sharpe"][block] = np.divide(cagr - risk_free_rate, volatility, out=np.zeros_like(cagr), where=volatility > 1e-6)
+        results["max_drawdown"][block] = drawdown.min(axis=0)
+        if return_curves:
+            curves[:, block] = values
+
+    results.update(start_date=dates[0], end_date=dates[-1], num_days=len(dates))
+    if return_curves:
+        results.update(dates=dates, equity_curves=curves)
+    return results
@@ -0,0 +1,92 @@
+import numpy as np
+
+# Matricea de corelație N x N pentru un panel de randamente (date x active) cu lipsuri (NaN).
+#
+# Seriile sunt aliniate o singură dată (un panel comun), iar corelațiile tuturor perechilor
+# sunt obținute din câteva produse matriceale, fără câte un merge pentru fiecare pereche.
+#   - complete_case: doar zilele în care toate activele au randament (aceeași fereastră pentru toți).
+#   - pairwise:      fiecare pereche folosește zilele în care ambele active au randament
+#                    (ca DataFrame.corr din pandas), prin sume mascate:
+#                    n_ij = Mᵀ M, Σx_i|j = Xᵀ M, Σx_i² |j = (X²)ᵀ M, Σx_i x_j = Xᵀ X,
+#                    unde M este masca valorilor prezente și X panelul cu lipsurile puse pe 0.
+# Cu ferestre diferite pe perechi matricea nu este garantat pozitiv semidefinită; pentru
+# covarianțe folosite în descompunerea Cholesky vezi positive_definite_correlation.
+
+
+def overlap_matrix(panel):
+    """ Numărul de zile în care ambele active ale fiecărei perechi au randament, forma (N, N). """
+    present = (~np.isnan(np.asarray(panel, dtype=float))).astype(np.float64)
+    return (present.T @ present).astype(np.int64)
+
+
+def correlation_matrix(panel, pairwise=True, min_overlap=2):
+    """
+    Calculează toată matricea de corelație dintr-o singură trecere peste panel.
+
+    Args:
+        panel (array-like): Randamentele aliniate, forma (date, N), cu NaN pentru lipsuri.
+        pairwise (bool): True - fiecare pereche pe fereastra ei de suprapunere;
+            False - doar zilele complete (toate activele prezente).
+        min_overlap (int): Perechile cu mai puține zile comune primesc NaN.
+
+    Returns:
+        tuple: (corelație, suprapunere) - matricea de corelație (N, N) și numărul de zile
+            folosite pentru fiecare pereche (N, N).
+    """
+    panel = np.asarray(panel, dtype=float)
+    num_assets = panel.shape[1]
+    if not pairwise:
+        complete = panel[~np.isnan(panel).any(axis=1)]
+        overlap = np.full((num_assets, num_assets), len(complete), dtype=np.int64)
+        if len(complete) < max(min_overlap, 2):
+            return np.full((num_assets, num_assets), np.nan), overlap
+        centered = complete - complete.mean(axis=0)
+        covariance = centered.T @ centered
+        std = np.sqrt(np.diag(covariance))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return covariance / np.outer(std, std), overlap
+
+    present = ~np.isnan(panel)
+    mask = present.astype(np.float64)
+    # Centrarea pe media fiecărei coloane nu schimbă corelațiile, dar evită pierderea de
+    # precizie în formula cu sume (Σxy/n - x̄ȳ)
+    column_means = np.nanmean(np.where(present.any(axis=0), panel, 0.0), axis=0)
+    values = np.where(present, panel - column_means, 0.0)
+
+    counts = mask.T @ mask
+    sums = values.T @ mask                 # sums[i, j] = Σ x_i pe zilele comune cu j
+    sums_sq = (values ** 2).T @ mask       # sums_sq[i, j] = Σ x_i² pe zilele comune cu j
+    cross = values.T @ values              # cross[i, j] = Σ x_i x_j pe zilele comune
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_i = sums / counts
+        mean_j = sums.T / counts
+        covariance = cross / counts - mean_i * mean_j
+        var_i = np.maximum(sums_sq / counts - mean_i ** 2, 0.0)
+        var_j = var_i.T
+        correlation = covariance / np.sqrt(var_i * var_j)
+    correlation = np.clip(correlation, -1.0, 1.0)
+    correlation[counts < max(min_overlap, 2)] = np.nan
+    return correlation, counts.astype(np.int64)
+
+
+def positive_definite_correlation(correlation, min_eigenvalue=1e-10):
+    """
+    Corectează o matrice de corelație (ex: pe perechi) ca să fie pozitiv definită.
+
+    Valorile proprii sub min_eigenvalue sunt ridicate la min_eigenvalue, apoi diagonala este
+    readusă la 1 (o corecție simplă, nu proiecția Higham pe cea mai apropiată corelație).
+    O matrice deja pozitiv definită, sau una cu NaN (perechi fără suprapunere), este
+    întoarsă neschimbată.
+    """
+    correlation = np.asarray(correlation, dtype=float)
+    if np.isnan(correlation).any():
+        return correlation
+    eigenvalues, eigenvectors = np.linalg.eigh(correlation)
+    if eigenvalues.min() >= min_eigenvalue:
+        return correlation
+    repaired = (eigenvectors * np.maximum(eigenvalues, min_eigenvalue)) @ eigenvectors.T
+    scale = np.sqrt(np.diag(repaired))
+    repaired = repaired / np.outer(scale, scale)
+    np.fill_diagonal(repaired, 1.0)
+    return (repaired + repaired.T) / 2
@@ -0,0 +1,114 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Detectarea formatului datei dintr-un eșantion mic de rânduri.
+#
+# În loc să parsăm toată coloana cu fiecare format din listă până când unul reușește, încercăm
+# formatele candidate doar pe un eșantion (începutul, sfârșitul și rânduri uniform distribuite)
+# și parsăm apoi coloana o singură dată, cu formatul ales. Dacă mai multe formate se potrivesc
+# (ex: '%m/%d/%y' și '%d/%m/%y' când nicio zi din eșantion nu depășește 12), eșantionul este
+# extins; dacă ambiguitatea rămâne, alternativele sunt raportate apelantului.
+
+CANDIDATE_DATE_FORMATS = [
+    "%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y/%m/%d",
+    "%m/%d/%Y", "%d/%m/%Y", "%m/%d/%y", "%d/%m/%y",
+    "%b %d, %Y", "%d-%b-%Y", "%d-%b-%y"
+]
+SAMPLE_SIZE = 64
+AMBIGUOUS_SAMPLE_SIZE = 2048
+
+# Formatul ales pentru fiecare fișier sursă (cale, coloană, format preferat), valabil cât timp
+# fișierul are aceeași mărime și aceeași dată a modificării
+_detected_formats = {}
+
+
+def _sample_values(values, sample_size):
+    """ Valorile nenule distincte din sample_size rânduri uniform distribuite (inclusiv primul și ultimul). """
+    if len(values) > sample_size:
+        values = values[np.unique(np.linspace(0, len(values) - 1, sample_size).astype(int))]
+    sample = (str(v).strip() for v in values if v is not None and v == v)
+    return list(dict.fromkeys(v for v in sample if v not in ("", "nan", "NaT")))
+
+
+def _matches(fmt, sample):
+    try:
+        for value in sample:
+            datetime.strptime(value, fmt)
+    except ValueError:
+        return False
+    return True
+
+
+def sniff_date_format(values, preferred=None, candidates=None):
+    """
+    Alege formatul datei care se potrivește tuturor valorilor dintr-un eșantion al coloanei.
+
+    Args:
+        values (array-like): Valorile coloanei de dată (text).
+        preferred (str, optional): Formatul indicat de apelant (ex: parametrul date_format);
+            este ales dacă se potrivește eșantionului.
+        candidates (list, optional): Formatele încercate, în ordinea preferinței.
+
+    Returns:
+        tuple: (format, alternative) - formatul ales (None dacă niciunul nu se potrivește) și
+            lista celorlalte formate care se potrivesc la fel de bine (goală dacă alegerea
+            nu este ambiguă).
+    """
+    values = np.asarray(values, dtype=object)
+    candidates = list(candidates or CANDIDATE_DATE_FORMATS)
+    if preferred:
+        candidates = [preferred] + [fmt for fmt in candidates if fmt != preferred]
+
+    sample = _sample_values(values, SAMPLE_SIZE)
+    if not sample:
+        return None, []
+    consistent = [fmt for fmt in candidates if _matches(fmt, sample)]
+    if len(consistent) > 1:
+        # Eșantionul mic nu a decis (ex: zile <= 12): formatele rămase sunt verificate pe mai multe rânduri
+        larger_sample = _sample_values(values, AMBIGUOUS_SAMPLE_SIZE)
+        consistent = [fmt for fmt in consistent if _matches(fmt, larger_sample)]
+    if not consistent:
+        return None, []
+    return consistent[0], consistent[1:]
+
+
+def detect_date_format(values, preferred=None, source_path=None, column=None):
+    """
+    Ca sniff_date_format, dar memorează alegerea pentru fișierul sursă (source_path, column).
+
+    Returns:
+        tuple: (format, alternative, din_memorie) - ultimul element este True dacă formatul
+            a fost luat din memorie, fără a mai verifica eșantionul.
+    """
+    key = None
+    if source_path is not None:
+        stat = os.stat(source_path)
+        key = (os.path.abspath(source_path), column, preferred, stat.st_size, stat.st_mtime_ns)
+        if key in _detected_formats:
+            fmt, alternatives = _detected_formats[key]
+            return fmt, alternatives, True
+    fmt, alternatives = sniff_date_format(values, preferred)
+    if key is not None and fmt is not None:
+        _detected_formats[key] = (fmt, alternatives)
+    return fmt, alternatives, False
+
+
+def parse_date_column(series, preferred=None, source_path=None):
+    """
+    Parsează coloana de dată o singură dată, cu formatul detectat din eșantion.
+
+    Dacă niciun format candidat nu se potrivește, se încearcă o singură dată inferența pandas.
+
+    Returns:
+        tuple: (pd.Series de datetime64, formatul folosit sau None pentru inferență, alternative).
+
+    Raises:
+        ValueError: Coloana nu poate fi parsată ca dată.
+    """
+    fmt, alternatives, _ = detect_date_format(series.to_numpy(), preferred, source_path, series.name)
+    if fmt is None:
+        return pd.to_datetime(series, errors='raise'), None, []
+    return pd.to_datetime(series, format=fmt, errors='raise'), fmt, alternatives
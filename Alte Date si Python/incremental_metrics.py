@@ -0,0 +1,424 @@
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from date_formats import parse_date_column
+from price_cache import CACHE_DIR_NAME, clean_numeric_columns
+from correlation import positive_definite_correlation
+from return_panel import PRICE_COLUMN_ALTERNATIVES, TRADING_DAYS_PER_YEAR, is_weekday_only, metrics_array
+
+# Actualizarea incrementală a metricilor când apar rânduri noi în CSV-urile de prețuri.
+#
+# Pentru fiecare activ se păstrează o stare: numărul de randamente, media și M2 (Welford)
+# ale randamentelor logaritmice, ultimul preț de închidere și poziția (în octeți) până la care
+# fișierul a fost citit. Metricile raportate, covarianța și corelația sunt calculate, ca în
+# return_panel.calculate_batch_metrics, pe calendarul zilelor de tranzacționare: randamentele
+# din zilele care nu sunt în calendar (ex: weekend-ul ETH) sunt cumulate în următoarea zi din
+# calendar, iar pentru fiecare pereche de active se păstrează media, M2 și co-momentul pe
+# zilele în care ambele au randament. La o reîmprospătare se parsează doar rândurile adăugate
+# la sfârșitul fișierului, iar starea este combinată cu blocul nou (formula lui Chan), în
+# O(rânduri noi). Dacă fișierul a fost rescris (ultimul rând citit nu mai este la aceeași
+# poziție), starea activului este reconstruită de la zero.
+
+STATE_FORMAT_VERSION = 2
+
+
+def _merge_moments(count, mean, m2, block):
+    """ Combină (count, mean, M2) cu un bloc de observații (rânduri); M2 poate fi scalar sau matrice. """
+    block_count = len(block)
+    if block_count == 0:
+        return count, mean, m2
+    block_mean = block.mean(axis=0)
+    centered = block - block_mean
+    block_m2 = centered.T @ centered if block.ndim == 2 else centered @ centered
+    total = count + block_count
+    delta = block_mean - mean
+    mean = mean + delta * block_count / total
+    m2 = m2 + block_m2 + np.multiply.outer(delta, delta) * count * block_count / total
+    return total, mean, m2
+
+
+def _merge_pairwise_moments(count, mean, m2, comoment, block):
+    """
+    Varianta pe perechi a _merge_moments, pentru un bloc cu lipsuri (NaN).
+
+    Toate argumentele de stare sunt matrice (N, N): pentru perechea (i, j), count este numărul
+    de rânduri în care ambele active au valoare, mean și m2 media și M2 ale activului i pe
+    aceste rânduri, iar comoment suma produselor abaterilor. Sumele blocului sunt produse
+    mascate, ca în correlation.correlation_matrix.
+    """
+    present = ~np.isnan(block)
+    mask = present.astype(np.float64)
+    block_count = mask.T @ mask
+    if not block_count.any():
+        return count, mean, m2, comoment
+    # Centrarea pe media coloanelor blocului păstrează precizia sumelor de pătrate
+    shift = np.where(present, block, 0.0).sum(axis=0) / np.maximum(present.sum(axis=0), 1)
+    values = np.where(present, block - shift, 0.0)
+    sums = values.T @ mask                 # sums[i, j] = Σ x_i pe rândurile comune cu j
+    total = count + block_count
+    with np.errstate(divide='ignore', invalid='ignore'):
+        block_mean = np.where(block_count > 0, sums / block_count, 0.0)
+        block_m2 = (values ** 2).T @ mask - block_mean * sums
+        block_comoment = values.T @ values - block_mean * sums.T
+        delta = np.where(block_count > 0, shift[:, np.newaxis] + block_mean - mean, 0.0)
+        weight = np.where(total > 0, block_count / total, 0.0)
+    mean = mean + delta * weight
+    m2 = m2 + block_m2 + delta ** 2 * count * weight
+    comoment = comoment + block_comoment + delta * delta.T * count * weight
+    return total, mean, m2, comoment
+
+
+class ReturnStats:
+    """ Starea Welford a randamentelor logaritmice zilnice ale unui activ. """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.first_date = None
+        self.last_date = None
+        self.last_close = None
+
+    def update(self, dates, closes):
+        """
+        Adaugă prețuri noi (în ordine cronologică, după last_date).
+
+        Returns:
+            tuple: (dates, log_returns) - randamentele noi, primul calculat față de last_close.
+        """
+        dates = np.asarray(dates, dtype='datetime64[ns]')
+        closes = np.asarray(closes, dtype=np.float64)
+        if len(closes) == 0:
+            return dates, closes
+        previous = closes[:-1] if self.last_close is None else np.concatenate(([self.last_close], closes[:-1]))
+        return_dates = dates if self.last_close is not None else dates[1:]
+        closes_with_return = closes if self.last_close is not None else closes[1:]
+        log_returns = np.log(closes_with_return / previous)
+        valid = ~np.isnan(log_returns)
+        return_dates, log_returns = return_dates[valid], log_returns[valid]
+
+        self.count, self.mean, self.m2 = _merge_moments(self.count, self.mean, self.m2, log_returns)
+        self.mean, self.m2 = float(self.mean), float(self.m2)
+        if self.first_date is None and len(return_dates):
+            self.first_date = return_dates[0]
+        if len(return_dates):
+            self.last_date = return_dates[-1]
+        self.last_close = float(closes[-1])
+        return return_dates, log_returns
+
+    def metrics(self, asset_name, trading_days_per_year=TRADING_DAYS_PER_YEAR):
+        """ Aceleași câmpuri ca dicționarul din calculate_historical_metrics (app.py). """
+        std_daily = np.sqrt(self.m2 / self.count) if self.count else np.nan
+        return {
+            'asset_name': asset_name,
+            'expected_annual_return': np.exp(self.mean * trading_days_per_year) - 1,
+            'annual_volatility': std_daily * np.sqrt(trading_days_per_year),
+            'num_daily_returns_used': self.count,
+            'mean_daily_log_return': self.mean,
+            'std_dev_daily_log_return': std_daily,
+            'first_date_used': self.first_date,
+            'last_date_used': self.last_date
+        }
+
+    def to_dict(self):
+        as_text = lambda d: None if d is None else str(np.datetime64(d, 'ns'))
+        return {"count": self.count, "mean": self.mean, "m2": self.m2, "first_date": as_text(self.first_date),
+                "last_date": as_text(self.last_date), "last_close": self.last_close}
+
+    @classmethod
+    def from_dict(cls, state):
+        stats = cls()
+        as_date = lambda d: None if d is None else np.datetime64(d, 'ns')
+        stats.count, stats.mean, stats.m2 = state["count"], state["mean"], state["m2"]
+        stats.first_date, stats.last_date = as_date(state["first_date"]), as_date(state["last_date"])
+        stats.last_close = state["last_close"]
+        return stats
+
+
+class CalendarStats:
+    """
+    Momentele pe perechi ale randamentelor aliniate pe calendarul zilelor de tranzacționare.
+
+    Calendarul este cel din return_panel.master_calendar: datele activelor fără weekend-uri
+    (toate datele, dacă fiecare activ are weekend-uri). Valoarea unui activ într-o zi din
+    calendar este suma randamentelor lui de la precedenta zi din calendar în care a avut
+    randament, ca în return_panel.build_calendar_panel. O zi este procesată doar când toate
+    activele au ajuns la ea; randamentele de după ultima dată comună așteaptă în `pending`,
+    iar suma randamentelor din afara calendarului așteaptă în `carry`.
+    """
+
+    def __init__(self, num_assets):
+        self.count = np.zeros((num_assets, num_assets))
+        self.mean = np.zeros((num_assets, num_assets))
+        self.m2 = np.zeros((num_assets, num_assets))
+        self.comoment = np.zeros((num_assets, num_assets))
+        self.num_common_days = 0
+        self.first_dates = [None] * num_assets
+        self.last_dates = [None] * num_assets
+        self.has_weekends = [False] * num_assets
+        # None: randamente dinaintea începutului calendarului, fără o bază (vezi build_calendar_panel)
+        self.carry = [0.0] * num_assets
+        self.calendar_started = False
+        self.cutoff = None
+        self.pending = [{} for _ in range(num_assets)]
+
+    def update(self, new_returns, last_dates):
+        """
+        Args:
+            new_returns (list): (dates, log_returns) noi pentru fiecare activ.
+            last_dates (list): Ultima dată cu randament a fiecărui activ (după actualizare).
+
+        Returns:
+            bool: False dacă un activ tratat ca fiind fără weekend-uri a primit o dată de
+                weekend după ce zilele au început să fie procesate: calendarul s-a schimbat,
+                iar starea trebuie reconstruită de la zero.
+        """
+        for j, (pending, (dates, log_returns)) in enumerate(zip(self.pending, new_returns)):
+            pending.update(zip(dates.astype('datetime64[ns]').astype(np.int64).tolist(), log_returns.tolist()))
+            if not self.has_weekends[j] and not is_weekday_only(dates):
+                if self.cutoff is not None:
+                    return False
+                self.has_weekends[j] = True
+        if any(d is None for d in last_dates):
+            return True
+        # Zilele până la cea mai mică ultimă dată sunt definitive pentru toate activele
+        cutoff = int(min(np.datetime64(d, 'ns').astype(np.int64) for d in last_dates))
+        sources = [pending for pending, weekends in zip(self.pending, self.has_weekends) if not weekends] or self.pending
+        calendar = sorted(set().union(*({day for day in pending if day <= cutoff} for pending in sources)))
+        rows = {day: i for i, day in enumerate(calendar)}
+        block = np.full((len(calendar), len(self.pending)), np.nan)
+        for j, pending in enumerate(self.pending):
+            carry = self.carry[j]
+            for day in sorted(rows.keys() | {day for day in pending if day <= cutoff}):
+                log_return = pending.get(day)
+                if day in rows:
+                    if log_return is not None and carry is not None:
+                        block[rows[day], j] = carry + log_return
+                        carry = 0.0
+                    elif log_return is not None or self.first_dates[j] is None:
+                        # Înainte de prima valoare, baza este ultima zi din calendar
+                        carry = 0.0
+                    if self.first_dates[j] is None and not np.isnan(block[rows[day], j]):
+                        self.first_dates[j] = day
+                elif log_return is not None:
+                    started = self.calendar_started or (calendar and day > calendar[0])
+                    carry = carry + log_return if started and carry is not None else None
+            self.carry[j] = carry
+            valid = np.flatnonzero(~np.isnan(block[:, j]))
+            if len(valid):
+                self.last_dates[j] = calendar[valid[-1]]
+
+        self.count, self.mean, self.m2, self.comoment = _merge_pairwise_moments(self.count, self.mean, self.m2, self.comoment, block)
+        self.num_common_days += int((~np.isnan(block)).all(axis=1).sum())
+        self.calendar_started = self.calendar_started or bool(calendar)
+        self.pending = [{k: v for k, v in pending.items() if k > cutoff} for pending in self.pending]
+        self.cutoff = cutoff
+        return True
+
+    def metrics(self, asset_names, trading_days_per_year=TRADING_DAYS_PER_YEAR):
+        """ Metricile fiecărui activ pe calendar (ca return_panel.panel_metrics), ca array structurat. """
+        counts = np.diag(self.count)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            std_daily = np.where(counts > 0, np.sqrt(np.diag(self.m2) / counts), np.nan)
+        mean_daily = np.where(counts > 0, np.diag(self.mean), np.nan)
+        as_date = lambda d: None if d is None else np.datetime64(d, 'ns')
+        return metrics_array([{
+            'asset_name': name,
+            'expected_annual_return': np.exp(mean * trading_days_per_year) - 1,
+            'annual_volatility': std * np.sqrt(trading_days_per_year),
+            'num_daily_returns_used': int(count),
+            'mean_daily_log_return': mean,
+            'std_dev_daily_log_return': std,
+            'first_date_used': as_date(first),
+            'last_date_used': as_date(last)
+        } for name, mean, std, count, first, last in zip(asset_names, mean_daily, std_daily, counts, self.first_dates, self.last_dates)])
+
+    def covariance(self, trading_days_per_year=TRADING_DAYS_PER_YEAR):
+        """
+        Covarianța anuală (pozitiv definită, scalată cu volatilitățile din metrics), corelația pe
+        perechi și suprapunerea, ca în return_panel.calculate_batch_metrics.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlation = self.comoment / np.sqrt(self.m2 * self.m2.T)
+            volatility = np.sqrt(np.diag(self.m2) / np.diag(self.count) * trading_days_per_year)
+        correlation = np.clip(correlation, -1.0, 1.0)
+        correlation[self.count < 2] = np.nan
+        covariance = positive_definite_correlation(correlation) * np.outer(volatility, volatility)
+        return covariance, correlation, self.count.astype(np.int64)
+
+    def to_dict(self):
+        return {"count": self.count.tolist(), "mean": self.mean.tolist(), "m2": self.m2.tolist(),
+                "comoment": self.comoment.tolist(), "num_common_days": self.num_common_days,
+                "first_dates": self.first_dates, "last_dates": self.last_dates, "has_weekends": self.has_weekends,
+                "carry": self.carry, "calendar_started": self.calendar_started, "cutoff": self.cutoff,
+                "pending": [[[k, v] for k, v in sorted(pending.items())] for pending in self.pending]}
+
+    @classmethod
+    def from_dict(cls, state):
+        stats = cls(len(state["count"]))
+        for key in ("count", "mean", "m2", "comoment"):
+            setattr(stats, key, np.array(state[key], dtype=np.float64).reshape(len(state["count"]), len(state["count"])))
+        for key in ("num_common_days", "first_dates", "last_dates", "has_weekends", "carry", "calendar_started", "cutoff"):
+            setattr(stats, key, state[key])
+        stats.pending = [{int(k): v for k, v in pending} for pending in state["pending"]]
+        return stats
+
+
+def _read_new_rows(spec, file_state):
+    """
+    Citește rândurile complete de după file_state["offset"] (toate, dacă offset-ul este 0).
+
+    Returns:
+        tuple: (prices, file_state) - seria de prețuri nouă (index de date, sortată) și starea
+            fișierului actualizată, sau (None, None) dacă fișierul a fost rescris.
+    """
+    file_path = spec["file_path"]
+    with open(file_path, "rb") as f:
+        offset = file_state.get("offset", 0)
+        if offset:
+            # Ultimul rând citit trebuie să fie neschimbat, altfel fișierul a fost rescris
+            last_line = file_state["last_line"].encode()
+            f.seek(max(offset - len(last_line), 0))
+            if f.read(len(last_line)) != last_line:
+                return None, None
+        data = f.read()
+    end = data.rfind(b"\n") + 1  # doar rândurile complete; un rând în curs de scriere rămâne pentru data viitoare
+    if end == 0:
+        return pd.Series(dtype=np.float64, index=pd.DatetimeIndex([])), file_state
+    text = data[:end].decode("utf-8")
+    lines = text.splitlines(keepends=True)
+    new_state = {**file_state, "offset": offset + end, "last_line": lines[-1]}
+
+    if offset == 0:
+        df = pd.read_csv(io.StringIO(text), header=0, skiprows=spec.get("skiprows_config"))
+        if df.empty:
+            raise ValueError(f"DataFrame-ul este gol după încărcarea fișierului '{file_path}'.")
+        date_col_name = spec.get("date_col_name", "Date")
+        date_col = date_col_name if date_col_name in df.columns else df.columns[0]
+        df[date_col], used_format, _ = parse_date_column(df[date_col], spec.get("date_format"), file_path)
+        new_state.update(columns=[str(c) for c in df.columns], date_col=str(date_col), date_format=used_format)
+    else:
+        df = pd.read_csv(io.StringIO(text), header=None, names=file_state["columns"])
+        date_col = file_state["date_col"]
+        df[date_col] = pd.to_datetime(df[date_col], format=file_state["date_format"], errors='raise')
+
+    df = clean_numeric_columns(df.set_index(date_col))
+    price_col = spec.get("price_col_name", "Close")
+    if price_col not in df.columns:
+        alternatives = [col for col in df.columns if col.lower() in PRICE_COLUMN_ALTERNATIVES]
+        if not alternatives:
+            raise ValueError(f"Coloana de preț '{price_col}' sau alternative nu au fost găsite în '{file_path}'. Coloane disponibile: {list(df.columns)}")
+        price_col = alternatives[0]
+
+    prices = df[price_col]
+    prices = prices[~prices.index.isna()].sort_index()
+    if spec.get("start_date_str"):
+        prices = prices[prices.index >= pd.to_datetime(spec["start_date_str"])]
+    if spec.get("end_date_str"):
+        prices = prices[prices.index <= pd.to_datetime(spec["end_date_str"])]
+    return prices.dropna(), new_state
+
+
+def default_state_path(asset_specs):
+    """ Fișierul de stare implicit: în .price_cache/ lângă primul CSV, cu o cheie derivată din specificații. """
+    digest = hashlib.sha1(json.dumps(asset_specs, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    directory = os.path.join(os.path.dirname(os.path.abspath(asset_specs[0]["file_path"])), CACHE_DIR_NAME)
+    return os.path.join(directory, f"metrics-state-{digest}.json")
+
+
+def _load_state(state_path, asset_specs):
+    try:
+        with open(state_path, "r") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.get("format_version") != STATE_FORMAT_VERSION or state.get("asset_specs") != json.loads(json.dumps(asset_specs, default=str)):
+        return None
+    return state
+
+
+def _save_state(state_path, state):
+    os.makedirs(os.path.dirname(os.path.abspath(state_path)), exist_ok=True)
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+
+def _empty_state(num_assets):
+    return {
+        "files": [{} for _ in range(num_assets)],
+        "returns": [ReturnStats().to_dict() for _ in range(num_assets)],
+        "calendar": CalendarStats(num_assets).to_dict()
+    }
+
+
+def refresh_metrics(asset_specs, state_path=None, trading_days_per_year=TRADING_DAYS_PER_YEAR):
+    """
+    Actualizează metricile activelor cu rândurile apărute în CSV-uri de la ultimul apel.
+
+    Primul apel (sau după rescrierea unui fișier) citește fișierele complet; apelurile
+    următoare citesc doar rândurile noi. Starea este salvată atomic în state_path.
+    Rezultatul este cel al return_panel.calculate_batch_metrics pe aceleași fișiere, până la
+    ultima dată la care toate activele au prețuri.
+
+    Args:
+        asset_specs (list): Dicționare cu parametrii fiecărui activ (ca în return_panel.py).
+        state_path (str, optional): Fișierul de stare (implicit default_state_path).
+        trading_days_per_year (int): Factorul de anualizare.
+
+    Returns:
+        dict: "metrics", "covariance", "correlation", "overlap", "num_common_days" (ca
+            return_panel.calculate_batch_metrics) și "new_rows" - numărul de prețuri noi per activ.
+    """
+    state_path = state_path or default_state_path(asset_specs)
+    state = _load_state(state_path, asset_specs)
+
+    updates = None
+    if state is not None:
+        updates = [_read_new_rows(spec, file_state) for spec, file_state in zip(asset_specs, state["files"])]
+        if any(file_state is None for _, file_state in updates):
+            # Un fișier a fost rescris: randamentele vechi nu mai sunt valabile, se reconstruiește tot
+            state, updates = None, None
+    while True:
+        if state is None:
+            state = _empty_state(len(asset_specs))
+            updates = [_read_new_rows(spec, {}) for spec in asset_specs]
+
+        return_stats = [ReturnStats.from_dict(s) for s in state["returns"]]
+        calendar_stats = CalendarStats.from_dict(state["calendar"])
+        new_returns, new_rows = [], []
+        for stats, (prices, _) in zip(return_stats, updates):
+            if stats.last_date is not None:
+                # Rândurile cu date deja incluse (ex: o zi descărcată din nou) sunt ignorate
+                prices = prices[prices.index > pd.Timestamp(stats.last_date)]
+            new_rows.append(len(prices))
+            new_returns.append(stats.update(prices.index.to_numpy(dtype='datetime64[ns]'), prices.to_numpy(dtype=np.float64)))
+        if calendar_stats.update(new_returns, [stats.last_date for stats in return_stats]):
+            break
+        # Calendarul s-a schimbat (un activ are acum și zile de weekend): se reconstruiește tot
+        state = None
+
+    _save_state(state_path, {
+        "format_version": STATE_FORMAT_VERSION,
+        "asset_specs": json.loads(json.dumps(asset_specs, default=str)),
+        "files": [file_state for _, file_state in updates],
+        "returns": [stats.to_dict() for stats in return_stats],
+        "calendar": calendar_stats.to_dict()
+    })
+
+    names = [spec.get("asset_name", spec["file_path"]) for spec in asset_specs]
+    covariance, correlation, overlap = calendar_stats.covariance(trading_days_per_year)
+    return {
+        "metrics": calendar_stats.metrics(names, trading_days_per_year),
+        "covariance": covariance,
+        "correlation": correlation,
+        "overlap": overlap,
+        "num_common_days": calendar_stats.num_common_days,
+        "new_rows": dict(zip(names, new_rows))
+    }
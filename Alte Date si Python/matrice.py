@@ -1,5 +1,9 @@
 import pandas as pd
 import numpy as np
+from correlation import correlation_matrix
+from date_formats import parse_date_column
+from price_cache import cached_price_frame, clean_numeric_columns
+from return_panel import build_calendar_panel
 
 def clean_price_data(series):
     """ Curăță o serie de prețuri (string) și o convertește în float. """
@@ -12,23 +16,47 @@ def load_and_prepare_asset_data(file_path, asset_ticker,
                                 date_col_name='Date', 
                                 price_col_name='Price', 
                                 date_format=None,
-                                skiprows_config=None):
+                                skiprows_config=None,
+                                use_cache=True):
     """ Încarcă, curăță și calculează randamentele zilnice logaritmice pentru un activ. """
     try:
-        # Load CSV, use first row as header, skip specified additional rows
-        df = pd.read_csv(file_path, header=0, skiprows=skiprows_config)
+        def build_price_frame():
+            # Load CSV, use first row as header, skip specified additional rows
+            df = pd.read_csv(file_path, header=0, skiprows=skiprows_config)
 
-        if df.empty:
-            raise ValueError(f"DataFrame-ul este gol după încărcarea {file_path} cu skiprows.")
+            if df.empty:
+                raise ValueError(f"DataFrame-ul este gol după încărcarea {file_path} cu skiprows.")
 
-        # Identifică coloana de dată efectivă
-        actual_date_col = date_col_name
-        if actual_date_col not in df.columns:
-            print(f"INFO ({asset_ticker}): Coloana de dată specificată '{actual_date_col}' nu a fost găsită în {file_path}. Se încearcă prima coloană: '{df.columns[0]}'.")
-            actual_date_col = df.columns[0]
+            # Identifică coloana de dată efectivă
+            actual_date_col = date_col_name
             if actual_date_col not in df.columns:
-                 raise ValueError(f"EROARE ({asset_ticker}): Nu s-a putut determina o coloană de dată validă în {file_path}. Coloane disponibile: {df.columns.tolist()}")
+                print(f"INFO ({asset_ticker}): Coloana de dată specificată '{actual_date_col}' nu a fost găsită în {file_path}. Se încearcă prima coloană: '{df.columns[0]}'.")
+                actual_date_col = df.columns[0]
+                if actual_date_col not in df.columns:
+                     raise ValueError(f"EROARE ({asset_ticker}): Nu s-a putut determina o coloană de dată validă în {file_path}. Coloane disponibile: {df.columns.tolist()}")
         
+            # Conversie dată: formatul este ales dintr-un eșantion de rânduri (date_formats.py),
+            # apoi coloana este parsată o singură dată
+            try:
+                df[actual_date_col], used_format, alternative_formats = parse_date_column(df[actual_date_col], date_format, file_path)
+            except (ValueError, TypeError) as e:
+                raise ValueError(f"EROARE ({asset_ticker}): Eșec la parsarea datei pentru {file_path} (col: '{actual_date_col}', val: '{df[actual_date_col].iloc[0] if not df.empty else 'N/A'}'). Detalii: {e}")
+            print(f"INFO ({asset_ticker}): Coloana '{actual_date_col}' pentru {file_path} a fost parsat ca dată cu formatul '{used_format or 'inferat'}'.")
+            if date_format and used_format != date_format:
+                print(f"INFO ({asset_ticker}): Formatul specificat '{date_format}' nu se potrivește datelor din {file_path}.")
+            elif alternative_formats:
+                print(f"AVERTISMENT ({asset_ticker}): Formatul datei din {file_path} este ambiguu (se potrivesc și {alternative_formats}); s-a ales '{used_format}'. Specificați date_format pentru a confirma.")
+
+            # Toate coloanele de preț/volum devin float64, ca tabelul să poată fi păstrat în cache
+            return clean_numeric_columns(df.set_index(actual_date_col))
+
+        # CSV-ul este parsat o singură dată; apelurile următoare citesc tabelul binar din cache
+        df = cached_price_frame(
+            file_path, build_price_frame,
+            key_params={"date_col_name": date_col_name, "date_format": date_format, "skiprows_config": skiprows_config},
+            use_cache=use_cache
+        )
+
         # Identifică coloana de preț efectivă
         actual_price_col = price_col_name
         if actual_price_col not in df.columns:
@@ -44,32 +72,7 @@ def load_and_prepare_asset_data(file_path, asset_ticker,
                 else: raise ValueError(f"Coloana de preț '{price_col_name}' sau alternative nu au fost găsite în {file_path}")
             print(f"INFO ({asset_ticker}): Se utilizează coloana de preț '{actual_price_col}' pentru {file_path}.")
 
-        # Conversie dată
-        try:
-            if date_format:
-                df[actual_date_col] = pd.to_datetime(df[actual_date_col], format=date_format, errors='raise')
-            else:
-                df[actual_date_col] = pd.to_datetime(df[actual_date_col], errors='raise')
-            print(f"INFO ({asset_ticker}): Coloana '{actual_date_col}' pentru {file_path} a fost parsat ca dată cu formatul specificat/inferat.")
-        except Exception as e: 
-            parsed_successfully = False
-            # Folosim %m/%d/%y pentru datele de tip '5/18/20'
-            common_formats = ["%Y-%m-%d", "%m/%d/%Y", "%d/%m/%Y", "%b %d, %Y", "%d-%b-%y", "%m/%d/%y"]
-            date_series_as_strings = df[actual_date_col].astype(str)
-            for fmt in common_formats:
-                if date_format and fmt == date_format: continue # Skip if primary format already failed
-                try:
-                    df[actual_date_col] = pd.to_datetime(date_series_as_strings, format=fmt, errors='raise')
-                    parsed_successfully = True
-                    print(f"INFO ({asset_ticker}): Data pentru {file_path} (col: '{actual_date_col}') a fost parsat cu formatul '{fmt}'.")
-                    break
-                except (ValueError, TypeError):
-                    continue
-            if not parsed_successfully:
-                 raise ValueError(f"EROARE ({asset_ticker}): Eșec la parsarea datei pentru {file_path} (col: '{actual_date_col}', val: '{df[actual_date_col].iloc[0] if not df.empty else 'N/A'}'). Detalii: {e}")
-        
-        df = df.sort_values(by=actual_date_col)
-        df = df.set_index(actual_date_col)
+        df = df.sort_index()
         
         # Curățare preț și calcul randamente logaritmice
         df[asset_ticker] = clean_price_data(df[actual_price_col])
@@ -93,10 +96,23 @@ def load_and_prepare_asset_data(file_path, asset_ticker,
         return None
 
 # Căile către fișierele CSV
+vestas_file = "vestas_history.csv"
 eth_file = "ETH 5Y Data - Sheet1.csv"
 wise_file = "wise_3y_history.csv"
 
-print("--- Calcularea Matricei de Corelare pentru ETH și Wise PLC ---")
+print("--- Calcularea Matricei de Corelare pentru Vestas, Wise PLC și ETH ---")
+
+# Încărcarea și pregătirea datelor pentru Vestas
+# Format dată pentru VESTAS: '2000-05-10' -> '%Y-%m-%d'
+# Coloană preț pentru VESTAS: 'Close'
+vestas_returns_df = load_and_prepare_asset_data(
+    vestas_file,
+    "VESTAS",
+    date_col_name='Price',
+    price_col_name='Close',
+    date_format='%Y-%m-%d',
+    skiprows_config=[1, 2]
+)
 
 # Încărcarea și pregătirea datelor pentru ETH
 # Format dată pentru ETH: 'Nov 17, 2023' -> '%b %d, %Y' -- Actualizat: '5/18/20' -> '%m/%d/%y'
@@ -122,65 +138,71 @@ wise_returns_df = load_and_prepare_asset_data(
     skiprows_config=[1, 2]
 )
 
-def calculate_and_print_correlation(df1, df2, name1, name2):
-    """Calculează și afișează corelația între două seturi de randamente."""
-    if df1 is not None and df2 is not None:
-        print(f"\n--- Corelație între {name1} și {name2} ---")
-        combined_returns = pd.merge(df1, df2, left_index=True, right_index=True, how='inner')
-        combined_returns_cleaned = combined_returns.dropna()
-
-        if len(combined_returns_cleaned) > 1:
-            correlation_matrix = combined_returns_cleaned.corr()
-            print("\nMatricea de Corelare a Randamentelor Zilnice Logaritmice:")
-            print(correlation_matrix)
-
-            first_date_overlap = combined_returns_cleaned.index.min().strftime('%Y-%m-%d')
-            last_date_overlap = combined_returns_cleaned.index.max().strftime('%Y-%m-%d')
-            num_overlapping_days = len(combined_returns_cleaned)
-
-            print(f"\nAnaliza de corelare s-a bazat pe {num_overlapping_days} zile de randament suprapuse,")
-            print(f"de la data de {first_date_overlap} până la {last_date_overlap}.")
-
-            corr_value = correlation_matrix.iloc[0, 1]
-            print(f"\nCoeficientul de corelație între randamentele zilnice logaritmice ale {name1} și {name2} este: {corr_value:.4f}")
-            if corr_value > 0.7:
-                interpretation = "Corelație pozitivă puternică: activele tind să se miște semnificativ în aceeași direcție."
-            elif corr_value > 0.3:
-                interpretation = "Corelație pozitivă moderată: activele tind să se miște oarecum în aceeași direcție."
-            elif corr_value > -0.3:
-                interpretation = "Corelație slabă sau neutră: mișcările prețurilor sunt în mare parte independente."
-            elif corr_value > -0.7:
-                interpretation = "Corelație negativă moderată: activele tind să se miște oarecum în direcții opuse."
-            else:
-                interpretation = "Corelație negativă puternică: activele tind să se miște semnificativ în direcții opuse."
-            print(f"Interpretare: {interpretation}")
-        else:
-            print(f"\nNu sunt suficiente date suprapuse pentru a calcula o corelație semnificativă între {name1} și {name2}.")
-            if not combined_returns.empty:
-                 print(f"INFO: Perioada de suprapunere a datelor înainte de dropna: {combined_returns.index.min()} - {combined_returns.index.max()}")
-                 print(f"INFO: Număr de zile în suprapunere inițială: {len(combined_returns)}")
-            else:
-                 print(f"INFO: Nu s-a găsit nicio suprapunere de date între {name1} și {name2}.")
+def interpret_correlation(corr_value):
+    """ Interpretarea calitativă a unui coeficient de corelație. """
+    if corr_value > 0.7:
+        return "Corelație pozitivă puternică: activele tind să se miște semnificativ în aceeași direcție."
+    elif corr_value > 0.3:
+        return "Corelație pozitivă moderată: activele tind să se miște oarecum în aceeași direcție."
+    elif corr_value > -0.3:
+        return "Corelație slabă sau neutră: mișcările prețurilor sunt în mare parte independente."
+    elif corr_value > -0.7:
+        return "Corelație negativă moderată: activele tind să se miște oarecum în direcții opuse."
     else:
-        print(f"\nNu s-au putut calcula randamentele pentru {name1} și/sau {name2}. Corelația nu poate fi calculată.")
-
-# Calcul și afișare corelație Wise & ETH
-if wise_returns_df is not None and eth_returns_df is not None:
-    calculate_and_print_correlation(wise_returns_df, eth_returns_df, "Wise PLC", "ETH")
-else:
-    print("\nNu s-au putut încărca datele pentru Wise și/sau ETH.")
-
-# Calcul și afișare corelație Vestas & Wise
-# if vestas_returns_df is not None and wise_returns_df is not None:
-#     calculate_and_print_correlation(vestas_returns_df, wise_returns_df, "Vestas", "Wise PLC")
-# else:
-#     print("\nNu s-au putut încărca datele pentru Vestas și/sau Wise.")
+        return "Corelație negativă puternică: activele tind să se miște semnificativ în direcții opuse."
+
+def calculate_and_print_correlation_matrix(returns_dfs, names, pairwise=True):
+    """
+    Aliniază o singură dată toate seriile de randamente și afișează matricea de corelație N x N.
+
+    Seriile sunt aliniate pe calendarul zilelor de tranzacționare ale acțiunilor
+    (return_panel.build_calendar_panel): randamentele ETH din weekend sunt adăugate la
+    randamentul zilei de luni, nu eliminate. Cu pairwise=True fiecare pereche folosește propria
+    fereastră de suprapunere (zilele în care ambele active au randament); cu pairwise=False doar
+    zilele comune tuturor activelor.
+
+    Returns:
+        pd.DataFrame sau None: Matricea de corelație pentru activele încărcate.
+    """
+    missing = [name for df, name in zip(returns_dfs, names) if df is None]
+    if missing:
+        print(f"\nNu s-au putut calcula randamentele pentru: {', '.join(missing)}.")
+    loaded = [(df, name) for df, name in zip(returns_dfs, names) if df is not None]
+    if len(loaded) < 2:
+        print("\nNu sunt suficiente active încărcate pentru a calcula o matrice de corelație.")
+        return None
 
-# Calcul și afișare corelație Vestas & ETH
-# if vestas_returns_df is not None and eth_returns_df is not None:
-#     calculate_and_print_correlation(vestas_returns_df, eth_returns_df, "Vestas", "ETH")
-# else:
-#     print("\nNu s-au putut încărca datele pentru Vestas și/sau ETH.")
+    # O singură aliniere pe calendarul comun, în loc de câte un merge pentru fiecare pereche
+    series_list = []
+    for df, _ in loaded:
+        returns = df.iloc[:, 0].dropna()
+        series_list.append((returns.index.to_numpy(dtype='datetime64[ns]'), returns.to_numpy(dtype=np.float64)))
+    loaded_names = [name for _, name in loaded]
+    _, panel, _ = build_calendar_panel(series_list)
+    corr, overlap = correlation_matrix(panel, pairwise=pairwise)
+    corr_df = pd.DataFrame(corr, index=loaded_names, columns=loaded_names)
+
+    print(f"\nMatricea de Corelare a Randamentelor Zilnice Logaritmice ({'perechi complete' if pairwise else 'zile comune tuturor activelor'}):")
+    print(corr_df)
+    print("\nNumărul de zile de randament suprapuse pentru fiecare pereche:")
+    print(pd.DataFrame(overlap, index=loaded_names, columns=loaded_names))
+
+    for i in range(len(loaded_names)):
+        for j in range(i + 1, len(loaded_names)):
+            name1, name2 = loaded_names[i], loaded_names[j]
+            if np.isnan(corr[i, j]):
+                print(f"\nNu sunt suficiente date suprapuse pentru a calcula o corelație semnificativă între {name1} și {name2} ({overlap[i, j]} zile).")
+                continue
+            print(f"\nCoeficientul de corelație între randamentele zilnice logaritmice ale {name1} și {name2} este: {corr[i, j]:.4f} ({overlap[i, j]} zile suprapuse)")
+            print(f"Interpretare: {interpret_correlation(corr[i, j])}")
+    return corr_df
+
+# Calcul și afișare corelație pentru toate activele deodată (ordinea din corr_matrix_risky: Vestas, Wise, ETH)
+risky_names = ["Vestas", "Wise PLC", "ETH"]
+risky_corr_df = calculate_and_print_correlation_matrix([vestas_returns_df, wise_returns_df, eth_returns_df], risky_names)
+if risky_corr_df is not None and list(risky_corr_df.index) == risky_names:
+    print("\ncorr_matrix_risky pentru simulările Monte Carlo (Vestas, Wise, ETH):")
+    print(np.array2string(risky_corr_df.to_numpy(), precision=2, separator=', ', floatmode='fixed'))
 
 # if eth_returns_df is not None and wise_returns_df is not None:
 #     # Combinarea DataFrame-urilor de randamente pe baza indexului de dată (aliniere)
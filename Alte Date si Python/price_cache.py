@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Cache binar pentru fișierele CSV cu prețuri (exporturile yfinance).
+#
+# La prima încărcare CSV-ul este parsat normal (read_csv, rândurile Ticker/Date sărite,
+# conversia datei, curățarea prețurilor), iar rezultatul este salvat lângă fișier, în
+# .price_cache/: datele ca datetime64[ns] și toate coloanele numerice ca o singură matrice
+# float64, în format .npy. Încărcările următoare deschid matricele cu memory-mapping, fără
+# copiere și fără parsare. Intrarea este invalidată automat când se schimbă mărimea sau
+# data modificării fișierului sursă, ori parametrii de parsare (key_params).
+
+CACHE_DIR_NAME = ".price_cache"
+CACHE_FORMAT_VERSION = 1
+
+
+def clean_numeric_columns(df):
+    """ Convertește toate coloanele în float64; coloanele text sunt curățate ca prețurile (ex: '1,234.5$'). """
+    cleaned = {}
+    for column in df.columns:
+        series = df[column]
+        # Textul este 'object' în pandas < 3 și 'str' în pandas 3
+        if series.dtype == 'object' or pd.api.types.is_string_dtype(series):
+            series = series.astype(str).str.replace(r'[^\d.]', '', regex=True).replace('', np.nan)
+        cleaned[column] = pd.to_numeric(series, errors='coerce').astype(np.float64)
+    return pd.DataFrame(cleaned, index=df.index)
+
+
+def _cache_paths(file_path, key_params):
+    """ Căile fișierelor de cache (metadate, date, valori) pentru un CSV și parametrii lui de parsare. """
+    file_path = os.path.abspath(file_path)
+    digest = hashlib.sha1(json.dumps([file_path, key_params], sort_keys=True, default=str).encode()).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    base = os.path.join(os.path.dirname(file_path), CACHE_DIR_NAME, f"{stem}-{digest}")
+    return base + ".json", base + ".dates.npy", base + ".values.npy"
+
+
+def _source_signature(file_path):
+    stat = os.stat(file_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def load_cached_frame(file_path, key_params=None):
+    """
+    Încarcă tabelul din cache, dacă există și corespunde fișierului sursă curent.
+
+    Returns:
+        pd.DataFrame sau None: Coloanele float64 (vedere read-only peste matricea
+            memory-mapped) cu indexul de date, sau None dacă nu există o intrare validă.
+    """
+    meta_path, dates_path, values_path = _cache_paths(file_path, key_params)
+    try:
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        if meta.get("format_version") != CACHE_FORMAT_VERSION or meta.get("source") != _source_signature(file_path):
+            return None
+        dates = np.load(dates_path, mmap_mode='r')
+        values = np.load(values_path, mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    index = pd.DatetimeIndex(dates, name=meta["index_name"])
+    return pd.DataFrame(values, index=index, columns=meta["columns"], copy=False)
+
+
+def _save_atomic(path, save):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        save(f)
+    os.replace(tmp_path, path)
+
+
+def store_cached_frame(file_path, frame, key_params=None):
+    """ Salvează tabelul (index de date + coloane numerice) în cache; fiecare fișier este scris atomic. """
+    meta_path, dates_path, values_path = _cache_paths(file_path, key_params)
+    os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+    signature = _source_signature(file_path)
+    dates = np.asarray(frame.index.values, dtype='datetime64[ns]')
+    values = np.ascontiguousarray(frame.to_numpy(dtype=np.float64))
+    _save_atomic(dates_path, lambda f: np.save(f, dates))
+    _save_atomic(values_path, lambda f: np.save(f, values))
+    # Metadatele sunt scrise ultimele: o intrare fără ele (ex: scriere întreruptă) este ignorată
+    meta = {
+        "format_version": CACHE_FORMAT_VERSION,
+        "source": signature,
+        "key_params": key_params,
+        "index_name": frame.index.name,
+        "columns": [str(column) for column in frame.columns]
+    }
+    _save_atomic(meta_path, lambda f: f.write(json.dumps(meta, default=str).encode()))
+
+
+def cached_price_frame(file_path, build_frame, key_params=None, use_cache=True):
+    """
+    Întoarce tabelul de prețuri al unui CSV, parsându-l doar dacă nu există în cache.
+
+    Args:
+        file_path (str): Calea către fișierul CSV.
+        build_frame (callable): Fără argumente; parsează CSV-ul și întoarce un DataFrame cu
+            indexul de date și coloane numerice (vezi clean_numeric_columns), sau None la eroare.
+        key_params (dict, optional): Parametrii de parsare (coloana de dată, formatul,
+            skiprows); intră în cheia cache-ului.
+        use_cache (bool): False parsează mereu CSV-ul, fără a citi sau scrie cache-ul.
+
+    Returns:
+        pd.DataFrame sau None: Rezultatul lui build_frame (sau copia lui din cache).
+    """
+    if not use_cache:
+        return build_frame()
+    frame = load_cached_frame(file_path, key_params)
+    if frame is not None:
+        return frame
+    frame = build_frame()
+    if frame is not None:
+        try:
+            store_cached_frame(file_path, frame, key_params)
+        except OSError as e:
+            print(f"AVERTISMENT: Cache-ul pentru '{file_path}' nu a putut fi scris: {e}")
+    return frame
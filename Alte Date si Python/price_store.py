@@ -0,0 +1,218 @@
+import json
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# Depozit local de prețuri, câte un fișier per ticker, completat incremental.
+#
+# Pentru fiecare ticker se păstrează un CSV în formatul exporturilor yfinance (antet Price,
+# rândurile Ticker/Date, apoi datele), deci poate fi citit de app.py și matrice.py cu aceiași
+# parametri (skiprows_config=[1, 2]), și un fișier JSON cu intervalele de date deja descărcate.
+# La o reîmprospătare se cer furnizorului doar intervalele lipsă; zilele fără tranzacționare
+# (weekend, sărbători) rămân acoperite de interval, deci nu sunt cerute din nou. Ziua curentă
+# nu este descărcată niciodată, fiindcă prețul ei nu este încă final.
+#
+# Furnizorul este orice obiect cu metoda download(ticker, start, end) care întoarce un
+# DataFrame cu index de date și coloanele de preț, pentru zilele start <= zi < end:
+#   - YahooFinanceProvider: descarcă prin yfinance;
+#   - CsvProvider: citește dintr-un CSV local (ex: un fișier de test), fără rețea.
+# Un interval este marcat ca acoperit doar dacă furnizorul a întors date pentru el sau a
+# ridicat NoDataAvailable (știe sigur că nu există date). Un DataFrame gol este tratat ca
+# eșec (yfinance întoarce un tabel gol la erori de rețea sau de ticker), deci intervalul
+# este cerut din nou la următoarea reîmprospătare.
+
+DATE_FORMAT = "%Y-%m-%d"
+
+
+class NoDataAvailable(Exception):
+    """ Ridicată de furnizor când știe sigur că nu există prețuri în intervalul cerut. """
+
+
+class YahooFinanceProvider:
+    """ Descarcă prețurile zilnice prin yfinance (importat doar când este folosit). """
+
+    def download(self, ticker, start, end):
+        import yfinance as yf
+        data = yf.download(ticker, start=start, end=end, progress=False)
+        if isinstance(data.columns, pd.MultiIndex):
+            data.columns = data.columns.get_level_values(0)
+        return data
+
+
+class CsvProvider:
+    """ Servește prețurile din CSV-uri locale (format yfinance), ex: pentru teste fără rețea. """
+
+    def __init__(self, paths_by_ticker):
+        self.paths_by_ticker = paths_by_ticker
+        self.requests = []
+
+    def download(self, ticker, start, end):
+        self.requests.append((ticker, start, end))
+        data = _read_store_csv(self.paths_by_ticker[ticker])
+        data = data[(data.index >= pd.Timestamp(start)) & (data.index < pd.Timestamp(end))]
+        if not len(data):
+            # Fișierul local este complet: lipsa rândurilor înseamnă că nu există date
+            raise NoDataAvailable(f"{ticker}: niciun preț între {start} și {end}.")
+        return data
+
+
+def _read_store_csv(path):
+    data = pd.read_csv(path, header=0, skiprows=[1, 2], index_col=0, float_precision='round_trip')
+    data.index = pd.to_datetime(data.index, format=DATE_FORMAT)
+    data.index.name = "Date"
+    return data.astype(np.float64)
+
+
+def _format_rows(data):
+    """ Rândurile CSV (fără antet); valorile sunt scrise cu repr, ca rescrierea să fie identică. """
+    return "".join(
+        ",".join([day.strftime(DATE_FORMAT)] + ["" if value != value else repr(float(value)) for value in row]) + "\n"
+        for day, row in zip(data.index, data.to_numpy(dtype=np.float64))
+    )
+
+
+def merge_ranges(ranges):
+    """ Unește intervalele [start, end) care se suprapun sau se ating; datele sunt text 'YYYY-MM-DD'. """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def missing_ranges(ranges, start, end):
+    """ Părțile intervalului [start, end) neacoperite de ranges. """
+    missing = []
+    cursor = start
+    for covered_start, covered_end in merge_ranges(ranges):
+        if covered_end <= cursor:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > cursor:
+            missing.append([cursor, covered_start])
+        cursor = max(cursor, covered_end)
+    if cursor < end:
+        missing.append([cursor, end])
+    return missing
+
+
+class PriceStore:
+    """
+    Depozitul de prețuri dintr-un director.
+
+    Args:
+        directory (str): Directorul fișierelor (creat la prima scriere).
+        provider: Furnizorul de date (vezi începutul modulului); implicit YahooFinanceProvider.
+    """
+
+    def __init__(self, directory, provider=None):
+        self.directory = directory
+        self.provider = provider if provider is not None else YahooFinanceProvider()
+
+    def csv_path(self, ticker):
+        return os.path.join(self.directory, f"{ticker.lower()}_history.csv")
+
+    def _meta_path(self, ticker):
+        return os.path.join(self.directory, f"{ticker.lower()}_history.json")
+
+    def covered_ranges(self, ticker):
+        """ Intervalele [start, end) deja descărcate pentru ticker. """
+        try:
+            with open(self._meta_path(ticker), "r") as f:
+                return json.load(f)["ranges"]
+        except (OSError, ValueError, KeyError):
+            return []
+
+    def refresh(self, ticker, start, end=None):
+        """
+        Descarcă doar intervalele lipsă din [start, end) și le adaugă în depozit.
+
+        Args:
+            ticker (str): Simbolul (ex: 'ETH-USD').
+            start (str): Prima zi cerută ('YYYY-MM-DD').
+            end (str, optional): Ziua de după ultima zi cerută; implicit (și cel mult) ziua curentă.
+
+        Returns:
+            int: Numărul de rânduri noi adăugate.
+
+        Raises:
+            ValueError: Datele descărcate nu au coloanele deja păstrate (nimic nu este scris).
+        """
+        today = date.today().strftime(DATE_FORMAT)
+        end = min(end or today, today)
+        ranges = self.covered_ranges(ticker)
+        gaps = missing_ranges(ranges, start, end)
+        if not gaps:
+            return 0
+
+        existing = _read_store_csv(self.csv_path(ticker)) if os.path.exists(self.csv_path(ticker)) else None
+        fetched = []
+        covered = []
+        for gap in gaps:
+            try:
+                data = self.provider.download(ticker, *gap)
+            except NoDataAvailable:
+                covered.append(gap)
+                continue
+            if data is not None and len(data):
+                fetched.append(data)
+                covered.append(gap)
+        if not covered:
+            return 0
+
+        new_rows = 0
+        if fetched:
+            new_data = pd.concat(fetched)
+            if existing is not None:
+                missing_columns = [column for column in existing.columns if column not in new_data.columns]
+                if missing_columns:
+                    raise ValueError(f"{ticker}: datele descărcate nu au coloanele {missing_columns} din '{self.csv_path(ticker)}'.")
+                new_data = new_data[existing.columns]
+            new_data = new_data[~new_data.index.duplicated(keep='last')].sort_index().astype(np.float64)
+            if existing is not None:
+                new_data = new_data[~new_data.index.isin(existing.index)]
+            new_rows = len(new_data)
+            self._write(ticker, existing, new_data)
+        self._write_meta(ticker, merge_ranges(ranges + covered))
+        return new_rows
+
+    def _write(self, ticker, existing, new_data):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.csv_path(ticker)
+        if existing is not None and len(new_data) and new_data.index[0] > existing.index.max():
+            # Zilele noi sunt după ultima zi din fișier: se adaugă la sfârșit, fără rescriere
+            # (incremental_metrics.py citește apoi doar rândurile adăugate)
+            with open(path, "a") as f:
+                f.write(_format_rows(new_data))
+            return
+        data = new_data if existing is None else pd.concat([existing, new_data]).sort_index()
+        columns = [str(column) for column in data.columns]
+        header = (",".join(["Price"] + columns) + "\n" + ",".join(["Ticker"] + [ticker] * len(columns)) + "\n"
+                  + "Date" + "," * len(columns) + "\n")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(header + _format_rows(data))
+        os.replace(tmp_path, path)
+
+    def _write_meta(self, ticker, ranges):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._meta_path(ticker) + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"ticker": ticker, "ranges": ranges}, f)
+        os.replace(tmp_path, self._meta_path(ticker))
+
+    def read(self, ticker, start=None, end=None):
+        """ Prețurile din depozit (fără rețea) pentru start <= zi < end. """
+        if not os.path.exists(self.csv_path(ticker)):
+            return None
+        data = _read_store_csv(self.csv_path(ticker))
+        if start:
+            data = data[data.index >= pd.Timestamp(start)]
+        if end:
+            data = data[data.index < pd.Timestamp(end)]
+        return data
@@ -0,0 +1,284 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from correlation import correlation_matrix, positive_definite_correlation
+from date_formats import parse_date_column
+from price_cache import cached_price_frame, clean_numeric_columns
+
+# Metrici istorice pentru mai multe active deodată.
+#
+# Fiecare activ este descris de un dicționar cu aceiași parametri ca
+# calculate_historical_metrics din app.py (file_path, asset_name, date_col_name,
+# price_col_name, date_format, skiprows_config, start_date_str, end_date_str).
+# Fișierele sunt încărcate în paralel, randamentele logaritmice sunt aliniate într-o
+# singură matrice (date x active), iar metricile, covarianța și corelația sunt calculate
+# vectorizat pe coloane, deci costul per activ nu crește cu numărul de active. În
+# calculate_batch_metrics metricile și corelațiile sunt calculate pe calendarul zilelor de
+# tranzacționare (build_calendar_panel), ca în matrice.py: randamentele ETH din weekend sunt
+# cumulate în ziua de luni, nu eliminate.
+
+TRADING_DAYS_PER_YEAR = 252
+PRICE_COLUMN_ALTERNATIVES = ['close', 'price', 'adj close', 'last']
+
+
+def load_log_returns(spec, use_cache=True):
+    """
+    Încarcă prețurile unui activ și calculează randamentele zilnice logaritmice.
+
+    Returns:
+        tuple: (np.ndarray datetime64[ns], np.ndarray float64) - datele și randamentele,
+            în ordine cronologică (primul preț nu are randament).
+
+    Raises:
+        ValueError: Fișierul nu poate fi interpretat sau nu conține suficiente date.
+    """
+    file_path = spec["file_path"]
+    date_col_name = spec.get("date_col_name", "Date")
+    date_format = spec.get("date_format")
+    skiprows_config = spec.get("skiprows_config")
+
+    def build_price_frame():
+        df = pd.read_csv(file_path, header=0, skiprows=skiprows_config)
+        if df.empty:
+            raise ValueError(f"DataFrame-ul este gol după încărcarea fișierului '{file_path}'.")
+        actual_date_col = date_col_name if date_col_name in df.columns else df.columns[0]
+        df[actual_date_col], _, _ = parse_date_column(df[actual_date_col], date_format, file_path)
+        return clean_numeric_columns(df.set_index(actual_date_col))
+
+    # Aceeași cheie de cache ca în app.py și matrice.py: tabelul parsat este refolosit
+    df = cached_price_frame(
+        file_path, build_price_frame,
+        key_params={"date_col_name": date_col_name, "date_format": date_format, "skiprows_config": skiprows_config},
+        use_cache=use_cache
+    )
+
+    price_col = spec.get("price_col_name", "Close")
+    if price_col not in df.columns:
+        alternatives = [col for col in df.columns if col.lower() in PRICE_COLUMN_ALTERNATIVES]
+        if not alternatives:
+            raise ValueError(f"Coloana de preț '{price_col}' sau alternative nu au fost găsite în '{file_path}'. Coloane disponibile: {list(df.columns)}")
+        price_col = alternatives[0]
+
+    prices = df[price_col]
+    prices = prices[~prices.index.isna()].sort_index()
+    if spec.get("start_date_str"):
+        prices = prices[prices.index >= pd.to_datetime(spec["start_date_str"])]
+    if spec.get("end_date_str"):
+        prices = prices[prices.index <= pd.to_datetime(spec["end_date_str"])]
+    prices = prices.dropna()
+
+    values = prices.to_numpy(dtype=np.float64)
+    log_returns = np.log(values[1:] / values[:-1])
+    valid = ~np.isnan(log_returns)
+    if np.count_nonzero(valid) < 2:
+        raise ValueError(f"Nu sunt suficiente date de randament în '{file_path}' după procesare.")
+    return prices.index.to_numpy(dtype='datetime64[ns]')[1:][valid], log_returns[valid]
+
+
+def align_log_returns(series_list):
+    """
+    Aliniază seriile de randamente pe reuniunea datelor.
+
+    Returns:
+        tuple: (dates, panel) - datele (sortate) și matricea (date x active), cu NaN
+            acolo unde un activ nu are randament la data respectivă.
+    """
+    dates = np.unique(np.concatenate([series_dates for series_dates, _ in series_list]))
+    panel = np.full((len(dates), len(series_list)), np.nan)
+    for j, (series_dates, series_returns) in enumerate(series_list):
+        panel[np.searchsorted(dates, series_dates), j] = series_returns
+    return dates, panel
+
+
+def is_weekday_only(dates):
+    """ True dacă niciuna dintre date nu cade în weekend (o serie pe zile de tranzacționare). """
+    days = np.asarray(dates, dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64)
+    # 1970-01-01 a fost joi: (zile + 3) % 7 dă 0 pentru luni, ..., 5 și 6 pentru weekend
+    return not np.any((days + 3) % 7 >= 5)
+
+
+def master_calendar(series_list):
+    """
+    Calendarul comun implicit pentru build_calendar_panel.
+
+    Reuniunea datelor seriilor fără observații în weekend (acțiuni, zile de tranzacționare);
+    dacă toate seriile au și weekend-uri (ex: doar criptomonede), reuniunea tuturor datelor.
+    """
+    all_dates = [np.asarray(series_dates, dtype='datetime64[ns]') for series_dates, _ in series_list]
+    weekdays_only = [d for d in all_dates if is_weekday_only(d)]
+    return np.unique(np.concatenate(weekdays_only or all_dates))
+
+
+def build_calendar_panel(series_list, calendar=None):
+    """
+    Aliniază seriile de randamente pe un calendar comun, cumulând randamentele din zilele lipsă.
+
+    Pentru fiecare activ se calculează suma cumulată a randamentelor logaritmice și se caută
+    (searchsorted) ultima observație la fiecare dată a calendarului. Randamentul unei date este
+    diferența sumelor cumulate față de data precedentă la care activul a avut observație, deci
+    randamentele din zilele care nu sunt în calendar (ex: weekend-ul ETH pe calendarul acțiunilor)
+    sau în care activul nu tranzacționează (sărbători) sunt adăugate la următoarea dată validă,
+    nu pierdute. Nu există operații per rând, doar câteva operații vectoriale per activ.
+
+    Args:
+        series_list (list): (dates, log_returns) pentru fiecare activ, ca load_log_returns.
+        calendar (array-like, optional): Datele panelului; implicit master_calendar(series_list).
+
+    Returns:
+        tuple: (calendar, panel, mask) - datele (T,), matricea randamentelor (T, N) cu NaN unde
+            activul nu are randament și masca valorilor valide (T, N).
+    """
+    calendar = master_calendar(series_list) if calendar is None else np.unique(np.asarray(calendar, dtype='datetime64[ns]'))
+    panel = np.full((len(calendar), len(series_list)), np.nan)
+    mask = np.zeros((len(calendar), len(series_list)), dtype=bool)
+    for j, (series_dates, series_returns) in enumerate(series_list):
+        series_dates = np.asarray(series_dates, dtype='datetime64[ns]')
+        series_returns = np.asarray(series_returns, dtype=np.float64)
+        present = ~np.isnan(series_returns)
+        series_dates, series_returns = series_dates[present], series_returns[present]
+        if len(series_dates) == 0:
+            continue
+        levels = np.concatenate(([0.0], np.cumsum(series_returns)))   # levels[k] = suma primelor k randamente
+        position = np.searchsorted(series_dates, calendar, side='right')  # câte randamente sunt <= data
+        trades = (position > 0) & (series_dates[np.maximum(position - 1, 0)] == calendar)
+        rows = np.flatnonzero(trades)
+        if len(rows) == 0:
+            continue
+        # Prima dată validă: baza este nivelul de la data precedentă din calendar; dacă nu există
+        # (calendarul începe după istoricul activului), intervalul nu este definit și se omite
+        if rows[0] == 0 and position[0] > 1:
+            rows = rows[1:]
+            base = levels[position[0]]
+        else:
+            base = levels[position[rows[0] - 1]] if rows[0] > 0 else 0.0
+        row_levels = levels[position[rows]]
+        panel[rows, j] = np.diff(row_levels, prepend=base)
+        mask[rows, j] = True
+    return calendar, panel, mask
+
+
+def metrics_array(records):
+    """
+    Array structurat din dicționare de metrici (câmpurile din calculate_historical_metrics).
+
+    Returns:
+        np.ndarray: Un rând per activ, cu câmpuri accesibile prin nume (ex: metrics["annual_volatility"]).
+    """
+    name_length = max([len(record["asset_name"]) for record in records] + [1])
+    metrics = np.empty(len(records), dtype=[
+        ("asset_name", f"U{name_length}"),
+        ("expected_annual_return", "f8"),
+        ("annual_volatility", "f8"),
+        ("num_daily_returns_used", "i8"),
+        ("mean_daily_log_return", "f8"),
+        ("std_dev_daily_log_return", "f8"),
+        ("first_date_used", "datetime64[D]"),
+        ("last_date_used", "datetime64[D]")
+    ])
+    for i, record in enumerate(records):
+        metrics[i] = tuple(np.datetime64('NaT') if record[field] is None else record[field] for field in metrics.dtype.names)
+    return metrics
+
+
+def panel_metrics(asset_names, dates, panel, trading_days_per_year=TRADING_DAYS_PER_YEAR):
+    """
+    Metricile fiecărui activ (pe toate randamentele lui) și covarianța / corelația anuală
+    (pe zilele în care toate activele au randament), într-o singură trecere vectorizată.
+
+    Returns:
+        dict: "metrics" (array structurat, un rând per activ, aceleași câmpuri ca dicționarul
+            din calculate_historical_metrics), "covariance", "correlation" (N x N, anualizate)
+            și "num_common_days".
+    """
+    present = ~np.isnan(panel)
+    counts = present.sum(axis=0)
+    filled = np.where(present, panel, 0.0)
+    mean_daily = filled.sum(axis=0) / counts
+    std_daily = np.sqrt((np.where(present, panel - mean_daily, 0.0) ** 2).sum(axis=0) / counts)
+
+    first_idx = present.argmax(axis=0)
+    last_idx = len(dates) - 1 - present[::-1].argmax(axis=0)
+    metrics = metrics_array([{
+        "asset_name": name,
+        "expected_annual_return": np.exp(mean * trading_days_per_year) - 1,
+        "annual_volatility": std * np.sqrt(trading_days_per_year),
+        "num_daily_returns_used": count,
+        "mean_daily_log_return": mean,
+        "std_dev_daily_log_return": std,
+        "first_date_used": dates[first],
+        "last_date_used": dates[last]
+    } for name, mean, std, count, first, last in zip(asset_names, mean_daily, std_daily, counts, first_idx, last_idx)])
+
+    common = panel[present.all(axis=1)]
+    if len(common) >= 2:
+        centered = common - common.mean(axis=0)
+        covariance = centered.T @ centered / len(common) * trading_days_per_year
+        std_annual = np.sqrt(np.diag(covariance))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlation = covariance / np.outer(std_annual, std_annual)
+    else:
+        covariance = correlation = np.full((len(asset_names), len(asset_names)), np.nan)
+
+    return {
+        "metrics": metrics,
+        "covariance": covariance,
+        "correlation": correlation,
+        "num_common_days": len(common)
+    }
+
+
+def calculate_batch_metrics(asset_specs, max_workers=8, use_cache=True):
+    """
+    Încarcă toate activele în paralel și calculează metricile pe panelul aliniat.
+
+    Activele care nu pot fi încărcate sunt raportate și omise (ca în app.py, unde
+    calculate_historical_metrics întoarce None pentru ele).
+
+    Args:
+        asset_specs (list): Dicționare cu parametrii fiecărui activ (vezi începutul modulului).
+        max_workers (int): Numărul de fire pentru încărcare.
+        use_cache (bool): Folosește cache-ul binar al CSV-urilor (price_cache.py).
+
+    Metricile fiecărui activ și corelațiile sunt calculate pe același panel, aliniat pe
+    calendarul zilelor de tranzacționare (build_calendar_panel), ca în matrice.py: randamentele
+    ETH din weekend sunt cumulate în ziua de luni, deci anualizarea cu TRADING_DAYS_PER_YEAR
+    este corectă pentru toate activele. Corelația este calculată pe perechi
+    (correlation.correlation_matrix); covarianța anuală este corelația corectată să fie
+    pozitiv definită (correlation.positive_definite_correlation, pentru Cholesky), scalată cu
+    volatilitățile anuale din metrics, deci sqrt(diag(covariance)) = annual_volatility.
+
+    Returns:
+        dict: "metrics" (ca în panel_metrics), "covariance", "correlation" (pe perechi,
+            necorectată), "overlap" (zilele folosite pentru fiecare pereche), "num_common_days"
+            (zilele în care toate activele au randament), plus "dates" și "log_returns"
+            (panelul pe calendarul de tranzacționare), sau None dacă niciun activ nu a putut fi încărcat.
+    """
+    def load(spec):
+        try:
+            return load_log_returns(spec, use_cache)
+        except (OSError, ValueError) as e:
+            print(f"EROARE ({spec.get('asset_name', spec['file_path'])}): {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(asset_specs)))) as executor:
+        loaded = list(executor.map(load, asset_specs))
+
+    names = [spec.get("asset_name", spec["file_path"]) for spec, series in zip(asset_specs, loaded) if series is not None]
+    series_list = [series for series in loaded if series is not None]
+    if not series_list:
+        return None
+    dates, panel, mask = build_calendar_panel(series_list)
+    metrics = panel_metrics(names, dates, panel)["metrics"]
+    correlation, overlap = correlation_matrix(panel, pairwise=True)
+    volatility = metrics["annual_volatility"]
+    return {
+        "metrics": metrics,
+        "covariance": positive_definite_correlation(correlation) * np.outer(volatility, volatility),
+        "correlation": correlation,
+        "overlap": overlap,
+        "num_common_days": int(mask.all(axis=1).sum()),
+        "dates": dates,
+        "log_returns": panel
+    }
@@ -0,0 +1,164 @@
+import numpy as np
+
+# Covarianța și corelația în timp (fereastră mobilă și EWMA) pentru un panel de randamente
+# (date x active) cu lipsuri (NaN), de obicei panelul pe calendarul zilelor de tranzacționare
+# (return_panel.build_calendar_panel), în care un rând este o zi de tranzacționare.
+#
+# Pentru fiecare zi se păstrează momentele pe perechi, ca în correlation.py: numărul de zile
+# comune, Σx_i și Σx_i² pe zilele comune cu j, și Σx_i x_j. O zi nouă actualizează momentele în
+# O(N²): fereastra mobilă adaugă ziua nouă și scoate ziua ieșită din fereastră, iar EWMA
+# înmulțește momentele cu factorul de descompunere și adaugă ziua nouă. Tot panelul este
+# parcurs o singură dată, în O(T·N²). Ferestrele sunt măsurate în rânduri ale panelului, iar
+# anualizarea folosește numărul de rânduri pe an (vezi periods_per_year pentru un panel dat).
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def periods_per_year(dates):
+    """ Numărul mediu de rânduri ale panelului într-un an calendaristic (pentru anualizare). """
+    dates = np.asarray(dates, dtype='datetime64[ns]')
+    years = (dates[-1] - dates[0]) / np.timedelta64(1, 'D') / 365.25
+    if years <= 0:
+        raise ValueError("Panelul trebuie să acopere cel puțin două date distincte.")
+    return (len(dates) - 1) / years
+
+
+def _row_moments(rows):
+    """ Momentele pe perechi ale unui bloc de rânduri, forma (4, N, N). """
+    present = ~np.isnan(rows)
+    mask = present.astype(np.float64)
+    values = np.where(present, rows, 0.0)
+    return np.stack((mask.T @ mask, values.T @ mask, (values ** 2).T @ mask, values.T @ values))
+
+
+def _covariance_from_moments(moments, valid):
+    """ Covarianța (nenormalizată anual) și corelația din momente; perechile invalide primesc NaN. """
+    counts, sums, sums_sq, cross = moments
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_i = sums / counts
+        mean_j = sums.T / counts
+        covariance = cross / counts - mean_i * mean_j
+        var_i = np.maximum(sums_sq / counts - mean_i ** 2, 0.0)
+        correlation = np.clip(covariance / np.sqrt(var_i * var_i.T), -1.0, 1.0)
+    covariance[~valid] = np.nan
+    correlation[~valid] = np.nan
+    return covariance, correlation
+
+
+def _centered(panel):
+    """ Scade media fiecărei coloane (nu schimbă covarianțele, dar păstrează precizia sumelor). """
+    panel = np.asarray(panel, dtype=float)
+    present = ~np.isnan(panel)
+    counts = present.sum(axis=0)
+    means = np.where(present, panel, 0.0).sum(axis=0) / np.maximum(counts, 1)
+    return panel - means
+
+
+def _series_result(covariance, correlation, trading_days_per_year):
+    covariance *= trading_days_per_year
+    volatility = np.sqrt(np.diagonal(covariance, axis1=1, axis2=2))
+    return {"covariance": covariance, "correlation": correlation, "volatility": volatility}
+
+
+def rolling_covariance(panel, window, min_periods=None, trading_days_per_year=TRADING_DAYS_PER_YEAR):
+    """
+    Covarianța, corelația și volatilitatea pe o fereastră mobilă de `window` rânduri.
+
+    Momentele ferestrei sunt actualizate incremental (+ ziua nouă, - ziua ieșită) și
+    recalculate exact la fiecare `window` rânduri, ca erorile de rotunjire să nu se acumuleze.
+
+    Args:
+        panel (np.ndarray): Randamentele zilnice logaritmice, forma (T, N), NaN pentru lipsuri.
+        window (int): Lungimea ferestrei (rânduri).
+        min_periods (int, optional): Numărul minim de zile comune pentru o pereche. Implicit
+            jumătate din fereastră: activele nu au randament în toate rândurile (sărbători
+            locale, istoric care începe mai târziu).
+        trading_days_per_year (float): Factorul de anualizare (rânduri pe an).
+
+    Returns:
+        dict: "covariance" și "correlation" de forma (T, N, N) și "volatility" (T, N),
+            anualizate, cu NaN până când fereastra are suficiente observații.
+    """
+    if window < 2:
+        raise ValueError(f"Fereastra trebuie să aibă cel puțin 2 rânduri (primit: {window}).")
+    min_periods = max(window // 2 if min_periods is None else min_periods, 2)
+    panel = _centered(panel)
+    num_rows, num_assets = panel.shape
+    covariance = np.empty((num_rows, num_assets, num_assets))
+    correlation = np.empty((num_rows, num_assets, num_assets))
+
+    moments = None
+    for t in range(num_rows):
+        if t % window == 0:
+            moments = _row_moments(panel[max(0, t - window + 1):t + 1])
+        else:
+            moments += _row_moments(panel[t:t + 1])
+            if t >= window:
+                moments -= _row_moments(panel[t - window:t - window + 1])
+        covariance[t], correlation[t] = _covariance_from_moments(moments, moments[0] >= min_periods)
+    return _series_result(covariance, correlation, trading_days_per_year)
+
+
+def ewma_covariance(panel, decay=0.94, min_periods=20, trading_days_per_year=TRADING_DAYS_PER_YEAR):
+    """
+    Covarianța, corelația și volatilitatea ponderate exponențial (EWMA).
+
+    Ponderea unei zile cu k rânduri în urmă este decay^k; media este și ea ponderată (nu se
+    presupune randament mediu zero). 0.94 este valoarea RiskMetrics pentru date zilnice.
+
+    Args:
+        panel (np.ndarray): Randamentele zilnice logaritmice, forma (T, N), NaN pentru lipsuri.
+        decay (float): Factorul de descompunere, între 0 și 1.
+        min_periods (int): Numărul minim de zile comune observate pentru o pereche.
+        trading_days_per_year (int): Factorul de anualizare.
+
+    Returns:
+        dict: La fel ca rolling_covariance.
+    """
+    if not 0 < decay < 1:
+        raise ValueError(f"Factorul de descompunere trebuie să fie între 0 și 1 (primit: {decay}).")
+    panel = _centered(panel)
+    num_rows, num_assets = panel.shape
+    covariance = np.empty((num_rows, num_assets, num_assets))
+    correlation = np.empty((num_rows, num_assets, num_assets))
+
+    moments = np.zeros((4, num_assets, num_assets))
+    observations = np.zeros((num_assets, num_assets))
+    for t in range(num_rows):
+        row_moments = _row_moments(panel[t:t + 1])
+        moments *= decay
+        moments += row_moments
+        observations += row_moments[0]
+        covariance[t], correlation[t] = _covariance_from_moments(moments, observations >= max(min_periods, 2))
+    return _series_result(covariance, correlation, trading_days_per_year)
+
+
+def save_covariance_series(path, dates, asset_names, series_by_name):
+    """
+    Salvează mai multe serii (ex: {"rolling_63": ..., "ewma_0.94": ...}) într-un fișier .npz.
+
+    Fișierul poate fi citit cu load_covariance_series, fără a recalcula nimic.
+    """
+    arrays = {"dates": np.asarray(dates, dtype='datetime64[ns]'), "asset_names": np.asarray(asset_names, dtype=str)}
+    for name, series in series_by_name.items():
+        for key, values in series.items():
+            arrays[f"{name}/{key}"] = values
+    np.savez(path, **arrays)
+
+
+def load_covariance_series(path):
+    """
+    Citește un fișier salvat cu save_covariance_series.
+
+    Returns:
+        tuple: (dates, asset_names, series_by_name).
+    """
+    series_by_name = {}
+    with np.load(path) as data:
+        dates = data["dates"]
+        asset_names = data["asset_names"].tolist()
+        for key in data.files:
+            if "/" in key:
+                name, field = key.split("/", 1)
+                series_by_name.setdefault(name, {})[field] = data[key]
+    return dates, asset_names, series_by_name
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+from date_formats import parse_date_column
+from incremental_metrics import ReturnStats
+from price_cache import clean_numeric_columns
+from return_panel import PRICE_COLUMN_ALTERNATIVES, TRADING_DAYS_PER_YEAR
+
+# Metricile istorice calculate în flux, pentru fișiere prea mari pentru a fi încărcate întregi.
+#
+# CSV-ul este citit în bucăți de chunk_size rânduri, doar coloanele de dată și de preț. Fiecare
+# bucată actualizează starea Welford (incremental_metrics.ReturnStats), care păstrează ultimul
+# preț de închidere de la o bucată la alta, așa că memoria folosită depinde doar de chunk_size,
+# nu de lungimea istoricului. Rândurile trebuie să fie în ordine cronologică (ca în exporturile
+# yfinance): fișierul nu este sortat, iar o dată mai veche decât precedenta este o eroare.
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def stream_historical_metrics(file_path, asset_name,
+                              date_col_name='Date',
+                              price_col_name='Close',
+                              date_format=None,
+                              skiprows_config=None,
+                              start_date_str=None,
+                              end_date_str=None,
+                              chunk_size=DEFAULT_CHUNK_SIZE,
+                              trading_days_per_year=TRADING_DAYS_PER_YEAR):
+    """
+    Calculează aceleași metrici ca calculate_historical_metrics (app.py), citind fișierul în bucăți.
+
+    Args:
+        file_path (str): Calea către fișierul CSV.
+        asset_name (str): Numele activului.
+        date_col_name (str): Numele coloanei cu datele (prima coloană, dacă nu există).
+        price_col_name (str): Numele coloanei de preț (sau o alternativă: Close, Price, ...).
+        date_format (str, optional): Formatul datei preferat (vezi date_formats.py).
+        skiprows_config (list, optional): Rândurile sărite după antet.
+        start_date_str (str, optional): Data de început pentru filtrare.
+        end_date_str (str, optional): Data de sfârșit; citirea se oprește după ea.
+        chunk_size (int): Numărul de rânduri citite odată.
+        trading_days_per_year (int): Factorul de anualizare.
+
+    Returns:
+        dict: Aceleași chei ca în calculate_historical_metrics.
+
+    Raises:
+        ValueError: Coloanele nu sunt găsite, datele nu sunt în ordine cronologică sau nu
+            există suficiente randamente.
+    """
+    columns = pd.read_csv(file_path, header=0, nrows=0).columns
+    date_col = date_col_name if date_col_name in columns else columns[0]
+    price_col = price_col_name
+    if price_col not in columns:
+        alternatives = [col for col in columns if col.lower() in PRICE_COLUMN_ALTERNATIVES]
+        if not alternatives:
+            raise ValueError(f"Coloana de preț '{price_col_name}' sau alternative nu au fost găsite în '{file_path}'. Coloane disponibile: {list(columns)}")
+        price_col = alternatives[0]
+    start_date = pd.to_datetime(start_date_str) if start_date_str else None
+    end_date = pd.to_datetime(end_date_str) if end_date_str else None
+
+    stats = ReturnStats()
+    last_price_date = None
+    reader = pd.read_csv(file_path, header=0, skiprows=skiprows_config, usecols=[date_col, price_col], chunksize=chunk_size)
+    with reader:
+        for chunk in reader:
+            # Formatul este detectat pe prima bucată și memorat pentru fișier (date_formats.py)
+            chunk[date_col], _, _ = parse_date_column(chunk[date_col], date_format, file_path)
+            prices = clean_numeric_columns(chunk.set_index(date_col))[price_col]
+            prices = prices[~prices.index.isna()]
+            dates = prices.index.to_numpy(dtype='datetime64[ns]')
+            if len(dates) and (np.any(dates[1:] < dates[:-1]) or (last_price_date is not None and dates[0] < last_price_date)):
+                raise ValueError(f"Datele din '{file_path}' nu sunt în ordine cronologică; modul în bucăți nu sortează fișierul.")
+            if len(dates):
+                last_price_date = dates[-1]
+
+            if start_date is not None:
+                prices = prices[prices.index >= start_date]
+            past_end = end_date is not None and len(dates) and dates[-1] > np.datetime64(end_date, 'ns')
+            if end_date is not None:
+                prices = prices[prices.index <= end_date]
+            prices = prices.dropna()
+            stats.update(prices.index.to_numpy(dtype='datetime64[ns]'), prices.to_numpy(dtype=np.float64))
+            if past_end:
+                break
+
+    if stats.count < 2:
+        raise ValueError(f"Nu sunt suficiente date de randament în '{file_path}' după procesare.")
+    metrics = stats.metrics(asset_name, trading_days_per_year)
+    metrics['first_date_used'] = pd.Timestamp(metrics['first_date_used']).strftime('%Y-%m-%d')
+    metrics['last_date_used'] = pd.Timestamp(metrics['last_date_used']).strftime('%Y-%m-%d')
+    return metrics
@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+
+from correlation import correlation_matrix, positive_definite_correlation
+
+
+def test_pairwise_matches_pandas():
+    rng = np.random.default_rng(0)
+    panel = rng.normal(size=(300, 4))
+    panel[rng.random(panel.shape) < 0.2] = np.nan
+    correlation, overlap = correlation_matrix(panel, pairwise=True)
+    np.testing.assert_allclose(correlation, pd.DataFrame(panel).corr().to_numpy(), atol=1e-12)
+    np.testing.assert_array_equal(overlap, (~np.isnan(panel)).T.astype(int) @ (~np.isnan(panel)).astype(int))
+
+
+def test_positive_definite_correlation():
+    # Corelații pe perechi incompatibile: a ~ b, b ~ c, dar a ~ -c
+    inconsistent = np.array([[1.0, 0.9, -0.9], [0.9, 1.0, 0.9], [-0.9, 0.9, 1.0]])
+    repaired = positive_definite_correlation(inconsistent)
+    np.testing.assert_array_equal(np.diag(repaired), 1.0)
+    np.testing.assert_array_equal(repaired, repaired.T)
+    np.linalg.cholesky(repaired)
+
+    valid = np.array([[1.0, 0.3], [0.3, 1.0]])
+    np.testing.assert_array_equal(positive_definite_correlation(valid), valid)
@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import date_formats
+from date_formats import AMBIGUOUS_SAMPLE_SIZE, SAMPLE_SIZE, detect_date_format, parse_date_column, sniff_date_format
+
+
+@pytest.fixture(autouse=True)
+def empty_memo(monkeypatch):
+    monkeypatch.setattr(date_formats, "_detected_formats", {})
+
+
+def _sample_rows(n, sample_size):
+    return set(np.unique(np.linspace(0, n - 1, sample_size).astype(int)).tolist())
+
+
+def test_ambiguous_sample_is_widened(monkeypatch):
+    # Toate zilele <= 12, în afară de un rând văzut doar de eșantionul mare
+    n = 5000
+    dates = pd.date_range("2020-01-01", periods=12).strftime("%m/%d/%Y").tolist()
+    values = np.array([dates[i % 12] for i in range(n)], dtype=object)
+    row = min(_sample_rows(n, AMBIGUOUS_SAMPLE_SIZE) - _sample_rows(n, SAMPLE_SIZE))
+    values[row] = "01/25/2020"
+
+    sample_sizes = []
+    sample_values = date_formats._sample_values
+    monkeypatch.setattr(date_formats, "_sample_values", lambda v, size: sample_sizes.append(size) or sample_values(v, size))
+    assert sniff_date_format(values) == ("%m/%d/%Y", [])
+    assert sample_sizes == [SAMPLE_SIZE, AMBIGUOUS_SAMPLE_SIZE]
+
+
+def test_unresolved_ambiguity_reports_alternatives():
+    values = np.array(["01/02/2020", "03/04/2020", "12/11/2020"], dtype=object)
+    assert sniff_date_format(values) == ("%m/%d/%Y", ["%d/%m/%Y"])
+    # Formatul indicat de apelant are prioritate, dacă se potrivește
+    assert sniff_date_format(values, preferred="%d/%m/%Y") == ("%d/%m/%Y", ["%m/%d/%Y"])
+    assert sniff_date_format(values, preferred="%Y-%m-%d") == ("%m/%d/%Y", ["%d/%m/%Y"])
+
+
+def test_parse_date_column_uses_one_format():
+    series = pd.Series(["13/01/2020", "14/01/2020", None], name="Date")
+    parsed, fmt, alternatives = parse_date_column(series)
+    assert fmt == "%d/%m/%Y" and alternatives == []
+    assert parsed.iloc[0] == pd.Timestamp("2020-01-13") and pd.isna(parsed.iloc[2])
+
+
+def test_memoized_format_does_not_survive_a_rewrite(tmp_path):
+    path = tmp_path / "prices.csv"
+    path.write_text("Date\n01/02/2020\n")
+    values = np.array(["01/02/2020"], dtype=object)
+    assert detect_date_format(values, source_path=str(path), column="Date") == ("%m/%d/%Y", ["%d/%m/%Y"], False)
+    assert detect_date_format(values, source_path=str(path), column="Date")[2]
+
+    # Fișierul rescris (aceeași mărime, altă dată a modificării) este verificat din nou
+    path.write_text("Date\n13/02/2020\n")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert detect_date_format(np.array(["13/02/2020"], dtype=object), source_path=str(path), column="Date") == ("%d/%m/%Y", [], False)
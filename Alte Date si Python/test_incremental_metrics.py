@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from incremental_metrics import CalendarStats, ReturnStats, _merge_moments, _merge_pairwise_moments, refresh_metrics
+from return_panel import build_calendar_panel, calculate_batch_metrics
+
+
+@pytest.mark.parametrize("shape", [(500,), (500, 3)])
+def test_merged_chunks_equal_full_batch(shape):
+    data = np.random.default_rng(0).normal(0.001, 0.02, shape)
+    count, mean = 0, np.zeros(shape[1:])
+    m2 = np.zeros(shape[1:] * 2)
+    for chunk in np.split(data, [1, 2, 50, 50, 333]):
+        count, mean, m2 = _merge_moments(count, mean, m2, chunk)
+    centered = data - data.mean(axis=0)
+    assert count == len(data)
+    np.testing.assert_allclose(mean, data.mean(axis=0), rtol=1e-12)
+    np.testing.assert_allclose(m2, centered.T @ centered if data.ndim == 2 else centered @ centered, rtol=1e-10)
+
+
+def test_return_stats_in_chunks_equal_full_history():
+    rng = np.random.default_rng(1)
+    dates = pd.bdate_range("2020-01-01", periods=300).to_numpy()
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 300)))
+    chunked = ReturnStats()
+    for part in np.split(np.arange(300), [1, 120, 121, 250]):
+        chunked = ReturnStats.from_dict(chunked.to_dict())
+        chunked.update(dates[part], closes[part])
+    full = ReturnStats()
+    full.update(dates, closes)
+
+    log_returns = np.diff(np.log(closes))
+    assert chunked.count == full.count == 299
+    assert chunked.mean == pytest.approx(log_returns.mean(), rel=1e-12)
+    assert chunked.m2 == pytest.approx(((log_returns - log_returns.mean()) ** 2).sum(), rel=1e-10)
+    assert chunked.first_date == full.first_date and chunked.last_date == full.last_date
+
+
+def test_pairwise_moments_in_chunks_equal_full_batch():
+    rng = np.random.default_rng(2)
+    block = rng.normal(0.001, 0.02, (400, 3))
+    block[rng.random(block.shape) < 0.3] = np.nan
+    state = tuple(np.zeros((3, 3)) for _ in range(4))
+    for chunk in np.split(block, [1, 7, 7, 200]):
+        state = _merge_pairwise_moments(*state, chunk)
+    count, mean, m2, comoment = state
+    for i in range(3):
+        for j in range(3):
+            both = ~np.isnan(block[:, i]) & ~np.isnan(block[:, j])
+            x, y = block[both, i], block[both, j]
+            assert count[i, j] == both.sum()
+            assert mean[i, j] == pytest.approx(x.mean(), rel=1e-12)
+            assert m2[i, j] == pytest.approx(((x - x.mean()) ** 2).sum(), rel=1e-10)
+            assert comoment[i, j] == pytest.approx(((x - x.mean()) * (y - y.mean())).sum(), rel=1e-10)
+
+
+def test_calendar_stats_wait_for_every_asset():
+    rng = np.random.default_rng(3)
+    every_day = pd.date_range("2021-01-01", periods=120).to_numpy(dtype="datetime64[ns]")
+    weekdays = pd.bdate_range("2021-01-04", "2021-04-30").to_numpy(dtype="datetime64[ns]")
+    eth, equity = rng.normal(0, 0.03, len(every_day)), rng.normal(0, 0.01, len(weekdays))
+    stats = CalendarStats(2)
+    # Acțiunea rămâne în urmă la prima actualizare: zilele ETH de după ea așteaptă
+    assert stats.update([(every_day[:80], eth[:80]), (weekdays[:30], equity[:30])], [every_day[79], weekdays[29]])
+    # Istoricul ETH începe înainte de calendar, deci primul rând nu are bază
+    assert stats.num_common_days == 29
+    assert stats.update([(every_day[80:], eth[80:]), (weekdays[30:], equity[30:])], [every_day[-1], weekdays[-1]])
+
+    _, panel, mask = build_calendar_panel([(every_day, eth), (weekdays, equity)])
+    assert stats.num_common_days == mask.all(axis=1).sum()
+    assert stats.count[0, 0] == mask[:, 0].sum()
+    assert stats.mean[0, 0] == pytest.approx(np.nanmean(panel[:, 0]), rel=1e-12)
+
+
+def test_new_weekend_day_requires_rebuild():
+    weekdays = pd.bdate_range("2021-01-04", periods=10).to_numpy(dtype="datetime64[ns]")
+    stats = CalendarStats(2)
+    assert stats.update([(weekdays, np.zeros(10)), (weekdays, np.zeros(10))], [weekdays[-1], weekdays[-1]])
+    saturday = np.array([weekdays[-1] + np.timedelta64(1, "D")])
+    assert not stats.update([(saturday, np.zeros(1)), (saturday[:0], np.zeros(0))], [saturday[0], weekdays[-1]])
+
+
+def _write_prices(path, dates, closes, mode="w"):
+    lines = ["Date,Close\n"] if mode == "w" else []
+    lines += [f"{d:%Y-%m-%d},{c!r}\n" for d, c in zip(dates, closes)]
+    with open(path, mode) as f:
+        f.writelines(lines)
+
+
+def test_refresh_after_append_equals_fresh_run(tmp_path):
+    rng = np.random.default_rng(3)
+    dates = pd.bdate_range("2022-01-03", periods=260)
+    closes = 50 * np.exp(np.cumsum(rng.normal(0, 0.01, (260, 2)), axis=0))
+    specs = [{"file_path": str(tmp_path / f"{name}.csv"), "asset_name": name} for name in ("A", "B")]
+    for j, spec in enumerate(specs):
+        _write_prices(spec["file_path"], dates[:200], closes[:200, j].tolist())
+    refresh_metrics(specs, state_path=str(tmp_path / "state.json"))
+
+    for j, spec in enumerate(specs):
+        _write_prices(spec["file_path"], dates[200:], closes[200:, j].tolist(), mode="a")
+    incremental = refresh_metrics(specs, state_path=str(tmp_path / "state.json"))
+    fresh = refresh_metrics(specs, state_path=str(tmp_path / "fresh.json"))
+
+    assert incremental["new_rows"] == {"A": 60, "B": 60}
+    assert incremental["num_common_days"] == fresh["num_common_days"] == 259
+    for field in ("mean_daily_log_return", "std_dev_daily_log_return", "num_daily_returns_used"):
+        np.testing.assert_allclose(incremental["metrics"][field], fresh["metrics"][field], rtol=1e-12)
+    np.testing.assert_allclose(incremental["covariance"], fresh["covariance"], rtol=1e-10)
+
+
+def test_refresh_matches_batch_on_crypto_and_equity_calendars(tmp_path):
+    rng = np.random.default_rng(4)
+    every_day = pd.date_range("2022-01-01", "2022-12-31")
+    # Zile de tranzacționare cu o sărbătoare (ziua ETH de atunci este cumulată în ziua următoare)
+    weekdays = pd.bdate_range("2022-01-10", "2022-12-30").drop(pd.Timestamp("2022-04-15"))
+    closes = {"eth": 100 * np.exp(np.cumsum(rng.normal(0, 0.04, len(every_day)))),
+              "equity": 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(weekdays))))}
+    dates = {"eth": every_day, "equity": weekdays}
+    specs = [{"file_path": str(tmp_path / f"{name}.csv"), "asset_name": name, "date_format": "%Y-%m-%d"} for name in dates]
+
+    # Două reîmprospătări: prima se termină sâmbătă pentru ETH, vineri pentru acțiune
+    split = pd.Timestamp("2022-07-16")
+    for spec, name in zip(specs, dates):
+        keep = dates[name] <= split
+        _write_prices(spec["file_path"], dates[name][keep], closes[name][keep].tolist())
+    refresh_metrics(specs, state_path=str(tmp_path / "state.json"))
+    for spec, name in zip(specs, dates):
+        keep = dates[name] > split
+        _write_prices(spec["file_path"], dates[name][keep], closes[name][keep].tolist(), mode="a")
+    incremental = refresh_metrics(specs, state_path=str(tmp_path / "state.json"))
+    batch = calculate_batch_metrics(specs, use_cache=False)
+
+    np.testing.assert_allclose(incremental["correlation"], batch["correlation"], rtol=1e-10)
+    np.testing.assert_allclose(incremental["covariance"], batch["covariance"], rtol=1e-10)
+    np.testing.assert_array_equal(incremental["overlap"], batch["overlap"])
+    assert incremental["num_common_days"] == batch["num_common_days"]
+    for field in ("mean_daily_log_return", "std_dev_daily_log_return"):
+        np.testing.assert_allclose(incremental["metrics"][field], batch["metrics"][field], rtol=1e-10)
+    for field in ("num_daily_returns_used", "first_date_used", "last_date_used"):
+        np.testing.assert_array_equal(incremental["metrics"][field], batch["metrics"][field])
@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from price_cache import _cache_paths, cached_price_frame, clean_numeric_columns
+
+
+class CountingBuilder:
+    """ Parsează CSV-ul ca loaderele din repo și numără parsările. """
+
+    def __init__(self, path):
+        self.path = path
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        df = pd.read_csv(self.path, header=0, skiprows=[1])
+        df["Date"] = pd.to_datetime(df["Date"], format="%Y-%m-%d")
+        return clean_numeric_columns(df.set_index("Date"))
+
+
+def _write_csv(path, closes):
+    dates = pd.bdate_range("2024-01-01", periods=len(closes)).strftime("%Y-%m-%d")
+    lines = ["Date,Close,Volume", "Ticker,TEST,TEST"] + [f"{d},\"{c:,.2f}$\",{i}" for i, (d, c) in enumerate(zip(dates, closes))]
+    path.write_text("\n".join(lines) + "\n")
+
+
+def test_second_load_reads_the_cache(tmp_path):
+    path = tmp_path / "prices.csv"
+    _write_csv(path, [1000.5, 1001.25, 999.0])
+    build = CountingBuilder(path)
+    first = cached_price_frame(str(path), build, key_params={"skiprows": [1]})
+    second = cached_price_frame(str(path), build, key_params={"skiprows": [1]})
+    assert build.calls == 1
+    # Indexul din cache este datetime64[ns], indiferent de rezoluția parsată
+    pd.testing.assert_frame_equal(second, first, check_freq=False, check_index_type=False)
+    assert second["Close"].tolist() == [1000.5, 1001.25, 999.0]
+
+
+def test_changed_source_or_parameters_rebuild(tmp_path):
+    path = tmp_path / "prices.csv"
+    _write_csv(path, [10.0, 11.0])
+    build = CountingBuilder(path)
+    cached_price_frame(str(path), build)
+
+    # Aceeași mărime, altă dată a modificării
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    cached_price_frame(str(path), build)
+    assert build.calls == 2
+
+    # Alt conținut, altă mărime
+    _write_csv(path, [10.0, 11.0, 12.0])
+    assert len(cached_price_frame(str(path), build)) == 3
+    assert build.calls == 3
+
+    cached_price_frame(str(path), build, key_params={"date_format": "%Y-%m-%d"})
+    assert build.calls == 4
+    cached_price_frame(str(path), build)
+    assert build.calls == 4
+
+
+def test_interrupted_write_is_not_read(tmp_path):
+    path = tmp_path / "prices.csv"
+    _write_csv(path, [10.0, 11.0])
+    build = CountingBuilder(path)
+    cached_price_frame(str(path), build)
+    meta_path, dates_path, values_path = _cache_paths(str(path), None)
+    assert os.path.exists(dates_path) and os.path.exists(values_path)
+
+    # Matricele au fost scrise, metadatele nu (scrierea lor este ultima)
+    os.remove(meta_path)
+    np.save(values_path, np.zeros((5, 2)))
+    frame = cached_price_frame(str(path), build)
+    assert build.calls == 2
+    assert frame["Close"].tolist() == [10.0, 11.0]
+
+
+def test_use_cache_false_writes_nothing(tmp_path):
+    path = tmp_path / "prices.csv"
+    _write_csv(path, [10.0, 11.0])
+    build = CountingBuilder(path)
+    cached_price_frame(str(path), build, use_cache=False)
+    cached_price_frame(str(path), build, use_cache=False)
+    assert build.calls == 2
+    assert os.listdir(tmp_path) == ["prices.csv"]
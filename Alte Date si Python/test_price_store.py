@@ -0,0 +1,79 @@
+import pandas as pd
+import pytest
+
+from price_store import CsvProvider, NoDataAvailable, PriceStore, merge_ranges, missing_ranges
+
+
+def _write_source(path, days, columns=("Close", "Open")):
+    data = pd.DataFrame({column: [100.0 + i for i in range(len(days))] for column in columns},
+                        index=pd.to_datetime(days))
+    lines = ["Price," + ",".join(columns), "Ticker," + ",".join(["TEST"] * len(columns)), "Date" + "," * len(columns)]
+    lines += [day.strftime("%Y-%m-%d") + "," + ",".join(repr(float(v)) for v in row) for day, row in zip(data.index, data.to_numpy())]
+    path.write_text("\n".join(lines) + "\n")
+    return data
+
+
+class EmptyProvider:
+    """ Ca yfinance la o eroare de rețea: un tabel gol. """
+
+    def __init__(self):
+        self.requests = []
+
+    def download(self, ticker, start, end):
+        self.requests.append((ticker, start, end))
+        return pd.DataFrame()
+
+
+class NoDataProvider:
+    def download(self, ticker, start, end):
+        raise NoDataAvailable(ticker)
+
+
+def test_merge_and_missing_ranges():
+    assert merge_ranges([["2020-01-05", "2020-01-10"], ["2020-01-01", "2020-01-05"]]) == [["2020-01-01", "2020-01-10"]]
+    assert missing_ranges([["2020-01-03", "2020-01-05"]], "2020-01-01", "2020-01-10") == [
+        ["2020-01-01", "2020-01-03"], ["2020-01-05", "2020-01-10"]]
+    assert missing_ranges([["2020-01-01", "2020-01-10"]], "2020-01-02", "2020-01-09") == []
+
+
+def test_empty_download_does_not_mark_range_covered(tmp_path):
+    provider = EmptyProvider()
+    store = PriceStore(tmp_path / "store", provider)
+    assert store.refresh("TEST", "2020-01-01", "2020-02-01") == 0
+    assert store.covered_ranges("TEST") == []
+    # Intervalul eșuat este cerut din nou
+    store.refresh("TEST", "2020-01-01", "2020-02-01")
+    assert provider.requests == [("TEST", "2020-01-01", "2020-02-01")] * 2
+
+
+def test_explicit_no_data_marks_range_covered(tmp_path):
+    store = PriceStore(tmp_path / "store", NoDataProvider())
+    assert store.refresh("TEST", "2020-01-01", "2020-02-01") == 0
+    assert store.covered_ranges("TEST") == [["2020-01-01", "2020-02-01"]]
+
+
+def test_refresh_fills_only_gaps(tmp_path):
+    source = _write_source(tmp_path / "source.csv", pd.bdate_range("2020-01-01", "2020-03-31"))
+    provider = CsvProvider({"TEST": tmp_path / "source.csv"})
+    store = PriceStore(tmp_path / "store", provider)
+
+    store.refresh("TEST", "2020-02-01", "2020-03-01")
+    store.refresh("TEST", "2020-01-01", "2020-04-01")
+    assert provider.requests[1:] == [("TEST", "2020-01-01", "2020-02-01"), ("TEST", "2020-03-01", "2020-04-01")]
+    assert store.covered_ranges("TEST") == [["2020-01-01", "2020-04-01"]]
+    pd.testing.assert_frame_equal(store.read("TEST"), source, check_names=False, check_freq=False)
+    assert store.refresh("TEST", "2020-01-01", "2020-04-01") == 0
+
+
+def test_column_mismatch_raises_before_writing(tmp_path):
+    _write_source(tmp_path / "a.csv", pd.bdate_range("2020-01-01", "2020-01-31"))
+    _write_source(tmp_path / "b.csv", pd.bdate_range("2020-02-01", "2020-02-28"), columns=("Open",))
+    store = PriceStore(tmp_path / "store", CsvProvider({"TEST": tmp_path / "a.csv"}))
+    store.refresh("TEST", "2020-01-01", "2020-02-01")
+    before = (store.read("TEST"), store.covered_ranges("TEST"))
+
+    store.provider = CsvProvider({"TEST": tmp_path / "b.csv"})
+    with pytest.raises(ValueError):
+        store.refresh("TEST", "2020-01-01", "2020-03-01")
+    pd.testing.assert_frame_equal(store.read("TEST"), before[0])
+    assert store.covered_ranges("TEST") == before[1]
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from return_panel import build_calendar_panel, calculate_batch_metrics, is_weekday_only, master_calendar
+
+
+def _write_prices(path, dates, closes):
+    pd.DataFrame({"Date": pd.DatetimeIndex(dates).strftime("%Y-%m-%d"), "Close": closes}).to_csv(path, index=False)
+    return {"file_path": str(path), "asset_name": path.stem, "date_format": "%Y-%m-%d"}
+
+
+def _random_prices(rng, num_days, volatility):
+    return 100 * np.exp(np.cumsum(rng.normal(0, volatility, num_days)))
+
+
+def test_batch_covariance_matches_reported_volatility(tmp_path):
+    rng = np.random.default_rng(0)
+    every_day = pd.date_range("2022-01-01", "2023-12-31")
+    weekdays = pd.bdate_range("2022-01-01", "2023-12-31")
+    specs = [
+        _write_prices(tmp_path / "eth.csv", every_day, _random_prices(rng, len(every_day), 0.04)),
+        _write_prices(tmp_path / "equity.csv", weekdays, _random_prices(rng, len(weekdays), 0.01)),
+        # Istoric mai scurt: fiecare pereche are altă fereastră de suprapunere
+        _write_prices(tmp_path / "listed_later.csv", weekdays[300:], _random_prices(rng, len(weekdays) - 300, 0.02))
+    ]
+    results = calculate_batch_metrics(specs, use_cache=False)
+
+    volatility = results["metrics"]["annual_volatility"]
+    np.testing.assert_allclose(np.sqrt(np.diag(results["covariance"])), volatility, rtol=1e-12)
+    np.testing.assert_allclose(volatility, np.nanstd(results["log_returns"], axis=0) * np.sqrt(252), rtol=1e-12)
+    np.linalg.cholesky(results["covariance"])
+    assert results["overlap"][0, 2] < results["overlap"][0, 1]
+    # Calendarul zilelor de tranzacționare; primul rând ETH nu are bază (istoricul începe înainte)
+    np.testing.assert_array_equal(results["dates"], weekdays[1:].to_numpy(dtype="datetime64[ns]"))
+    assert results["metrics"]["num_daily_returns_used"][0] == len(weekdays) - 2
+
+
+def _days(*dates):
+    return np.array(dates, dtype="datetime64[ns]")
+
+
+def test_weekend_returns_are_summed_into_monday():
+    # ETH: vineri 2024-01-05 ... luni 2024-01-08; acțiunea: joi, vineri, luni
+    eth_dates = _days("2024-01-04", "2024-01-05", "2024-01-06", "2024-01-07", "2024-01-08")
+    eth_returns = np.array([0.01, 0.02, 0.03, 0.04, 0.05])
+    equity_dates = _days("2024-01-04", "2024-01-05", "2024-01-08")
+    equity_returns = np.array([-0.01, -0.02, -0.03])
+    dates, panel, mask = build_calendar_panel([(eth_dates, eth_returns), (equity_dates, equity_returns)])
+
+    np.testing.assert_array_equal(dates, equity_dates)
+    assert panel[2, 0] == pytest.approx(0.03 + 0.04 + 0.05)
+    np.testing.assert_allclose(panel[:, 1], equity_returns, rtol=1e-12)
+    np.testing.assert_array_equal(mask, [[True, True], [True, True], [True, True]])
+
+
+def test_calendar_panel_mask_and_sum_preservation():
+    rng = np.random.default_rng(1)
+    every_day = pd.date_range("2024-01-01", "2024-03-31").to_numpy(dtype="datetime64[ns]")
+    # Acțiunea începe mai târziu și are o sărbătoare
+    weekdays = pd.bdate_range("2024-01-10", "2024-03-29").drop(pd.Timestamp("2024-02-19")).to_numpy(dtype="datetime64[ns]")
+    holiday_calendar = pd.bdate_range("2024-01-10", "2024-03-29").to_numpy(dtype="datetime64[ns]")
+    other = holiday_calendar[holiday_calendar != np.datetime64("2024-03-01")]
+    series = [(every_day, rng.normal(size=len(every_day))), (weekdays, rng.normal(size=len(weekdays))),
+              (other, rng.normal(size=len(other)))]
+    assert not is_weekday_only(every_day) and is_weekday_only(weekdays)
+    dates, panel, mask = build_calendar_panel(series)
+
+    np.testing.assert_array_equal(dates, master_calendar(series))
+    np.testing.assert_array_equal(dates, holiday_calendar)
+    np.testing.assert_array_equal(mask, ~np.isnan(panel))
+    # Masca: fiecare activ are valoare exact în zilele calendarului în care tranzacționează,
+    # în afară de primul rând ETH (istoricul începe înainte de calendar, fără bază)
+    np.testing.assert_array_equal(mask[:, 1], np.isin(dates, weekdays))
+    np.testing.assert_array_equal(mask[:, 2], np.isin(dates, other))
+    assert not mask[0, 0] and mask[1:, 0].all()
+    # Suma se păstrează: randamentele din afara calendarului ajung în ziua următoare
+    # (de la data din calendar dinaintea primei valori până la ultima valoare)
+    for (series_dates, series_returns), column, valid in zip(series, panel.T, mask.T):
+        first_row = np.flatnonzero(valid)[0]
+        start = dates[first_row - 1] if first_row > 0 else np.datetime64("1970-01-01", "ns")
+        window = (series_dates > start) & (series_dates <= dates[valid][-1])
+        assert column[valid].sum() == pytest.approx(series_returns[window].sum(), rel=1e-12)
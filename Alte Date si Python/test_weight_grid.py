@@ -0,0 +1,44 @@
+from itertools import product
+
+import numpy as np
+import pytest
+
+from weight_grid import grid_size, iter_weight_grid, rank_weights, unrank_weights, weight_grid
+
+
+def _brute_force_grid(num_assets, step, total):
+    values = range(step, total + 1, step)
+    return np.array([w for w in product(values, repeat=num_assets) if sum(w) == total])
+
+
+@pytest.mark.parametrize("num_assets, step, total", [(1, 5, 100), (2, 10, 100), (3, 5, 100), (4, 5, 100), (5, 10, 100)])
+def test_grid_matches_lexicographic_enumeration(num_assets, step, total):
+    expected = _brute_force_grid(num_assets, step, total)
+    grid = weight_grid(num_assets, step, total)
+    assert grid_size(num_assets, step, total) == len(expected)
+    np.testing.assert_array_equal(grid, expected)
+
+
+@pytest.mark.parametrize("num_assets, step", [(3, 1), (4, 5), (6, 10)])
+def test_rank_unrank_round_trip(num_assets, step):
+    grid = weight_grid(num_assets, step)
+    indices = np.arange(len(grid))
+    np.testing.assert_array_equal(rank_weights(grid, step), indices)
+    np.testing.assert_array_equal(unrank_weights(indices, num_assets, step), grid)
+    for index in (0, len(grid) // 2, len(grid) - 1):
+        assert rank_weights(unrank_weights(index, num_assets, step), step) == index
+
+
+def test_iter_weight_grid_resumes_at_start():
+    blocks = list(iter_weight_grid(4, 5, chunk_size=100, start=250))
+    assert [start for start, _ in blocks] == list(range(250, grid_size(4, 5), 100))
+    np.testing.assert_array_equal(np.vstack([block for _, block in blocks]), weight_grid(4, 5)[250:])
+
+
+def test_invalid_weights_and_indices_raise():
+    with pytest.raises(ValueError):
+        rank_weights([50, 45, 6], step=1)
+    with pytest.raises(ValueError):
+        rank_weights([0, 50, 50], step=5)
+    with pytest.raises(IndexError):
+        unrank_weights(grid_size(3, 5), 3, step=5)
@@ -0,0 +1,120 @@
+from math import comb
+
+import numpy as np
+
+# Grila de ponderi generată la cerere (înlocuiește fostele fișiere triplets.json /
+# quadruplets_divisible_by_5.json).
+#
+# Grila conține toate compozițiile lui `total` (implicit 100%) în `num_assets` părți
+# pozitive, multipli de `step`, în ordine lexicografică - aceeași ordine ca în fișierele
+# JSON generate anterior de triplets.py. Fiecare set de ponderi are un index în grilă; conversia
+# index <-> ponderi (rank/unrank) costă O(num_assets), indiferent de mărimea grilei.
+
+
+def _grid_units(num_assets, step, total):
+    if num_assets < 1:
+        raise ValueError(f"Numărul de active trebuie să fie cel puțin 1 (primit: {num_assets}).")
+    if step <= 0 or total % step != 0:
+        raise ValueError(f"Totalul {total} trebuie să fie un multiplu pozitiv al pasului {step}.")
+    units = total // step
+    if units < num_assets:
+        raise ValueError(f"Nu se pot forma {num_assets} ponderi pozitive multipli de {step} cu totalul {total}.")
+    return units
+
+
+def grid_size(num_assets, step=1, total=100):
+    """ Numărul de seturi de ponderi din grilă: C(total/step - 1, num_assets - 1). """
+    units = _grid_units(num_assets, step, total)
+    return comb(units - 1, num_assets - 1)
+
+
+def _binomial_table(units, num_assets):
+    """ Tabelul C(t, k) pentru t < units și k < num_assets, ca int64. """
+    if comb(units - 1, num_assets - 1) >= 2**62:
+        raise ValueError("Grila este prea mare pentru indecși pe 64 de biți.")
+    table = np.zeros((units, num_assets), dtype=np.int64)
+    for k in range(num_assets):
+        table[:, k] = [comb(t, k) for t in range(units)]
+    return table
+
+
+def rank_weights(weights, step=1, total=100):
+    """
+    Indexul unui set de ponderi (sau al fiecărui rând dintr-o matrice) în grilă.
+
+    Args:
+        weights (array-like): Ponderile în procente, forma (num_assets,) sau (n, num_assets).
+        step (int): Pasul grilei.
+        total (int): Suma ponderilor.
+
+    Returns:
+        int sau np.ndarray: Indexul (indecșii) în ordinea lexicografică a grilei.
+    """
+    weights = np.asarray(weights)
+    single = weights.ndim == 1
+    weights = np.atleast_2d(weights)
+    num_assets = weights.shape[1]
+    units = _grid_units(num_assets, step, total)
+    parts = weights // step
+    if np.any(parts * step != weights) or np.any(parts < 1) or np.any(parts.sum(axis=1) != units):
+        raise ValueError(f"Ponderile trebuie să fie multipli pozitivi de {step} care însumează {total}.")
+
+    table = _binomial_table(units, num_assets)
+    ranks = np.zeros(len(parts), dtype=np.int64)
+    remaining = np.full(len(parts), units, dtype=np.int64)
+    for j in range(num_assets - 1):
+        m = num_assets - j
+        # Seturile cu același prefix și o valoare mai mică pe poziția j:
+        # sum_{v=1}^{u-1} C(rem - v - 1, m - 2) = C(rem - 1, m - 1) - C(rem - u, m - 1)
+        ranks += table[remaining - 1, m - 1] - table[remaining - parts[:, j], m - 1]
+        remaining -= parts[:, j]
+    return int(ranks[0]) if single else ranks
+
+
+def unrank_weights(indices, num_assets, step=1, total=100):
+    """
+    Setul de ponderi (în procente) de la indexul dat sau de la fiecare index dintr-un vector.
+
+    Returns:
+        np.ndarray: Forma (num_assets,) pentru un index scalar, altfel (n, num_assets).
+    """
+    units = _grid_units(num_assets, step, total)
+    indices = np.asarray(indices, dtype=np.int64)
+    single = indices.ndim == 0
+    indices = np.atleast_1d(indices).copy()
+    if np.any(indices < 0) or np.any(indices >= grid_size(num_assets, step, total)):
+        raise IndexError(f"Index în afara grilei (0..{grid_size(num_assets, step, total) - 1}).")
+
+    table = _binomial_table(units, num_assets)
+    parts = np.empty((len(indices), num_assets), dtype=np.int64)
+    remaining = np.full(len(indices), units, dtype=np.int64)
+    for j in range(num_assets - 1):
+        m = num_assets - j
+        # Cea mai mică valoare t = rem - u cu C(t, m - 1) >= C(rem - 1, m - 1) - index
+        target = table[remaining - 1, m - 1] - indices
+        t = np.searchsorted(table[:, m - 1], target, side='left')
+        parts[:, j] = remaining - t
+        indices = table[t, m - 1] - target
+        remaining = t
+    parts[:, -1] = remaining
+    weights = parts * step
+    return weights[0] if single else weights
+
+
+def iter_weight_grid(num_assets, step=1, total=100, chunk_size=1_000_000, start=0):
+    """
+    Generator pe blocuri al grilei, fără a o ține întreagă în memorie.
+
+    Yields:
+        tuple: (start_index, np.ndarray) - indexul primului rând și ponderile blocului,
+            forma (<= chunk_size, num_assets).
+    """
+    size = grid_size(num_assets, step, total)
+    for block_start in range(start, size, chunk_size):
+        block_indices = np.arange(block_start, min(block_start + chunk_size, size), dtype=np.int64)
+        yield block_start, unrank_weights(block_indices, num_assets, step, total)
+
+
+def weight_grid(num_assets, step=1, total=100):
+    """ Întreaga grilă ca matrice compactă de întregi, forma (grid_size, num_assets). """
+    return unrank_weights(np.arange(grid_size(num_assets, step, total), dtype=np.int64), num_assets, step, total)
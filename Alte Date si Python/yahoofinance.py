@@ -1,10 +1,25 @@
-import yfinance as yf
+from incremental_metrics import refresh_metrics
+from price_store import PriceStore
 
 # Define the ticker symbol
 ticker = 'ETH-USD'
+history_start = '2020-03-10'
 
-# Get data from May 10, 2022 to May 18, 2025
-data = yf.download(ticker, start='2020-03-10')
+# Prețurile sunt păstrate în depozitul local (price_store.py): la fiecare rulare se descarcă
+# doar zilele care lipsesc, iar CSV-ul (ex: price_store/eth-usd_history.csv) este completat
+# cu ele. Metricile sunt apoi actualizate doar cu rândurile noi (incremental_metrics.py).
+store = PriceStore('price_store')
+new_rows = store.refresh(ticker, start=history_start)
 
-# Save to CSV
-data.to_csv('eth-usd_3y_history.csv')
+results = refresh_metrics([{
+    "file_path": store.csv_path(ticker),
+    "asset_name": ticker,
+    "date_col_name": 'Price',
+    "price_col_name": 'Close',
+    "date_format": '%Y-%m-%d',
+    "skiprows_config": [1, 2]
+}])
+metrics = results["metrics"][0]
+print(f"{ticker}: {new_rows} prețuri noi descărcate, {metrics['num_daily_returns_used']} zile de randament până la {metrics['last_date_used']}")
+print(f"  Randament Anual Așteptat (istoric, efectiv): {metrics['expected_annual_return']:.2%}")
+print(f"  Volatilitate Anuală (istorică): {metrics['annual_volatility']:.2%}")
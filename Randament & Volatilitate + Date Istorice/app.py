@@ -1,13 +1,25 @@
+import os
+import sys
 import pandas as pd
 import numpy as np
 
+# Modulele comune (price_cache.py, date_formats.py, return_panel.py, ...) se află în "Alte Date si Python"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Alte Date si Python"))
+from date_formats import parse_date_column
+from price_cache import cached_price_frame, clean_numeric_columns
+from return_panel import calculate_batch_metrics
+from rolling_covariance import ewma_covariance, periods_per_year, rolling_covariance, save_covariance_series
+from streaming_metrics import stream_historical_metrics
+
 def calculate_historical_metrics(file_path, asset_name,
                                  date_col_name='Date',
                                  price_col_name='Close',
                                  date_format=None,
                                  skiprows_config=None,
                                  start_date_str=None,
-                                 end_date_str=None):
+                                 end_date_str=None,
+                                 use_cache=True,
+                                 chunk_size=None):
     """
     Calculează randamentul anual așteptat și volatilitatea anuală
     pe baza datelor istorice de preț dintr-un fișier CSV, filtrând pe un interval de date.
@@ -21,34 +33,70 @@ def calculate_historical_metrics(file_path, asset_name,
         skiprows_config (list, optional): Listă de numere de rânduri de sărit (0-indexat) după rândul de antet.
         start_date_str (str, optional): Data de început pentru filtrare (ex: 'YYYY-MM-DD').
         end_date_str (str, optional): Data de sfârșit pentru filtrare (ex: 'YYYY-MM-DD').
+        use_cache (bool): Folosește cache-ul binar al CSV-ului (vezi price_cache.py).
+        chunk_size (int, optional): Dacă este dat, fișierul este citit în bucăți de chunk_size
+            rânduri, cu memorie constantă (vezi streaming_metrics.py); cache-ul nu este folosit.
 
     Returns:
         dict: Un dicționar cu randamentul așteptat și volatilitatea, sau None dacă apare o eroare.
     """
     try:
-        df = None
-        try:
-            # Load CSV, use first row as header, skip specified additional rows
-            df = pd.read_csv(file_path, header=0, skiprows=skiprows_config)
-        except ValueError as ve:
-             print(f"EROARE ({asset_name}): Eroare la citirea CSV '{file_path}' (posibil fișier gol sau format incorect): {ve}.")
-             return None
-        except Exception as e:
-            print(f"EROARE ({asset_name}): Eroare la încărcarea inițială a CSV '{file_path}': {e}.")
-            return None
-
-        if df.empty:
-            print(f"EROARE ({asset_name}): DataFrame-ul este gol după încărcarea fișierului '{file_path}'.")
-            return None
+        if chunk_size:
+            try:
+                return stream_historical_metrics(file_path, asset_name, date_col_name, price_col_name, date_format,
+                                                 skiprows_config, start_date_str, end_date_str, chunk_size)
+            except ValueError as e:
+                print(f"EROARE ({asset_name}): {e}")
+                return None
 
-        # Identifică coloana de dată efectivă
-        actual_date_col = date_col_name
-        if actual_date_col not in df.columns:
-            print(f"INFO ({asset_name}): Coloana de dată specificată '{actual_date_col}' nu a fost găsită. Se încearcă prima coloană: '{df.columns[0]}'.")
-            actual_date_col = df.columns[0] # Presupunem că prima coloană este data dacă cea specificată nu există
-            if actual_date_col not in df.columns: # Verificare suplimentară, deși df.columns[0] ar trebui să existe dacă df nu e gol
-                 print(f"EROARE ({asset_name}): Nu s-a putut determina o coloană de dată validă. Coloane disponibile: {df.columns.tolist()}")
+        def build_price_frame():
+            try:
+                # Load CSV, use first row as header, skip specified additional rows
+                df = pd.read_csv(file_path, header=0, skiprows=skiprows_config)
+            except ValueError as ve:
+                 print(f"EROARE ({asset_name}): Eroare la citirea CSV '{file_path}' (posibil fișier gol sau format incorect): {ve}.")
                  return None
+            except Exception as e:
+                print(f"EROARE ({asset_name}): Eroare la încărcarea inițială a CSV '{file_path}': {e}.")
+                return None
+
+            if df.empty:
+                print(f"EROARE ({asset_name}): DataFrame-ul este gol după încărcarea fișierului '{file_path}'.")
+                return None
+
+            # Identifică coloana de dată efectivă
+            actual_date_col = date_col_name
+            if actual_date_col not in df.columns:
+                print(f"INFO ({asset_name}): Coloana de dată specificată '{actual_date_col}' nu a fost găsită. Se încearcă prima coloană: '{df.columns[0]}'.")
+                actual_date_col = df.columns[0] # Presupunem că prima coloană este data dacă cea specificată nu există
+                if actual_date_col not in df.columns: # Verificare suplimentară, deși df.columns[0] ar trebui să existe dacă df nu e gol
+                     print(f"EROARE ({asset_name}): Nu s-a putut determina o coloană de dată validă. Coloane disponibile: {df.columns.tolist()}")
+                     return None
+
+            # Conversia coloanei de dată: formatul este ales dintr-un eșantion de rânduri
+            # (date_formats.py), apoi coloana este parsată o singură dată
+            try:
+                df[actual_date_col], used_format, alternative_formats = parse_date_column(df[actual_date_col], date_format, file_path)
+            except (ValueError, TypeError) as e_conv_date:
+                print(f"EROARE ({asset_name}): Eșec la parsarea coloanei '{actual_date_col}' ca dată: {e_conv_date}. Prima valoare: '{df[actual_date_col].iloc[0] if not df.empty else 'N/A'}'")
+                return None
+            print(f"INFO ({asset_name}): Coloana '{actual_date_col}' convertită în DatetimeIndex cu formatul '{used_format or 'inferat'}'.")
+            if date_format and used_format != date_format:
+                print(f"INFO ({asset_name}): Formatul specificat '{date_format}' nu se potrivește datelor.")
+            elif alternative_formats:
+                print(f"AVERTISMENT ({asset_name}): Formatul datei este ambiguu (se potrivesc și {alternative_formats}); s-a ales '{used_format}'. Specificați date_format pentru a confirma.")
+
+            # Toate coloanele de preț/volum devin float64, ca tabelul să poată fi păstrat în cache
+            return clean_numeric_columns(df.set_index(actual_date_col))
+
+        # CSV-ul este parsat o singură dată; apelurile următoare citesc tabelul binar din cache
+        df = cached_price_frame(
+            file_path, build_price_frame,
+            key_params={"date_col_name": date_col_name, "date_format": date_format, "skiprows_config": skiprows_config},
+            use_cache=use_cache
+        )
+        if df is None:
+            return None
 
         # Verificarea existenței coloanei de preț
         actual_price_col = price_col_name
@@ -64,33 +112,6 @@ def calculate_historical_metrics(file_path, asset_name,
                 return None
             print(f"INFO ({asset_name}): Se utilizează coloana de preț '{actual_price_col}'.")
 
-        # Conversia coloanei de dată și setarea ca index
-        try:
-            if date_format:
-                df[actual_date_col] = pd.to_datetime(df[actual_date_col], format=date_format, errors='raise')
-            else:
-                df[actual_date_col] = pd.to_datetime(df[actual_date_col], errors='raise') # Încearcă inferența
-            print(f"INFO ({asset_name}): Coloana '{actual_date_col}' convertită în DatetimeIndex cu formatul specificat/inferat.")
-        except Exception as e_conv_date:
-            print(f"INFO ({asset_name}): Conversia inițială a coloanei '{actual_date_col}' în DatetimeIndex a eșuat: {e_conv_date}. Se încearcă formate comune.")
-            common_formats = ["%Y-%m-%d", "%m/%d/%Y", "%d/%m/%Y", "%b %d, %Y", "%d-%b-%Y", "%Y/%m/%d", "%m/%d/%y"]
-            parsed_date_successfully = False
-            date_series_as_strings = df[actual_date_col].astype(str)
-
-            for fmt in common_formats:
-                if date_format and fmt == date_format: continue
-                try:
-                    df[actual_date_col] = pd.to_datetime(date_series_as_strings, format=fmt, errors='raise')
-                    parsed_date_successfully = True
-                    print(f"INFO ({asset_name}): Coloana '{actual_date_col}' a fost parsat cu succes ca dată cu formatul '{fmt}'.")
-                    break
-                except (ValueError, TypeError):
-                    continue
-            if not parsed_date_successfully:
-                print(f"EROARE ({asset_name}): Eșec la parsarea coloanei '{actual_date_col}' ca dată cu toate formatele încercate. Prima valoare: '{df[actual_date_col].iloc[0] if not df.empty else 'N/A'}'")
-                return None
-
-        df = df.set_index(actual_date_col)
         df = df[~df.index.isnull()] # Elimină rândurile unde indexul (data) nu a putut fi parsat (este NaT)
         if df.empty:
             print(f"EROARE ({asset_name}): Nu există date după conversia indexului la DatetimeIndex și eliminarea valorilor NaT.")
@@ -170,79 +191,86 @@ def calculate_historical_metrics(file_path, asset_name,
         traceback.print_exc()
         return None
 
-# Calea către fișierul CSV pentru Vestas
-vestas_file = "vestas_history.csv" # Actualizat la fișierul corect
-
-print("--- Calcularea Metricilor Istorice pentru Vestas ---")
-
-# Pentru Vestas
-# Formatul datei în vestas_history.csv este 'YYYY-MM-DD' (ex: '2000-05-10')
-# Coloana de dată este sub header-ul 'Price' după skip rows.
-# Coloana de preț este sub header-ul 'Close' după skip rows.
-# Se sar rândurile 1 și 2 (0-indexat) după header-ul de pe rândul 0.
-vestas_metrics = calculate_historical_metrics(
-    file_path=vestas_file,
-    asset_name="Vestas Wind Systems",
-    date_col_name='Price',
-    price_col_name='Close',
-    date_format='%Y-%m-%d', # Corectat formatul datei
-    skiprows_config=[1, 2], # Skip row 2 ("Ticker...") and row 3 ("Date...") (0-indexed AFTER header taken from row 0)
-    start_date_str="2015-05-18",
-    end_date_str="2025-05-18"
-)
-
-# --- Calcularea Metricilor Istorice pentru Ethereum (ETH-USD) ---
-eth_file = "eth-usd_3y_history.csv"
-print("\n--- Calcularea Metricilor Istorice pentru Ethereum (ETH-USD) ---")
-
-eth_metrics = calculate_historical_metrics(
-    file_path=eth_file,
-    asset_name="Ethereum (ETH-USD)",
-    date_col_name='Price',      # In eth-usd_10Y_history.csv, the first column 'Price' holds dates
-    price_col_name='Close',     # The 'Close' column holds the price
-    date_format='%Y-%m-%d',     # Date format e.g., '2017-11-09'
-    skiprows_config=[1, 2],     # Skip the "Ticker" info row and the "Date,,,,,," row after the header
-    start_date_str=None,        # Use all available data
-    end_date_str=None           # Use all available data
-)
-
-# --- Calcularea Metricilor Istorice pentru Wise (WISE.L) ---
-wise_file = "wise_3y_history.csv"
-print("\n--- Calcularea Metricilor Istorice pentru Wise (WISE.L) ---")
-
-wise_metrics = calculate_historical_metrics(
-    file_path=wise_file,
-    asset_name="Wise (WISE.L)",
-    date_col_name='Price',      # In wise_3y_history.csv, the first column 'Price' holds dates
-    price_col_name='Close',     # The 'Close' column holds the price
-    date_format='%Y-%m-%d',     # Date format e.g., '2022-05-10'
-    skiprows_config=[1, 2],     # Skip the "Ticker" info row and the "Date,,,,,," row after the header
-    start_date_str=None,        # Use all available data
-    end_date_str=None           # Use all available data
-)
+# Specificațiile activelor: aceiași parametri ca pentru calculate_historical_metrics.
+# Toate activele sunt încărcate în paralel și evaluate pe un singur panel aliniat (return_panel.py).
+asset_specs = [
+    # Pentru Vestas
+    # Formatul datei în vestas_history.csv este 'YYYY-MM-DD' (ex: '2000-05-10')
+    # Coloana de dată este sub header-ul 'Price' după skip rows.
+    # Coloana de preț este sub header-ul 'Close' după skip rows.
+    # Se sar rândurile 1 și 2 (0-indexat) după header-ul de pe rândul 0.
+    {
+        "file_path": "vestas_history.csv", # Actualizat la fișierul corect
+        "asset_name": "Vestas Wind Systems",
+        "date_col_name": 'Price',
+        "price_col_name": 'Close',
+        "date_format": '%Y-%m-%d', # Corectat formatul datei
+        "skiprows_config": [1, 2], # Skip row 2 ("Ticker...") and row 3 ("Date...") (0-indexed AFTER header taken from row 0)
+        "start_date_str": "2015-05-18",
+        "end_date_str": "2025-05-18"
+    },
+    # Ethereum (ETH-USD): toate datele disponibile
+    {
+        "file_path": "eth-usd_3y_history.csv",
+        "asset_name": "Ethereum (ETH-USD)",
+        "date_col_name": 'Price',      # In eth-usd_10Y_history.csv, the first column 'Price' holds dates
+        "price_col_name": 'Close',     # The 'Close' column holds the price
+        "date_format": '%Y-%m-%d',     # Date format e.g., '2017-11-09'
+        "skiprows_config": [1, 2]      # Skip the "Ticker" info row and the "Date,,,,,," row after the header
+    },
+    # Wise (WISE.L): toate datele disponibile
+    {
+        "file_path": "wise_3y_history.csv",
+        "asset_name": "Wise (WISE.L)",
+        "date_col_name": 'Price',      # In wise_3y_history.csv, the first column 'Price' holds dates
+        "price_col_name": 'Close',     # The 'Close' column holds the price
+        "date_format": '%Y-%m-%d',     # Date format e.g., '2022-05-10'
+        "skiprows_config": [1, 2]      # Skip the "Ticker" info row and the "Date,,,,,," row after the header
+    }
+]
+
+print("--- Calcularea Metricilor Istorice (Vestas, Ethereum, Wise) ---")
+batch_results = calculate_batch_metrics(asset_specs)
+loaded_metrics = {} if batch_results is None else {row["asset_name"]: row for row in batch_results["metrics"]}
 
 print("\n--- Rezultate Finale ---")
-if vestas_metrics:
-    print(f"\nPentru {vestas_metrics['asset_name']}:")
-    print(f"  Perioada analizată: {vestas_metrics['first_date_used']} până la {vestas_metrics['last_date_used']} ({vestas_metrics['num_daily_returns_used']} zile de randament)")
-    print(f"  Randament Anual Așteptat (istoric, efectiv): {vestas_metrics['expected_annual_return']:.2%}")
-    print(f"  Volatilitate Anuală (istorică): {vestas_metrics['annual_volatility']:.2%}")
-else:
-    print("\nNu s-au putut calcula metricile pentru Vestas Wind Systems.")
-
-if eth_metrics:
-    print(f"\nPentru {eth_metrics['asset_name']}:")
-    print(f"  Perioada analizată: {eth_metrics['first_date_used']} până la {eth_metrics['last_date_used']} ({eth_metrics['num_daily_returns_used']} zile de randament)")
-    print(f"  Randament Anual Așteptat (istoric, efectiv): {eth_metrics['expected_annual_return']:.2%}")
-    print(f"  Volatilitate Anuală (istorică): {eth_metrics['annual_volatility']:.2%}")
-else:
-    print("\nNu s-au putut calcula metricile pentru Ethereum (ETH-USD).")
-
-if wise_metrics:
-    print(f"\nPentru {wise_metrics['asset_name']}:")
-    print(f"  Perioada analizată: {wise_metrics['first_date_used']} până la {wise_metrics['last_date_used']} ({wise_metrics['num_daily_returns_used']} zile de randament)")
-    print(f"  Randament Anual Așteptat (istoric, efectiv): {wise_metrics['expected_annual_return']:.2%}")
-    print(f"  Volatilitate Anuală (istorică): {wise_metrics['annual_volatility']:.2%}")
-else:
-    print("\nNu s-au putut calcula metricile pentru Wise (WISE.L).")
+for spec in asset_specs:
+    metrics = loaded_metrics.get(spec["asset_name"])
+    if metrics is not None:
+        print(f"\nPentru {metrics['asset_name']}:")
+        print(f"  Perioada analizată: {metrics['first_date_used']} până la {metrics['last_date_used']} ({metrics['num_daily_returns_used']} zile de randament)")
+        print(f"  Randament Anual Așteptat (istoric, efectiv): {metrics['expected_annual_return']:.2%}")
+        print(f"  Volatilitate Anuală (istorică): {metrics['annual_volatility']:.2%}")
+    else:
+        print(f"\nNu s-au putut calcula metricile pentru {spec['asset_name']}.")
+
+if batch_results is not None and len(batch_results["metrics"]) >= 2:
+    # Pe perechi, pe calendarul zilelor de tranzacționare (aceeași metodă ca matrice.py)
+    asset_names = list(batch_results["metrics"]["asset_name"])
+    print("\nMatricea de corelație a randamentelor zilnice logaritmice (perechi complete, zile de tranzacționare):")
+    print(pd.DataFrame(batch_results["correlation"], index=asset_names, columns=asset_names).round(4))
+    print("\nNumărul de zile de randament suprapuse pentru fiecare pereche:")
+    print(pd.DataFrame(batch_results["overlap"], index=asset_names, columns=asset_names))
+
+# Volatilitatea și corelațiile în timp, pe panelul aliniat pe calendarul zilelor de
+# tranzacționare (randamentele ETH din weekend sunt cumulate în ziua de luni): ferestre mobile
+# de 63 (~ un trimestru) și 252 (~ un an) de zile de tranzacționare și EWMA. Anualizarea
+# folosește numărul real de rânduri pe an al panelului. Toate seriile sunt salvate în
+# ROLLING_OUTPUT_FILE, ca ferestrele să poată fi comparate ulterior
+# (rolling_covariance.load_covariance_series) fără recalculare.
+ROLLING_WINDOWS = [63, 252]
+EWMA_DECAY = 0.94
+ROLLING_OUTPUT_FILE = "rolling_covariance.npz"
+
+if batch_results is not None:
+    asset_names = list(batch_results["metrics"]["asset_name"])
+    rows_per_year = periods_per_year(batch_results["dates"])
+    covariance_series = {f"rolling_{window}": rolling_covariance(batch_results["log_returns"], window, trading_days_per_year=rows_per_year)
+                         for window in ROLLING_WINDOWS}
+    covariance_series[f"ewma_{EWMA_DECAY}"] = ewma_covariance(batch_results["log_returns"], EWMA_DECAY, trading_days_per_year=rows_per_year)
+    save_covariance_series(ROLLING_OUTPUT_FILE, batch_results["dates"], asset_names, covariance_series)
 
+    print(f"\nFerestrele sunt în zile de tranzacționare ({rows_per_year:.1f} pe an în panel).")
+    print(f"\nVolatilitatea anuală la ultima dată ({np.datetime_as_string(batch_results['dates'][-1], unit='D')}):")
+    print(pd.DataFrame({name: series["volatility"][-1] for name, series in covariance_series.items()}, index=asset_names).map(lambda v: f"{v:.2%}"))
+    print(f"Seriile de volatilitate și corelație au fost salvate în: {ROLLING_OUTPUT_FILE}")
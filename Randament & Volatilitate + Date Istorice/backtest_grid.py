@@ -0,0 +1,63 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Modulele comune (return_panel.py, backtest.py, weight_grid.py) se află în "Alte Date si Python"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Alte Date si Python"))
+from backtest import backtest_weight_grid
+from return_panel import build_calendar_panel, load_log_returns
+from weight_grid import weight_grid
+
+# Backtestul istoric al grilei de ponderi folosite în simulările Monte Carlo:
+# [Titluri Stat, Vestas, Wise, ETH], pe randamentele reale din CSV-uri, în locul
+# parametrilor (randament, volatilitate, corelație) copiați manual în scripturile de simulare.
+
+BOND_RATE = 0.0660          # Randamentul anual al titlurilor de stat (ca în montecarlo4opt.py)
+WEIGHT_STEP = 5             # 969 de seturi pentru 4 active; cu pasul 1 - 156849 de seturi
+# Reechilibrarea la ponderile inițiale: None (cumpărare și păstrare) sau la câte rânduri
+# (zile de tranzacționare): 21 ~ lunar, 63 ~ trimestrial
+REBALANCE_OPTIONS = {"cumparare_si_pastrare": None, "reechilibrare_lunara": 21}
+OUTPUT_JSON_FILE = "backtest_results.json"
+
+asset_keys = ['W_TS_pct', 'W_Vestas_pct', 'W_Wise_pct', 'W_ETH_pct']
+risky_asset_specs = [
+    {"file_path": "vestas_history.csv", "asset_name": "Vestas Wind Systems", "date_col_name": 'Price',
+     "price_col_name": 'Close', "date_format": '%Y-%m-%d', "skiprows_config": [1, 2]},
+    {"file_path": "wise_3y_history.csv", "asset_name": "Wise (WISE.L)", "date_col_name": 'Price',
+     "price_col_name": 'Close', "date_format": '%Y-%m-%d', "skiprows_config": [1, 2]},
+    {"file_path": "eth-usd_3y_history.csv", "asset_name": "Ethereum (ETH-USD)", "date_col_name": 'Price',
+     "price_col_name": 'Close', "date_format": '%Y-%m-%d', "skiprows_config": [1, 2]}
+]
+
+# Randamentele sunt aliniate pe calendarul acțiunilor (weekend-ul ETH este cumulat în ziua de luni)
+dates, panel, _ = build_calendar_panel([load_log_returns(spec) for spec in risky_asset_specs])
+weights_pct = weight_grid(len(asset_keys), step=WEIGHT_STEP)
+
+output = {}
+for option_name, rebalance_every in REBALANCE_OPTIONS.items():
+    results = backtest_weight_grid(dates, panel, weights_pct / 100.0, bond_rate=BOND_RATE, rebalance_every=rebalance_every)
+    order = np.argsort(-results["sharpe"], kind='stable')
+    output[option_name] = [
+        {
+            **dict(zip(asset_keys, weights_pct[i].tolist())),
+            'Final_Value': float(results["final_value"][i]),
+            'CAGR': float(results["cagr"][i]),
+            'Volatility': float(results["volatility"][i]),
+            'Sharpe_Ratio': float(results["sharpe"][i]),
+            'Max_Drawdown': float(results["max_drawdown"][i])
+        }
+        for i in order
+    ]
+
+    start = np.datetime_as_string(results["start_date"], unit='D')
+    end = np.datetime_as_string(results["end_date"], unit='D')
+    print(f"\n--- {option_name} ({len(weights_pct)} portofolii, {start} - {end}, {results['num_days']} zile) ---")
+    print("Top 5 după Sharpe Ratio:")
+    print(pd.DataFrame(output[option_name][:5]).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+with open(OUTPUT_JSON_FILE, 'w') as outfile:
+    json.dump(output, outfile, indent=4)
+print(f"\nRezultatele backtestului au fost salvate în '{OUTPUT_JSON_FILE}'.")
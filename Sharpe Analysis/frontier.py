@@ -0,0 +1,93 @@
+import numpy as np
+
+# Extragerea frontierei eficiente (punctele Pareto nedominate) în O(n log n).
+# Un portofoliu este dominat dacă există altul cu volatilitate mai mică sau egală și
+# randament (și, opțional, Sharpe Ratio) mai mare sau egal, cel puțin unul strict.
+# Portofoliile identice nu se domină reciproc, deci sunt păstrate toate.
+
+
+def pareto_frontier(volatilities, returns, sharpe_ratios=None):
+    """
+    Întoarce indicii portofoliilor nedominate, sortați după volatilitate.
+
+    Cu două obiective (randament/volatilitate) punctele sunt sortate după volatilitate
+    și parcurse o singură dată cu un maxim cumulativ al randamentului, complet vectorizat.
+    Cu trei obiective (se transmite și sharpe_ratios) parcurgerea interoghează maximul
+    Sharpe al punctelor deja văzute cu randament mai mare sau egal (arbore Fenwick).
+
+    Args:
+        volatilities (array-like): Volatilitățile (de minimizat), forma (n,).
+        returns (array-like): Randamentele așteptate (de maximizat), forma (n,).
+        sharpe_ratios (array-like, optional): Sharpe Ratio (de maximizat), forma (n,).
+
+    Returns:
+        np.ndarray: Indicii (în datele originale) ai frontierei, în ordinea volatilității.
+    """
+    volatilities = np.asarray(volatilities, dtype=float)
+    returns = np.asarray(returns, dtype=float)
+    if volatilities.shape != returns.shape:
+        raise ValueError(f"Volatilitățile {volatilities.shape} și randamentele {returns.shape} au forme diferite.")
+    if len(returns) == 0:
+        return np.array([], dtype=int)
+
+    if sharpe_ratios is None:
+        order = np.lexsort((-returns, volatilities))
+        keys = (volatilities[order], returns[order])
+        first_in_group, group_id = _duplicate_groups(keys)
+        sorted_returns = keys[1]
+        best_before = np.concatenate(([-np.inf], np.maximum.accumulate(sorted_returns)[:-1]))
+        keep_first = sorted_returns > best_before
+    else:
+        sharpe_ratios = np.asarray(sharpe_ratios, dtype=float)
+        if sharpe_ratios.shape != returns.shape:
+            raise ValueError(f"Sharpe Ratio {sharpe_ratios.shape} și randamentele {returns.shape} au forme diferite.")
+        order = np.lexsort((-sharpe_ratios, -returns, volatilities))
+        keys = (volatilities[order], returns[order], sharpe_ratios[order])
+        first_in_group, group_id = _duplicate_groups(keys)
+        keep_first = _dominance_sweep(keys[1], keys[2], first_in_group)
+
+    # Duplicatele unui punct nedominat sunt și ele nedominate
+    keep = keep_first[first_in_group][group_id]
+    return order[keep]
+
+
+def _duplicate_groups(sorted_keys):
+    """ Marchează primul element din fiecare grup de puncte identice (după sortare). """
+    n = len(sorted_keys[0])
+    is_new = np.ones(n, dtype=bool)
+    if n > 1:
+        is_new[1:] = np.logical_or.reduce([k[1:] != k[:-1] for k in sorted_keys])
+    group_id = np.cumsum(is_new) - 1
+    return np.flatnonzero(is_new), group_id
+
+
+def _dominance_sweep(sorted_returns, sorted_sharpes, first_in_group):
+    """
+    Parcurgere în ordinea volatilității pentru trei obiective.
+
+    Un punct este dominat dacă cel mai mare Sharpe dintre punctele deja parcurse cu
+    randament mai mare sau egal este mai mare sau egal. Maximul pe sufixul de randamente
+    este ținut într-un arbore Fenwick indexat după rangul randamentului (ordine inversă),
+    deci fiecare interogare și inserare costă O(log n).
+    """
+    keep = np.zeros(len(sorted_returns), dtype=bool)
+    unique_returns = np.unique(sorted_returns)
+    # Poziția 1 corespunde celui mai mare randament: prefixul [1, p] = randamentele >= r
+    positions = (len(unique_returns) - np.searchsorted(unique_returns, sorted_returns)).tolist()
+    tree = [-np.inf] * (len(unique_returns) + 1)
+    size = len(tree)
+    sharpes = sorted_sharpes.tolist()
+    for i in first_in_group.tolist():
+        s = sharpes[i]
+        p = positions[i]
+        while p > 0 and tree[p] < s:
+            p -= p & -p
+        if p > 0:
+            continue
+        keep[i] = True
+        p = positions[i]
+        while p < size:
+            if tree[p] < s:
+                tree[p] = s
+            p += p & -p
+    return keep
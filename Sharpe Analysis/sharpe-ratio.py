@@ -1,6 +1,13 @@
 import json # Import json for reading and writing
+import os
+import sys
 import numpy as np
 import pandas as pd
+from sharpe_grid import covariance_from_volatilities, evaluate_portfolio_grid
+
+# Grila de ponderi (weight_grid.py) se află în "Alte Date si Python"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Alte Date si Python"))
+from weight_grid import weight_grid
 # from pypdf import PdfReader # No longer needed
 
 # Datele de intrare pentru active
@@ -17,92 +24,52 @@ vol_eth = 0.6624  # Volatilitate ETH
 corr_wise_eth = 0.14
 # Corelațiile cu Titluri de Stat (TS) nu sunt necesare deoarece vol_ts = 0
 
+# Universul de active, în ordinea coloanelor grilei de ponderi: (cheia din rezultate, randament, volatilitate).
+# Pentru grila cu 4 active sau pentru mai multe active
+# se adaugă rânduri aici și se extinde matricea de corelație; restul scriptului nu se schimbă.
+assets = [
+    ('W_TS_pct', er_ts, vol_ts),
+    ('W_Wise_pct', er_wise, vol_wise),
+    ('W_ETH_pct', er_eth, vol_eth),
+]
+correlation_matrix = np.array([
+    [1.0, 0.0, 0.0],
+    [0.0, 1.0, corr_wise_eth],
+    [0.0, corr_wise_eth, 1.0]
+])
+
 # Rata fără risc pentru Sharpe Ratio.
 # Având în vedere că Titlurile de Stat (TS) au vol_ts = 0.00,
 # randamentul lor așteptat er_ts este considerat rata fără risc.
 rf_rate = er_ts
 
-# Calea către fișierul JSON de intrare
-input_json_file_path = "triplets.json"
-all_portfolio_sharpe_data = []
-
-print(f"Citire date din '{input_json_file_path}'...")
-loaded_sim_data_list = []
-try:
-    with open(input_json_file_path, 'r') as f:
-        data_from_json = json.load(f)
-    if not isinstance(data_from_json, dict) or "triplets" not in data_from_json or not isinstance(data_from_json.get("triplets"), list):
-        print(f"EROARE: '{input_json_file_path}' nu conține cheia 'triplets' cu o listă de rezultate sau formatul este incorect.")
-        loaded_sim_data_list = []
-    else:
-        loaded_sim_data_list = data_from_json["triplets"]
-except FileNotFoundError:
-    print(f"EROARE: Fișierul '{input_json_file_path}' nu a fost găsit.")
-except json.JSONDecodeError:
-    print(f"EROARE: Nu s-a putut decoda JSON din '{input_json_file_path}'. Verificați formatul.")
+# Grila de ponderi: toate combinațiile de procente pozitive, multipli de WEIGHT_STEP, care însumează 100.
+# Este generată direct (în locul fișierului triplets.json), pentru oricâte active are universul.
+WEIGHT_STEP = 1
+weights_pct = weight_grid(len(assets), step=WEIGHT_STEP)
 
-if not loaded_sim_data_list:
-    print("Nu există date de simulare de procesat. Se oprește scriptul.")
-    exit()
-
-print(f"S-au încărcat {len(loaded_sim_data_list)} seturi de date de simulare.")
+print(f"S-au generat {len(weights_pct)} seturi de ponderi.")
 print("Calcularea Sharpe Ratios...")
 
-total_simulations = len(loaded_sim_data_list)
-
-for idx, weights_pct in enumerate(loaded_sim_data_list):
-    # Verifică dacă weights_pct este o listă și are 3 elemente
-    if not isinstance(weights_pct, list) or len(weights_pct) != 3:
-        # print(f"Atenție: Intrarea {idx+1} nu este o listă validă de 3 ponderi. Se omite. Detalii: {weights_pct}")
-        continue
-
-    w_ts_pct = weights_pct[0]
-    w_wise_pct = weights_pct[1]
-    w_eth_pct = weights_pct[2]
-
-    # Conversia procentelor în zecimale
-    w_ts = w_ts_pct / 100.0
-    w_wise = w_wise_pct / 100.0
-    w_eth = w_eth_pct / 100.0
-
-    # Verifică dacă suma ponderilor este 100% (sau 1.0 în zecimale)
-    if not np.isclose(w_ts + w_wise + w_eth, 1.0):
-        # print(f"Atenție: Suma ponderilor nu este 1 pentru ({w_ts_pct}, {w_wise_pct}, {w_eth_pct}). Se omite.")
-        continue
-
-    # Calculul randamentului așteptat al portofoliului (E_Rp)
-    e_rp = (w_ts * er_ts) + (w_wise * er_wise) + (w_eth * er_eth)
-    
-    # Calculul varianței portofoliului (Var_p)
-    # Deoarece vol_ts = 0, termenii care implică w_ts și vol_ts sunt zero și sunt omiși.
-    var_p = (w_wise**2 * vol_wise**2) + \
-            (w_eth**2 * vol_eth**2) + \
-            (2 * w_wise * w_eth * vol_wise * vol_eth * corr_wise_eth)
-            
-    sigma_p = np.sqrt(var_p)
-    sharpe_ratio = 0
-    if sigma_p > 1e-6: # Evită împărțirea la zero sau la un număr foarte mic
-        sharpe_ratio = (e_rp - rf_rate) / sigma_p
-    
-    all_portfolio_sharpe_data.append({
-        'W_TS_pct': w_ts_pct,
-        'W_Wise_pct': w_wise_pct,
-        'W_ETH_pct': w_eth_pct,
-        'E_Rp': e_rp,
-        'Sigma_p': sigma_p,
-        'Sharpe_Ratio': sharpe_ratio
-    })
-
-    # Actualizare progres
-    if total_simulations > 0:
-        percentage_done = ((idx + 1) / total_simulations) * 100
-        print(f"\rProcesare Sharpe Ratios: {percentage_done:.0f}% finalizat", end="")
-
-if total_simulations > 0:
-    print() # Newline după finalizarea buclei
-
-# Sortare după Sharpe Ratio descrescător înainte de a salva
-all_portfolio_sharpe_data.sort(key=lambda x: x['Sharpe_Ratio'], reverse=True)
+asset_keys = [key for key, _, _ in assets]
+mean_returns = np.array([er for _, er, _ in assets])
+cov_matrix = covariance_from_volatilities([vol for _, _, vol in assets], correlation_matrix)
+
+# Calculul E_Rp, Sigma_p și Sharpe Ratio pentru toate portofoliile dintr-o singură trecere
+e_rp, sigma_p, sharpe_ratio = evaluate_portfolio_grid(weights_pct / 100.0, mean_returns, cov_matrix, rf_rate)
+
+# Sortare după Sharpe Ratio descrescător înainte de a salva (stabilă, ca sortarea listei)
+order = np.argsort(-sharpe_ratio, kind='stable')
+all_portfolio_sharpe_data = [
+    {
+        **dict(zip(asset_keys, weights_pct[i].tolist())),
+        'E_Rp': float(e_rp[i]),
+        'Sigma_p': float(sigma_p[i]),
+        'Sharpe_Ratio': float(sharpe_ratio[i])
+    }
+    for i in order
+]
+print(f"Sharpe Ratio calculat pentru {len(all_portfolio_sharpe_data)} portofolii.")
 
 # Scrierea tuturor datelor Sharpe Ratio în allsharpe_3assets.json
 output_sharpe_json_file = "allsharpe_3assets.json"
@@ -0,0 +1,48 @@
+import numpy as np
+
+# Evaluator vectorizat pentru grile de portofolii cu N active.
+# Toate rândurile matricei de ponderi sunt evaluate deodată (formă pătratică pe rânduri),
+# fără bucle Python per portofoliu și fără formule scrise manual pentru un număr fix de active.
+
+
+def covariance_from_volatilities(volatilities, correlation_matrix):
+    """ Construiește matricea de covarianță din volatilități și matricea de corelație. """
+    volatilities = np.asarray(volatilities, dtype=float)
+    correlation_matrix = np.asarray(correlation_matrix, dtype=float)
+    if correlation_matrix.shape != (len(volatilities), len(volatilities)):
+        raise ValueError(f"Matricea de corelație are forma {correlation_matrix.shape}, dar există {len(volatilities)} volatilități.")
+    return np.outer(volatilities, volatilities) * correlation_matrix
+
+
+def evaluate_portfolio_grid(weights_matrix, mean_returns, cov_matrix, rf_rate, min_sigma=1e-6, chunk_size=1_000_000):
+    """
+    Calculează randamentul așteptat, volatilitatea și Sharpe Ratio pentru toate portofoliile.
+
+    Args:
+        weights_matrix (np.ndarray): Ponderile (zecimal), forma (W, N).
+        mean_returns (np.ndarray): Randamentele așteptate ale activelor, forma (N,).
+        cov_matrix (np.ndarray): Matricea de covarianță completă, forma (N, N).
+        rf_rate (float): Rata fără risc.
+        min_sigma (float): Sub această volatilitate Sharpe Ratio este raportat ca 0.
+        chunk_size (int): Numărul de rânduri procesate odată (limitează memoria temporară).
+
+    Returns:
+        tuple: (E_Rp, Sigma_p, Sharpe_Ratio), fiecare de forma (W,).
+    """
+    weights_matrix = np.atleast_2d(np.asarray(weights_matrix, dtype=float))
+    mean_returns = np.asarray(mean_returns, dtype=float)
+    cov_matrix = np.asarray(cov_matrix, dtype=float)
+    num_assets = weights_matrix.shape[1]
+    if mean_returns.shape != (num_assets,) or cov_matrix.shape != (num_assets, num_assets):
+        raise ValueError(f"Ponderile au {num_assets} coloane, dar randamentele au forma {mean_returns.shape} și covarianța {cov_matrix.shape}.")
+
+    e_rp = weights_matrix @ mean_returns
+    var_p = np.empty(len(weights_matrix))
+    for start in range(0, len(weights_matrix), chunk_size):
+        w = weights_matrix[start:start + chunk_size]
+        var_p[start:start + chunk_size] = np.einsum('ij,ij->i', w @ cov_matrix, w)
+    sigma_p = np.sqrt(np.maximum(var_p, 0.0))
+
+    sharpe_ratio = np.zeros(len(weights_matrix))
+    np.divide(e_rp - rf_rate, sigma_p, out=sharpe_ratio, where=sigma_p > min_sigma)
+    return e_rp, sigma_p, sharpe_ratio
@@ -4,6 +4,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib import cm
 from matplotlib.colors import Normalize
+from frontier import pareto_frontier
 # from scipy.interpolate import griddata # No longer needed for this approach
 
 # Fix file path issue
@@ -154,32 +155,9 @@ else:
     print("\n--- WARNING: Could not find a close match for user-defined balanced portfolio. Using arbitrary/dummy portfolio. ---")
 
 # Calculate Efficient Frontier points
-efficient_portfolios_indices = []
-sorted_returns_indices = np.argsort(returns)
-max_vol_for_return = -1
-# Simpler way to get points for frontier: iterate through unique returns and find min volatility
-# However, a common way is to iterate sorted by volatility and keep points that improve return for similar/less volatility
-# Or iterate sorted by return and keep points that improve volatility for similar/more return.
-# For visualization, we want points that are not dominated.
-
-# Create a list of (volatility, return, original_index) for sorting
-pts = sorted([(volatilities[i], returns[i], sharpe_ratios[i], i) for i in range(len(portfolios))])
-
-efficient_frontier_indices = []
-max_return_so_far = -float('inf')
-# Iterate through portfolios sorted by volatility
-# A point is on the frontier if no other point offers higher return for same or lower volatility
-# More robust: iterate by volatility, keep if it has higher return than last frontier point with similar/lower volatility
-# Or, iterate by return, keep if it has lower vol than last frontier point with similar/higher return
-
-dominated = [False] * len(portfolios)
-for i in range(len(portfolios)):
-    for j in range(len(portfolios)):
-        if i == j: continue
-        if returns[j] >= returns[i] and volatilities[j] <= volatilities[i] and (returns[j] > returns[i] or volatilities[j] < volatilities[i]):
-            dominated[i] = True
-            break
-efficient_indices = [i for i, d in enumerate(dominated) if not d]
+# A point is on the frontier if no other point offers higher or equal return for same or lower volatility
+# (one of them strictly). pareto_frontier sorts by volatility and does a single running-max sweep: O(n log n).
+efficient_indices = pareto_frontier(volatilities, returns).tolist()
 
 if not efficient_indices: # Fallback if simple non-dominated logic fails badly
     # Fallback to a simpler approach if no points found (e.g. data issues)
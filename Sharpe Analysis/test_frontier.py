@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from frontier import pareto_frontier
+
+
+def _brute_force(volatilities, *objectives):
+    keep = []
+    for i in range(len(volatilities)):
+        no_worse = volatilities <= volatilities[i]
+        better = volatilities < volatilities[i]
+        for values in objectives:
+            no_worse &= values >= values[i]
+            better |= values > values[i]
+        if not np.any(no_worse & better):
+            keep.append(i)
+    return sorted(keep)
+
+
+@pytest.mark.parametrize("three_objectives", [False, True])
+@pytest.mark.parametrize("seed", range(5))
+def test_frontier_matches_brute_force(seed, three_objectives):
+    rng = np.random.default_rng(seed)
+    # Valori rotunjite, ca să existe egalități și duplicate
+    volatilities, returns, sharpes = np.round(rng.random((3, 400)) * 20)
+    objectives = (returns, sharpes) if three_objectives else (returns,)
+    frontier = pareto_frontier(volatilities, *objectives)
+    assert sorted(frontier.tolist()) == _brute_force(volatilities, *objectives)
+    assert np.all(np.diff(volatilities[frontier]) >= 0)
+
+
+def test_empty_and_mismatched_inputs():
+    assert len(pareto_frontier([], [])) == 0
+    with pytest.raises(ValueError):
+        pareto_frontier([1.0, 2.0], [1.0])
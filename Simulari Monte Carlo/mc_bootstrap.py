@@ -0,0 +1,82 @@
+import numpy as np
+
+# Scenarii istorice prin block bootstrap, în locul randamentelor normale cu parametri ficși.
+#
+# Matricea randamentelor zilnice logaritmice (zile x active, aliniată pe calendarul comun, vezi
+# return_panel.build_calendar_panel) este eșantionată în blocuri contigue de block_length zile:
+# toate activele primesc același bloc, deci corelațiile, cozile groase și autocorelația pe
+# termen scurt din istoric sunt păstrate. Blocurile se închid circular (după ultima zi urmează
+# prima), ca fiecare zi să aibă aceeași probabilitate de a fi aleasă.
+#
+# Nu se construiesc traiectorii zilnice: matricea are sumele cumulate precalculate, deci suma
+# unui bloc este o diferență, iar randamentele anuale ale tuturor traiectoriilor dintr-un lot
+# rezultă dintr-o singură indexare vectorizată (starturi aleatoare x blocuri x active).
+
+DEFAULT_BLOCK_LENGTH = 21             # ~ o lună de tranzacționare
+DEFAULT_BOOTSTRAP_CHUNK_BYTES = 256 * 1024**2
+
+
+class BlockBootstrap:
+    """
+    Generatorul de scenarii pentru o matrice de randamente istorice.
+
+    Args:
+        log_returns (np.ndarray): Randamentele zilnice logaritmice (zile x active), fără NaN.
+        rows_per_year (float): Numărul de rânduri ale matricei într-un an (vezi from_panel).
+        block_length (int): Lungimea blocurilor (rânduri consecutive).
+    """
+
+    def __init__(self, log_returns, rows_per_year, block_length=DEFAULT_BLOCK_LENGTH):
+        log_returns = np.atleast_2d(np.asarray(log_returns, dtype=float))
+        if np.isnan(log_returns).any():
+            raise ValueError("Matricea de randamente pentru bootstrap nu poate conține NaN.")
+        if not 1 <= block_length <= len(log_returns):
+            raise ValueError(f"Lungimea blocului trebuie să fie între 1 și {len(log_returns)} (primit: {block_length}).")
+        self.num_rows, self.num_assets = log_returns.shape
+        self.rows_per_year = rows_per_year
+        self.block_length = int(block_length)
+        # Sumele cumulate ale matricei dublate: blocurile care trec de ultima zi continuă de la început
+        self.cumulative = np.vstack((np.zeros((1, self.num_assets)), np.cumsum(np.vstack((log_returns, log_returns)), axis=0)))
+
+    @classmethod
+    def from_panel(cls, dates, panel, block_length=DEFAULT_BLOCK_LENGTH):
+        """
+        Construiește generatorul din panelul aliniat (build_calendar_panel), restrâns la
+        perioada comună a activelor.
+
+        Rândurile fără randament pentru un activ (ex: sărbători locale) sunt randamente nule;
+        rows_per_year este estimat din datele panelului.
+        """
+        dates = np.asarray(dates, dtype='datetime64[ns]')
+        years = (dates[-1] - dates[0]) / np.timedelta64(1, 'D') / 365.25
+        if years <= 0:
+            raise ValueError("Panelul trebuie să acopere cel puțin două date distincte.")
+        return cls(np.nan_to_num(np.asarray(panel, dtype=float), nan=0.0), (len(dates) - 1) / years, block_length)
+
+    def annual_log_returns(self, rng, num_simulations, num_years, max_chunk_bytes=DEFAULT_BOOTSTRAP_CHUNK_BYTES):
+        """
+        Randamentele anuale logaritmice ale traiectoriilor eșantionate.
+
+        Fiecare traiectorie are round(num_years * rows_per_year) rânduri, formate din blocuri
+        cu start uniform; anul y se termină la rândul round(y * rows_per_year), chiar dacă
+        aceasta cade în interiorul unui bloc. Traiectoriile sunt generate în loturi de cel
+        mult max_chunk_bytes (același rezultat, indiferent de mărimea lotului).
+
+        Returns:
+            np.ndarray: Forma (num_years, num_simulations, n_active).
+        """
+        year_ends = np.rint(np.arange(num_years + 1) * self.rows_per_year).astype(np.int64)
+        num_blocks = -(-int(year_ends[-1]) // self.block_length)
+        block_index, offset = np.divmod(year_ends, self.block_length)
+        result = np.empty((num_years, num_simulations, self.num_assets))
+        chunk = max(1, max_chunk_bytes // (8 * (num_blocks + 1) * self.num_assets * 3))
+        for first in range(0, num_simulations, chunk):
+            paths = slice(first, min(first + chunk, num_simulations))
+            starts = rng.integers(0, self.num_rows, size=(paths.stop - paths.start, num_blocks + 1))
+            # Nivelul logaritmic al traiectoriei la începutul fiecărui bloc, apoi la sfârșitul fiecărui an
+            block_sums = self.cumulative[starts[:, :-1] + self.block_length] - self.cumulative[starts[:, :-1]]
+            block_levels = np.concatenate((np.zeros((len(starts), 1, self.num_assets)), np.cumsum(block_sums, axis=1)), axis=1)
+            year_starts = starts[:, block_index]
+            levels = block_levels[:, block_index] + self.cumulative[year_starts + offset] - self.cumulative[year_starts]
+            result[:, paths] = np.diff(levels, axis=1).transpose(1, 0, 2)
+        return result
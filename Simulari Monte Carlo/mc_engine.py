@@ -0,0 +1,572 @@
+import numpy as np
+from statistics import NormalDist
+
+from mc_stats import (DEFAULT_CVAR_LEVEL, BatchQuantileErrors, PathRiskReducer, batch_statistics, concatenate_path_metrics,
+                      make_stats_accumulator, stats_records, summarize_path_metrics)
+
+try:
+    from scipy.stats import norm, qmc
+except ImportError:  # scipy este necesar doar pentru eșantionarea Sobol
+    norm = qmc = None
+
+# Motor vectorizat pentru simulările Monte Carlo ale portofoliului.
+# În loc să apelăm np.random.normal o dată pe an simulat, generăm întregul tensor
+# de șocuri (simulări x ani x active riscante) dintr-o singură dată și compunem
+# randamentele cu un produs vectorizat.
+
+# Modurile de generare a șocurilor:
+#   "pseudo"     - numere pseudo-aleatoare obișnuite
+#   "antithetic" - variabile antitetice: fiecare traiectorie z are pereche -z (reduce varianța)
+#   "sobol"      - Sobol randomizat (scrambled, scipy), transformat în normale prin inversa CDF
+SAMPLING_METHODS = ("pseudo", "antithetic", "sobol")
+
+# Limita de memorie pentru un bloc de rezultate în modul cu numere aleatoare comune
+# (aprox. 256 MB de float64 pentru matricea ani x simulări x ponderi).
+DEFAULT_CRN_CHUNK_BYTES = 256 * 1024**2
+
+# Simularea cu pași lunari sau zilnici (simulate_stepped_values): pașii pe an și politicile
+# de reechilibrare. Șocurile sunt generate în blocuri de pași limitate la DEFAULT_STEP_BLOCK_BYTES.
+STEPS_PER_YEAR = {"annual": 1, "monthly": 12, "daily": 252}
+REBALANCING_POLICIES = ("buy_and_hold", "calendar", "threshold")
+DEFAULT_STEP_BLOCK_BYTES = 64 * 1024**2
+
+
+def draw_correlated_shocks(rng, num_simulations, num_years, cholesky_risky, sampling="pseudo"):
+    """
+    Generează tot tensorul de șocuri corelate dintr-o singură dată.
+
+    Anul este prima axă, astfel încât compunerea de la un an la altul lucrează
+    pe blocuri contigue de memorie.
+
+    Returns:
+        np.ndarray: Șocurile corelate, forma (num_years, num_simulations, n_riscante).
+    """
+    uncorrelated = draw_standard_normals(rng, num_years, num_simulations, cholesky_risky.shape[0], sampling)
+    return uncorrelated @ cholesky_risky.T
+
+
+def draw_standard_normals(rng, num_years, num_simulations, num_factors, sampling="pseudo"):
+    """
+    Generează șocurile normale standard necorelate, forma (num_years, num_simulations, num_factors).
+
+    Cu "antithetic" num_simulations trebuie să fie par, iar cu "sobol" o putere a lui 2
+    (proprietățile de echilibru ale secvenței). Scrambling-ul Sobol folosește rng, deci două
+    apeluri succesive dau eșantioane randomizate independente.
+    """
+    if sampling == "pseudo":
+        return rng.standard_normal((num_years, num_simulations, num_factors))
+    if sampling == "antithetic":
+        if num_simulations % 2:
+            raise ValueError(f"Cu variabile antitetice numărul de traiectorii trebuie să fie par (primit: {num_simulations}).")
+        half = rng.standard_normal((num_years, num_simulations // 2, num_factors))
+        return np.concatenate((half, -half), axis=1)
+    if sampling == "sobol":
+        if qmc is None:
+            raise ImportError("Eșantionarea Sobol necesită scipy (pip install scipy).")
+        if num_simulations < 1 or num_simulations & (num_simulations - 1):
+            raise ValueError(f"Cu Sobol numărul de traiectorii trebuie să fie o putere a lui 2 (primit: {num_simulations}).")
+        sampler = qmc.Sobol(d=num_years * num_factors, scramble=True, seed=rng)
+        uniforms = sampler.random_base2(int(num_simulations).bit_length() - 1)
+        return norm.ppf(uniforms).reshape(num_simulations, num_years, num_factors).transpose(1, 0, 2)
+    raise ValueError(f"Mod de eșantionare necunoscut '{sampling}'. Opțiuni: {', '.join(SAMPLING_METHODS)}.")
+
+
+def simulate_asset_returns(rng, num_simulations, num_years, mean_returns, volatilities, cholesky_risky, sampling="pseudo"):
+    """
+    Generează randamentele anuale ale tuturor activelor pentru toate simulările.
+
+    Activele cu volatilitate zero (ex: Titluri de Stat) sunt deterministe; doar
+    pentru activele riscante se generează șocuri corelate prin factorul Cholesky.
+
+    Args:
+        rng (np.random.Generator): Generatorul de numere aleatoare.
+        num_simulations (int): Numărul de simulări (traiectorii).
+        num_years (int): Numărul de ani simulați.
+        mean_returns (np.ndarray): Randamentele medii anuale, forma (n_active,).
+        volatilities (np.ndarray): Volatilitățile anuale, forma (n_active,).
+        cholesky_risky (np.ndarray): Factorul Cholesky al matricei de corelație
+            pentru activele cu volatilitate nenulă, forma (n_riscante, n_riscante).
+        sampling (str): Modul de generare a șocurilor (vezi SAMPLING_METHODS).
+
+    Returns:
+        np.ndarray: Randamentele anuale, forma (num_years, num_simulations, n_active).
+    """
+    mean_returns = np.asarray(mean_returns, dtype=float)
+    volatilities = np.asarray(volatilities, dtype=float)
+    risky_idx = _risky_indices(volatilities, cholesky_risky)
+
+    asset_returns = np.empty((num_years, num_simulations, len(mean_returns)))
+    asset_returns[...] = mean_returns
+    if len(risky_idx):
+        shocks = draw_correlated_shocks(rng, num_simulations, num_years, cholesky_risky, sampling)
+        asset_returns[..., risky_idx] += volatilities[risky_idx] * shocks
+    return asset_returns
+
+
+def bootstrap_asset_returns(rng, bootstrap, num_simulations, num_years, mean_returns, volatilities):
+    """
+    Varianta istorică a simulate_asset_returns: activele riscante (volatilitate nenulă), în
+    ordinea lor, primesc randamentele anuale eșantionate de bootstrap (mc_bootstrap.BlockBootstrap),
+    iar activele fără risc păstrează randamentul fix din mean_returns.
+
+    Returns:
+        np.ndarray: Randamentele anuale, forma (num_years, num_simulations, n_active).
+    """
+    mean_returns = np.asarray(mean_returns, dtype=float)
+    risky_idx = np.flatnonzero(np.asarray(volatilities, dtype=float))
+    if len(risky_idx) != bootstrap.num_assets:
+        raise ValueError(f"Bootstrap-ul are {bootstrap.num_assets} active, dar există {len(risky_idx)} active riscante.")
+    asset_returns = np.empty((num_years, num_simulations, len(mean_returns)))
+    asset_returns[...] = mean_returns
+    asset_returns[..., risky_idx] = np.expm1(bootstrap.annual_log_returns(rng, num_simulations, num_years))
+    return asset_returns
+
+
+def validate_horizons(horizons, num_years):
+    """ Orizonturile (ani întregi, 1..num_years), sortate și fără duplicate. """
+    horizons = sorted(set(int(h) for h in horizons))
+    if not horizons or horizons[0] < 1 or horizons[-1] > num_years:
+        raise ValueError(f"Orizonturile trebuie să fie între 1 și {num_years} ani (primit: {horizons}).")
+    return horizons
+
+
+def compound_portfolio_values(portfolio_returns, initial_investment, horizons=None, compound=True, path_risk=None):
+    """
+    Compune randamentele anuale ale portofoliului (reechilibrat anual la ponderile date).
+
+    Args:
+        portfolio_returns (np.ndarray): Randamentele anuale ale portofoliului,
+            forma (ani, simulări, ...).
+        initial_investment (float): Investiția inițială.
+        horizons (list, optional): Anii la care se păstrează valoarea cumulată (ex: [1, 3, 5]),
+            din aceleași traiectorii; implicit doar valoarea finală.
+        compound (bool): False adună randamentele în loc să le compună (modelul cu o singură
+            perioadă din sims.py: randamentul pe T ani este suma randamentelor anuale).
+        path_risk (mc_stats.PathRiskReducer, optional): Actualizat după fiecare an, cu un
+            checkpoint la fiecare orizont (sau doar la final, fără horizons).
+
+    Returns:
+        np.ndarray: Valorile finale ale portofoliului, forma (simulări, ...), sau valorile la
+            fiecare orizont, forma (orizonturi, simulări, ...).
+    """
+    final_values = np.full(portfolio_returns.shape[1:], float(initial_investment))
+    single_horizon = horizons is None
+    if single_horizon and compound:
+        for year_returns in portfolio_returns:
+            final_values *= 1 + year_returns
+            if path_risk is not None:
+                path_risk.update(final_values)
+        if path_risk is not None:
+            path_risk.checkpoint()
+        return final_values
+
+    horizons = validate_horizons([len(portfolio_returns)] if single_horizon else horizons, len(portfolio_returns))
+    horizon_values = np.empty((len(horizons),) + portfolio_returns.shape[1:])
+    for year, year_returns in enumerate(portfolio_returns[:horizons[-1]], start=1):
+        if compound:
+            final_values *= 1 + year_returns
+        else:
+            final_values += initial_investment * year_returns
+        if path_risk is not None:
+            path_risk.update(final_values)
+        if year in horizons:
+            horizon_values[horizons.index(year)] = final_values
+            if path_risk is not None:
+                path_risk.checkpoint()
+    return horizon_values[0] if single_horizon else horizon_values
+
+
+def simulate_final_values(rng, weights, mean_returns, volatilities, cholesky_risky,
+                          num_years, num_simulations, initial_investment, sampling="pseudo",
+                          horizons=None, compound=True, path_risk=None):
+    """
+    Simulează valorile finale ale portofoliului pentru un set de ponderi.
+
+    Randamentul anual al portofoliului este w·μ + (w_r·σ_r)·(L z). Ponderile se
+    pliază în vectorul L^T (w_r·σ_r), deci nu mai materializăm randamentele
+    fiecărui activ: rămâne o singură înmulțire matrice-vector pe tot tensorul.
+    Șocurile sunt generate conform sampling (vezi draw_standard_normals). Cu horizons,
+    rezultatul are forma (orizonturi, simulări) (vezi compound_portfolio_values), iar
+    path_risk (mc_stats.PathRiskReducer) primește valorile fiecărui an.
+    """
+    weights = np.asarray(weights, dtype=float)
+    volatilities = np.asarray(volatilities, dtype=float)
+    risky_idx = _risky_indices(volatilities, cholesky_risky)
+
+    mean_portfolio_return = weights @ np.asarray(mean_returns, dtype=float)
+    loading = cholesky_risky.T @ (weights[risky_idx] * volatilities[risky_idx])
+    uncorrelated = draw_standard_normals(rng, num_years, num_simulations, len(risky_idx), sampling)
+    portfolio_returns = mean_portfolio_return + (uncorrelated.reshape(-1, len(risky_idx)) @ loading).reshape(num_years, num_simulations)
+    return compound_portfolio_values(portfolio_returns, initial_investment, horizons, compound, path_risk)
+
+
+def step_log_parameters(mean_returns, volatilities, steps_per_year):
+    """
+    Parametrii lognormali pe pas care reproduc randamentul mediu și volatilitatea anuale.
+
+    Randamentul brut anual 1 + R este lognormal cu E[1 + R] = 1 + μ și σ(R) = σ, deci
+    s² = ln(1 + σ² / (1 + μ)²) și m = ln(1 + μ) - s² / 2; pe pas, m / k și s / √k.
+
+    Returns:
+        tuple: (drift, volatilitate) - parametrii randamentului logaritmic pe pas, forma (n_active,).
+    """
+    mean_returns = np.asarray(mean_returns, dtype=float)
+    volatilities = np.asarray(volatilities, dtype=float)
+    if np.any(mean_returns <= -1):
+        raise ValueError("Randamentele medii anuale trebuie să fie mai mari de -100% pentru modelul lognormal.")
+    log_variance = np.log1p((volatilities / (1 + mean_returns)) ** 2)
+    drift = (np.log1p(mean_returns) - log_variance / 2) / steps_per_year
+    return drift, np.sqrt(log_variance / steps_per_year)
+
+
+def simulate_stepped_values(rng, weights, mean_returns, volatilities, cholesky_risky,
+                            num_years, num_simulations, initial_investment, sampling="pseudo",
+                            horizons=None, path_risk=None, steps_per_year=12, rebalancing="calendar",
+                            rebalance_every=None, threshold=0.05, max_block_bytes=DEFAULT_STEP_BLOCK_BYTES):
+    """
+    Simulează portofoliul pas cu pas (lunar, zilnic), cu o politică de reechilibrare.
+
+    Fiecare activ urmează un model lognormal cu parametrii pe pas din step_log_parameters,
+    iar șocurile pasului sunt corelate cu același factor Cholesky (corelația randamentelor
+    logaritmice). Portofoliul este ținut ca sume investite în fiecare activ; un pas este o
+    singură operație pe toate traiectoriile, iar șocurile sunt generate în blocuri de pași
+    (cel mult max_block_bytes), deci memoria nu depinde de numărul de pași. Cu "pseudo" și
+    "antithetic" rezultatul nu depinde de mărimea blocurilor.
+
+    Politicile de reechilibrare (REBALANCING_POLICIES):
+        "buy_and_hold" - ponderile inițiale nu mai sunt refăcute;
+        "calendar"     - revenire la ponderile inițiale la fiecare rebalance_every pași
+                         (implicit steps_per_year, adică anual, ca în modelul anual);
+        "threshold"    - revenire doar pentru traiectoriile la care o pondere s-a abătut cu
+                         mai mult de threshold (puncte procentuale, zecimal) de la țintă.
+
+    Args:
+        steps_per_year (int): Pașii pe an (vezi STEPS_PER_YEAR).
+        horizons, path_risk: Ca în simulate_final_values (path_risk este actualizat la fiecare
+            pas, deci trebuie construit cu același steps_per_year).
+        Celelalte argumente sunt cele din simulate_final_values (sampling fără "sobol").
+
+    Returns:
+        np.ndarray: Valorile finale, forma (simulări,) sau, cu horizons, (orizonturi, simulări).
+    """
+    if rebalancing not in REBALANCING_POLICIES:
+        raise ValueError(f"Politică de reechilibrare necunoscută '{rebalancing}'. Opțiuni: {', '.join(REBALANCING_POLICIES)}.")
+    if sampling == "sobol":
+        raise ValueError("Simularea pe pași nu suportă eșantionarea Sobol (dimensiunea ar fi pași x active).")
+    weights = np.asarray(weights, dtype=float)
+    volatilities = np.asarray(volatilities, dtype=float)
+    risky_idx = _risky_indices(volatilities, cholesky_risky)
+    drift, step_volatilities = step_log_parameters(mean_returns, volatilities, steps_per_year)
+    single_horizon = horizons is None
+    horizons = [num_years] if single_horizon else validate_horizons(horizons, num_years)
+    horizon_steps = [h * steps_per_year for h in horizons]
+    num_steps = horizon_steps[-1]
+    rebalance_every = rebalance_every or steps_per_year
+
+    # Sumele investite în fiecare activ, forma (active, simulări): un pas înmulțește rânduri
+    # contigue, iar valoarea portofoliului este suma rândurilor. Activele fără risc cresc
+    # cu același factor la fiecare pas.
+    safe_idx = np.flatnonzero(volatilities == 0)
+    weights_risky = weights[risky_idx, None]
+    weights_safe = weights[safe_idx, None]
+    holdings_risky = np.repeat(initial_investment * weights_risky, num_simulations, axis=1)
+    holdings_safe = np.repeat(initial_investment * weights_safe, num_simulations, axis=1)
+    growth_safe = np.exp(drift[safe_idx, None])
+    values = np.empty(num_simulations)
+    horizon_values = np.empty((len(horizons), num_simulations))
+    block_steps = max(1, min(num_steps, max_block_bytes // (16 * num_simulations * max(len(risky_idx), 1))))
+    step = 0
+    while step < num_steps:
+        block = min(block_steps, num_steps - step)
+        shocks = draw_standard_normals(rng, block, num_simulations, len(risky_idx), sampling)
+        # Același factor Cholesky pentru toți pașii; rezultatul are forma (pași, riscante, simulări)
+        growth_risky = np.matmul(cholesky_risky, shocks.transpose(0, 2, 1))
+        del shocks
+        growth_risky *= step_volatilities[risky_idx, None]
+        growth_risky += drift[risky_idx, None]
+        np.exp(growth_risky, out=growth_risky)
+        for t in range(block):
+            holdings_risky *= growth_risky[t]
+            holdings_safe *= growth_safe
+            np.add(holdings_risky.sum(axis=0), holdings_safe.sum(axis=0), out=values)
+            step += 1
+            if rebalancing == "calendar" and step % rebalance_every == 0:
+                np.multiply(weights_risky, values, out=holdings_risky)
+                np.multiply(weights_safe, values, out=holdings_safe)
+            elif rebalancing == "threshold":
+                bands = threshold * values
+                drifted = (np.abs(holdings_risky - weights_risky * values) > bands).any(axis=0)
+                drifted |= (np.abs(holdings_safe - weights_safe * values) > bands).any(axis=0)
+                if drifted.any():
+                    holdings_risky[:, drifted] = weights_risky * values[drifted]
+                    holdings_safe[:, drifted] = weights_safe * values[drifted]
+            if path_risk is not None:
+                path_risk.update(values)
+            if step in horizon_steps:
+                horizon_values[horizon_steps.index(step)] = values
+                if path_risk is not None:
+                    path_risk.checkpoint()
+    return horizon_values[0] if single_horizon else horizon_values
+
+
+def iter_common_random_final_values(asset_returns, weights_matrix, initial_investment,
+                                    max_chunk_bytes=DEFAULT_CRN_CHUNK_BYTES, horizons=None, compound=True,
+                                    path_risk=False):
+    """
+    Modul cu numere aleatoare comune (CRN): aceleași traiectorii ale activelor
+    sunt refolosite pentru toate seturile de ponderi.
+
+    Traiectoriile nu depind de ponderi, deci pentru un bloc de seturi de ponderi
+    randamentele portofoliilor se obțin cu o singură înmulțire
+    (traiectorii x active) @ (active x ponderi). Blocurile sunt dimensionate astfel
+    încât matricea intermediară să nu depășească max_chunk_bytes.
+
+    Args:
+        asset_returns (np.ndarray): Randamentele pe perioadă ale activelor,
+            forma (perioade, simulări, n_active).
+        weights_matrix (np.ndarray): Ponderile (zecimal), forma (n_seturi, n_active).
+        initial_investment (float): Investiția inițială.
+        max_chunk_bytes (int): Memoria maximă pentru un bloc de rezultate.
+        horizons (list, optional): Anii la care se păstrează valoarea cumulată.
+        compound (bool): Vezi compound_portfolio_values.
+        path_risk (bool): Calculează și metricile de traiectorie (mc_stats.PathRiskReducer).
+
+    Yields:
+        tuple: (slice, np.ndarray) - seturile de ponderi din bloc și valorile finale
+            ale acestora, forma (simulări, n_seturi_bloc) sau, cu horizons,
+            (orizonturi, simulări, n_seturi_bloc). Cu path_risk se adaugă un al treilea
+            element: metricile per traiectorie, câte un dicționar per orizont.
+    """
+    num_periods, num_simulations, num_assets = asset_returns.shape
+    weights_matrix = np.atleast_2d(np.asarray(weights_matrix, dtype=float))
+    flat_returns = asset_returns.reshape(-1, num_assets)
+    bytes_per_weight_set = num_periods * num_simulations * flat_returns.itemsize
+    chunk_size = max(1, int(max_chunk_bytes // bytes_per_weight_set))
+
+    for start in range(0, len(weights_matrix), chunk_size):
+        chunk = slice(start, min(start + chunk_size, len(weights_matrix)))
+        portfolio_returns = (flat_returns @ weights_matrix[chunk].T).reshape(num_periods, num_simulations, -1)
+        if not path_risk:
+            yield chunk, compound_portfolio_values(portfolio_returns, initial_investment, horizons, compound)
+            continue
+        reducer = PathRiskReducer(np.full(portfolio_returns.shape[1:], float(initial_investment)))
+        values = compound_portfolio_values(portfolio_returns, initial_investment, horizons, compound, reducer)
+        yield chunk, values, reducer.checkpoints
+
+
+def _risky_indices(volatilities, cholesky_risky):
+    risky_idx = np.flatnonzero(volatilities)
+    if cholesky_risky.shape != (len(risky_idx), len(risky_idx)):
+        raise ValueError(f"Factorul Cholesky are forma {cholesky_risky.shape}, dar există {len(risky_idx)} active riscante.")
+    return risky_idx
+
+
+def summarize_final_values(weights_raw, final_values, loss_threshold):
+    """ Construiește înregistrarea de rezultate (același format ca montecarlo4opt.py). """
+    accumulator = make_stats_accumulator("exact", loss_threshold)
+    accumulator.update(final_values)
+    return {"Weights": weights_raw, **accumulator.result()}
+
+
+def summarize_final_values_matrix(weights_raw_list, final_values_matrix, loss_threshold, cvar_level=DEFAULT_CVAR_LEVEL,
+                                  horizon=None, path_metrics=None):
+    """
+    Varianta pe coloane a summarize_final_values pentru o matrice (simulări x seturi de ponderi):
+    toate coloanele într-un singur apel mc_stats.batch_statistics (o partiție per coloană).
+
+    Cu horizon, fiecare înregistrare primește și cheia "Horizon" (anul valorilor); cu
+    path_metrics (metricile per traiectorie, coloanele = seturile de ponderi), și distribuția
+    metricilor de traiectorie (mc_stats.summarize_path_metrics).
+    """
+    horizon_key = {} if horizon is None else {"Horizon": horizon}
+    path_summary = {} if path_metrics is None else summarize_path_metrics(path_metrics, axis=0)
+    stats = stats_records(batch_statistics(final_values_matrix, loss_threshold, cvar_level=cvar_level, axis=0))
+    return [
+        {
+            "Weights": weights_raw,
+            **horizon_key,
+            **stats[j],
+            "Paths": len(final_values_matrix),
+            **{key: values[j] for key, values in path_summary.items()}
+        }
+        for j, weights_raw in enumerate(weights_raw_list)
+    ]
+
+
+def analytic_single_period_records(weights_raw_list, weights_matrix, expected_returns_T, cov_matrix_T, initial_investment,
+                                   horizon=None):
+    """
+    Statisticile exacte pentru modelul gaussian cu o singură perioadă.
+
+    Valoarea finală este initial_investment * (1 + w·R_T) cu R_T ~ N(μ_T, Σ_T), deci
+    este normală cu media I(1 + w·μ_T) și deviația I·sqrt(w Σ_T wᵀ). Media și mediana
+    coincid, iar percentilele sunt media + z_p · deviația. Probabilitatea de pierdere este
+    Φ((I - media) / deviația), iar CVaR la nivelul α este media - deviația · φ(z_α) / α.
+    Toate seturile de ponderi sunt evaluate deodată, cu o formă pătratică pe rânduri.
+
+    Args:
+        weights_raw_list (list): Ponderile originale (procente), păstrate în rezultate.
+        weights_matrix (np.ndarray): Ponderile (zecimal), forma (n_seturi, n_active).
+        expected_returns_T (np.ndarray): Randamentele așteptate pe orizontul T.
+        cov_matrix_T (np.ndarray): Matricea de covarianță pe orizontul T.
+        initial_investment (float): Investiția inițială.
+        horizon (int, optional): Adaugă cheia "Horizon" (ca summarize_final_values_matrix).
+
+    Returns:
+        list: Înregistrări cu aceleași chei ca rezultatele Monte Carlo.
+    """
+    weights_matrix = np.atleast_2d(np.asarray(weights_matrix, dtype=float))
+    mean_values = initial_investment * (1 + weights_matrix @ expected_returns_T)
+    portfolio_variance = np.einsum('ij,jk,ik->i', weights_matrix, cov_matrix_T, weights_matrix)
+    std_values = initial_investment * np.sqrt(np.maximum(portfolio_variance, 0.0))
+    standard_normal = NormalDist()
+    z_5 = standard_normal.inv_cdf(0.05)
+    z_cvar = standard_normal.inv_cdf(DEFAULT_CVAR_LEVEL)
+    cvar_values = mean_values - std_values * standard_normal.pdf(z_cvar) / DEFAULT_CVAR_LEVEL
+    horizon_key = {} if horizon is None else {"Horizon": horizon}
+    return [
+        {
+            "Weights": weights_raw,
+            **horizon_key,
+            "Mean": mean_values[j],
+            "Median": mean_values[j],
+            "5th_Percentile": mean_values[j] + z_5 * std_values[j],
+            "95th_Percentile": mean_values[j] - z_5 * std_values[j],
+            "Prob_Loss": (standard_normal.cdf((initial_investment - mean_values[j]) / std_values[j]) if std_values[j] > 0
+                          else float(mean_values[j] < initial_investment)),
+            "CVaR_5": cvar_values[j]
+        }
+        for j, weights_raw in enumerate(weights_raw_list)
+    ]
+
+
+def compare_stat_records(reference_records, simulated_records, keys=("Mean", "Median", "5th_Percentile", "95th_Percentile")):
+    """
+    Compară două liste de înregistrări (ex: analitic vs. Monte Carlo), aliniate pe poziție.
+
+    Returns:
+        dict: Pentru fiecare cheie, diferența absolută maximă și medie și diferența
+            relativă maximă (față de valoarea de referință).
+    """
+    comparison = {}
+    for key in keys:
+        reference = np.array([r[key] for r in reference_records], dtype=float)
+        simulated = np.array([r[key] for r in simulated_records], dtype=float)
+        abs_diff = np.abs(simulated - reference)
+        comparison[key] = {
+            "max_abs_diff": float(np.max(abs_diff)) if len(abs_diff) else 0.0,
+            "mean_abs_diff": float(np.mean(abs_diff)) if len(abs_diff) else 0.0,
+            "max_rel_diff": float(np.max(abs_diff / np.maximum(np.abs(reference), 1e-12))) if len(abs_diff) else 0.0
+        }
+    return comparison
+
+
+def simulation_batches(num_simulations, batch_size=None):
+    """ Mărimile loturilor de traiectorii (un singur lot dacă batch_size lipsește). """
+    if batch_size is None or batch_size >= num_simulations:
+        return [num_simulations]
+    if batch_size < 1:
+        raise ValueError(f"batch_size trebuie să fie pozitiv (primit: {batch_size}).")
+    return [min(batch_size, num_simulations - start) for start in range(0, num_simulations, batch_size)]
+
+
+def validate_sampling_batches(batches, sampling):
+    """
+    Verifică înainte de simulare că fiecare lot poate fi eșantionat cu sampling.
+
+    Perechile antitetice cer loturi pare, iar punctele Sobol loturi de mărimea unei puteri a
+    lui 2 (vezi draw_standard_normals). Ultimul lot incomplet este păstrat dacă respectă
+    condiția; altfel se ridică ValueError, ca numărul de traiectorii să nu fie redus în tăcere.
+    """
+    if sampling == "antithetic" and any(batch % 2 for batch in batches):
+        raise ValueError(f"Cu variabile antitetice fiecare lot trebuie să fie par "
+                         f"(num_simulations = {sum(batches)}, lot = {batches[0]}, ultimul lot = {batches[-1]}).")
+    if sampling == "sobol" and any(batch & (batch - 1) for batch in batches):
+        raise ValueError(f"Cu Sobol fiecare lot trebuie să fie o putere a lui 2 "
+                         f"(num_simulations = {sum(batches)}, lot = {batches[0]}, ultimul lot = {batches[-1]}).")
+
+
+def simulate_shard_records(weights_raw_list, weights_matrix, seed_sequence, mean_returns, volatilities,
+                           cholesky_risky, num_years, num_simulations, initial_investment,
+                           stats_kind="exact", stats_options=None, batch_size=None,
+                           sampling="pseudo", target_standard_error=None, min_batches=10,
+                           horizons=None, compound=True, path_risk=False, stepping=None, bootstrap=None):
+    """
+    Simulează independent fiecare set de ponderi dintr-un shard, cu generatorul shard-ului.
+
+    Seturile sunt procesate în ordine cu același generator, deci rezultatul depinde doar
+    de seed_sequence și de conținutul shard-ului (vezi mc_runner.run_sharded). Traiectoriile
+    sunt simulate în loturi de batch_size și trimise acumulatorului stats_kind (vezi
+    mc_stats.py), deci cu "histogram" memoria nu crește cu num_simulations.
+
+    Cu target_standard_error (în aceeași monedă ca initial_investment), simularea unui
+    portofoliu se oprește după primul lot (cel puțin min_batches) la care eroarea standard
+    a P5 și a P95, estimată pe loturi, scade sub țintă; num_simulations devine doar plafonul.
+    Înregistrările conțin numărul de traiectorii folosite (Paths) și, cu cel puțin două
+    loturi, intervalele de încredere de 95% pentru P5 și P95.
+
+    Cu horizons (ex: [1, 3, 5, 10], cel mult num_years), valorile cumulate la fiecare orizont
+    sunt luate din aceleași traiectorii și rezultă câte o înregistrare per (set de ponderi,
+    orizont), cu cheia "Horizon"; oprirea la convergență cere atunci toate orizonturile.
+
+    Cu path_risk, fiecare înregistrare primește și distribuția metricilor de traiectorie
+    (scăderea maximă, durata sub vârf, valoarea minimă, cel mai slab an; vezi
+    mc_stats.PathRiskReducer), calculate online, până la orizontul înregistrării.
+
+    Cu stepping (dicționar cu argumentele steps_per_year, rebalancing, rebalance_every,
+    threshold ale simulate_stepped_values), traiectoriile sunt simulate pe pași lunari sau
+    zilnici, cu politica de reechilibrare aleasă, în locul modelului anual. Cu bootstrap
+    (mc_bootstrap.BlockBootstrap), randamentele anuale ale activelor riscante sunt eșantionate
+    din istoric (bootstrap_asset_returns), cu reechilibrare anuală.
+    """
+    if bootstrap is not None and (stepping is not None or sampling != "pseudo"):
+        raise ValueError("Scenariile bootstrap folosesc doar pasul anual și eșantionarea \"pseudo\".")
+    batches = simulation_batches(num_simulations, batch_size)
+    validate_sampling_batches(batches, sampling)
+    if horizons is not None:
+        horizons = validate_horizons(horizons, num_years)
+        num_years = horizons[-1]
+    steps_per_year = 1 if stepping is None else stepping.get("steps_per_year", 12)
+    rng = np.random.default_rng(seed_sequence)
+    records = []
+    for weights_raw, weights in zip(weights_raw_list, weights_matrix):
+        # Un acumulator per orizont; fără horizons, un singur "orizont" (valoarea finală)
+        num_horizons = 1 if horizons is None else len(horizons)
+        accumulators = [make_stats_accumulator(stats_kind, initial_investment, **(stats_options or {})) for _ in range(num_horizons)]
+        quantile_errors = [BatchQuantileErrors((5, 95)) for _ in range(num_horizons)]
+        path_metrics = [[] for _ in range(num_horizons)]
+        paths = 0
+        for batch in batches:
+            reducer = PathRiskReducer(np.full(batch, float(initial_investment)), steps_per_year) if path_risk else None
+            if bootstrap is not None:
+                asset_returns = bootstrap_asset_returns(rng, bootstrap, batch, num_years, mean_returns, volatilities)
+                values = compound_portfolio_values(asset_returns @ weights, initial_investment, horizons, compound, reducer)
+            elif stepping is None:
+                values = simulate_final_values(
+                    rng, weights, mean_returns, volatilities, cholesky_risky,
+                    num_years, batch, initial_investment, sampling, horizons, compound, reducer
+                )
+            else:
+                values = simulate_stepped_values(
+                    rng, weights, mean_returns, volatilities, cholesky_risky,
+                    num_years, batch, initial_investment, sampling, horizons, reducer, **stepping
+                )
+            if reducer is not None:
+                for horizon_metrics, checkpoint in zip(path_metrics, reducer.checkpoints):
+                    horizon_metrics.append(checkpoint)
+            values = values.reshape(num_horizons, batch)
+            for accumulator, errors, horizon_values in zip(accumulators, quantile_errors, values):
+                accumulator.update(horizon_values)
+                errors.update(horizon_values)
+            paths += batch
+            if (target_standard_error is not None and quantile_errors[0].num_batches >= min_batches
+                    and all(np.all(errors.standard_errors() <= target_standard_error) for errors in quantile_errors)):
+                break
+        for h, (accumulator, errors) in enumerate(zip(accumulators, quantile_errors)):
+            stats = accumulator.result()
+            ci_5, ci_95 = errors.confidence_intervals((stats["5th_Percentile"], stats["95th_Percentile"]))
+            horizon_key = {} if horizons is None else {"Horizon": horizons[h]}
+            path_summary = summarize_path_metrics(concatenate_path_metrics(path_metrics[h])) if path_risk else {}
+            records.append({"Weights": weights_raw, **horizon_key, **stats, "Paths": paths,
+                            "5th_Percentile_CI": ci_5, "95th_Percentile_CI": ci_95, **path_summary})
+    return records
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+# Rulare Monte Carlo pe mai multe nuclee, reproductibilă.
+#
+# Grila de ponderi este împărțită în shard-uri de mărime fixă. Fiecare shard primește
+# propriul generator, derivat din semința rădăcină exact ca SeedSequence.spawn
+# (copilul i are spawn_key = (i,)). Împărțirea depinde doar de shard_size, nu de numărul
+# de procese, deci rezultatele sunt identice bit cu bit pentru orice număr de workeri.
+#
+# Pentru rulările lungi, shard-urile terminate sunt salvate periodic într-un checkpoint JSON,
+# împreună cu entropia rădăcină. Starea generatorului unui shard rezultă complet din
+# (entropie, index shard), deci la reluare shard-urile rămase folosesc aceleași fluxuri
+# aleatoare și rezultatul final este identic cu cel al unei rulări neîntrerupte. Checkpoint-ul
+# conține și o amprentă (SHA-256) a tuturor intrărilor shard-urilor (task, ponderi, parametrii
+# modelului, inclusiv matricele), deci o reluare după modificarea oricărei intrări este refuzată.
+
+CHECKPOINT_FORMAT_VERSION = 2
+
+
+def shard_seed_sequence(entropy, shard_index):
+    """ Copilul shard_index al SeedSequence(entropy), identic cu root.spawn(...)[shard_index]. """
+    return np.random.SeedSequence(entropy, spawn_key=(shard_index,))
+
+
+def shard_bounds(num_items, shard_size):
+    """ Lista de (start, stop) pentru fiecare shard. """
+    if shard_size < 1:
+        raise ValueError(f"shard_size trebuie să fie pozitiv (primit: {shard_size}).")
+    return [(start, min(start + shard_size, num_items)) for start in range(0, num_items, shard_size)]
+
+
+def _update_digest(digest, value):
+    if isinstance(value, np.ndarray):
+        digest.update(f"ndarray:{value.dtype.str}:{value.shape}:".encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, np.generic):
+        _update_digest(digest, value.item())
+    elif value is None or isinstance(value, (bool, int, float, str)):
+        digest.update(f"{type(value).__name__}:{value!r};".encode())
+    elif isinstance(value, dict):
+        digest.update(f"dict:{len(value)}:".encode())
+        for key in sorted(value, key=str):
+            _update_digest(digest, key)
+            _update_digest(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"list:{len(value)}:".encode())
+        for item in value:
+            _update_digest(digest, item)
+    elif callable(value) and hasattr(value, "__qualname__"):
+        digest.update(f"callable:{value.__module__}.{value.__qualname__};".encode())
+    elif hasattr(value, "__dict__"):
+        # Obiecte de model (ex: mc_bootstrap.BlockBootstrap): clasa și atributele
+        digest.update(f"object:{type(value).__module__}.{type(value).__qualname__}:".encode())
+        _update_digest(digest, vars(value))
+    else:
+        raise TypeError(f"Nu se poate calcula amprenta pentru o valoare de tip {type(value).__name__}.")
+
+
+def inputs_digest(*values):
+    """ Amprenta SHA-256 (hex) a valorilor: numere, text, liste, dicționare, array-uri numpy, obiecte. """
+    digest = hashlib.sha256()
+    _update_digest(digest, values)
+    return digest.hexdigest()
+
+
+def load_checkpoint(checkpoint_path):
+    """
+    Citește un checkpoint salvat de run_sharded.
+
+    Returns:
+        dict sau None: Starea salvată (entropie, mărimea shard-urilor, shard-urile terminate),
+            sau None dacă fișierul nu există.
+    """
+    if not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path, "r") as f:
+        state = json.load(f)
+    if state.get("format_version") != CHECKPOINT_FORMAT_VERSION:
+        raise ValueError(f"Checkpoint-ul '{checkpoint_path}' are un format necunoscut.")
+    state["completed_shards"] = {int(k): v for k, v in state["completed_shards"].items()}
+    return state
+
+
+def _write_checkpoint(checkpoint_path, state):
+    """ Scrie checkpoint-ul atomic (fișier temporar + os.replace), ca un crash să nu-l corupă. """
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({**state, "completed_shards": {str(k): v for k, v in state["completed_shards"].items()}}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, checkpoint_path)
+
+
+def _check_resume_state(resume_state, entropy, shard_size, num_items, run_signature, digest):
+    expected = {"entropy": entropy, "shard_size": shard_size, "num_items": num_items, "run_signature": run_signature,
+                "inputs_digest": digest}
+    for key, value in expected.items():
+        if resume_state.get(key) != value:
+            raise ValueError(f"Checkpoint-ul nu corespunde rulării curente ({key}: {resume_state.get(key)!r} vs {value!r}).")
+
+
+def _run_shard(task, shard_index, entropy, weights_raw_list, weights_matrix, task_kwargs):
+    return shard_index, task(weights_raw_list, weights_matrix, shard_seed_sequence(entropy, shard_index), **task_kwargs)
+
+
+def run_sharded(task, weights_raw_list, weights_matrix, task_kwargs, entropy,
+                shard_size=64, num_workers=1, progress_callback=None,
+                checkpoint_path=None, checkpoint_interval=60.0, resume_state=None, run_signature=None):
+    """
+    Rulează task pe fiecare shard al grilei și îmbină rezultatele în ordinea grilei.
+
+    Args:
+        task (callable): Funcție la nivel de modul (trebuie să poată fi trimisă altui proces),
+            apelată ca task(ponderi_brute, matrice_ponderi, seed_sequence, **task_kwargs)
+            și care întoarce o listă de înregistrări, câte una pentru fiecare set de ponderi.
+        weights_raw_list (list): Ponderile originale (procente), păstrate în rezultate.
+        weights_matrix (np.ndarray): Ponderile (zecimal), forma (n_seturi, n_active).
+        task_kwargs (dict): Parametrii modelului, transmiși fiecărui shard.
+        entropy (int): Entropia semințelor rădăcină (SeedSequence(...).entropy).
+        shard_size (int): Numărul de seturi de ponderi dintr-un shard.
+        num_workers (int): Numărul de procese; 1 rulează totul în procesul curent.
+        progress_callback (callable, optional): Apelată cu numărul de seturi terminate.
+        checkpoint_path (str, optional): Fișierul în care se salvează periodic shard-urile terminate.
+        checkpoint_interval (float): Secundele minime între două salvări ale checkpoint-ului.
+        resume_state (dict, optional): Starea întoarsă de load_checkpoint; shard-urile deja
+            terminate nu se mai rulează.
+        run_signature (dict, optional): Parametrii rulării (JSON, lizibili în checkpoint),
+            verificați la reluare; în plus, la reluare trebuie să coincidă și amprenta tuturor
+            intrărilor (inputs_digest pe task, ponderi și task_kwargs).
+
+    Returns:
+        list: Înregistrările tuturor seturilor de ponderi, în ordinea grilei.
+    """
+    bounds = shard_bounds(len(weights_raw_list), shard_size)
+    digest = inputs_digest(task, weights_raw_list, np.asarray(weights_matrix), task_kwargs)
+    state = {
+        "format_version": CHECKPOINT_FORMAT_VERSION,
+        "entropy": entropy,
+        "shard_size": shard_size,
+        "num_items": len(weights_raw_list),
+        "run_signature": run_signature,
+        "inputs_digest": digest,
+        "completed_shards": {}
+    }
+    if resume_state is not None:
+        _check_resume_state(resume_state, entropy, shard_size, len(weights_raw_list), run_signature, digest)
+        state["completed_shards"] = dict(resume_state["completed_shards"])
+
+    # Progresul numără seturile de ponderi (un set poate avea mai multe înregistrări, ex: orizonturi)
+    completed = sum(bounds[shard_index][1] - bounds[shard_index][0] for shard_index in state["completed_shards"])
+    last_flush = time.monotonic()
+    unsaved_shards = 0
+    if progress_callback is not None and completed:
+        progress_callback(completed)
+
+    def collect(shard_index, records):
+        nonlocal completed, last_flush, unsaved_shards
+        state["completed_shards"][shard_index] = records
+        completed += bounds[shard_index][1] - bounds[shard_index][0]
+        unsaved_shards += 1
+        if checkpoint_path is not None and time.monotonic() - last_flush >= checkpoint_interval:
+            _write_checkpoint(checkpoint_path, state)
+            last_flush = time.monotonic()
+            unsaved_shards = 0
+        if progress_callback is not None:
+            progress_callback(completed)
+
+    pending = [(shard_index, start, stop) for shard_index, (start, stop) in enumerate(bounds)
+               if shard_index not in state["completed_shards"]]
+    try:
+        if num_workers <= 1:
+            for shard_index, start, stop in pending:
+                collect(*_run_shard(task, shard_index, entropy, weights_raw_list[start:stop],
+                                    weights_matrix[start:stop], task_kwargs))
+        else:
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                futures = [
+                    executor.submit(_run_shard, task, shard_index, entropy, weights_raw_list[start:stop],
+                                    weights_matrix[start:stop], task_kwargs)
+                    for shard_index, start, stop in pending
+                ]
+                for future in as_completed(futures):
+                    collect(*future.result())
+    finally:
+        # La întrerupere (ex: Ctrl+C) se salvează și shard-urile terminate de la ultima salvare
+        if checkpoint_path is not None and unsaved_shards:
+            _write_checkpoint(checkpoint_path, state)
+
+    return [record for shard_index in range(len(bounds)) for record in state["completed_shards"][shard_index]]
@@ -0,0 +1,394 @@
+import warnings
+from statistics import NormalDist
+
+import numpy as np
+
+# Acumulatori de statistici pentru valorile finale ale unui portofoliu.
+#
+# Valorile sunt primite pe loturi (update), iar result() întoarce aceleași chei pentru toți
+# acumulatorii: Mean, Median, 5th_Percentile, 95th_Percentile, Prob_Loss (probabilitatea ca
+# valoarea finală să fie sub investiția inițială), CVaR_5 (media celor mai slabe 5% valori),
+# Std și VaR_5 (valoarea de la limita celor mai slabe 5%).
+#
+#   "exact"     - păstrează toate valorile; o singură partiție (batch_statistics), percentile
+#                 identice cu np.percentile.
+#   "histogram" - histogramă cu num_bins intervale egale și memorie fixă, într-o singură trecere.
+#                 Media, Std și Prob_Loss sunt exacte; percentilele, VaR și CVaR au eroarea cel
+#                 mult egală cu lățimea unui interval (vezi HistogramStats).
+
+DEFAULT_CVAR_LEVEL = 0.05
+DEFAULT_CONFIDENCE_LEVEL = 0.95
+
+
+DEFAULT_QUANTILES = (5, 50, 95)
+
+
+def percentile_field(q):
+    """ Numele câmpului pentru percentila q (50 -> "Median", 5 -> "5th_Percentile", 1 -> "1st_Percentile"). """
+    if q == 50:
+        return "Median"
+    suffix = "th"
+    if q == int(q) and int(q) % 100 not in (11, 12, 13):
+        suffix = {1: "st", 2: "nd", 3: "rd"}.get(int(q) % 10, "th")
+    return f"{q:g}{suffix}_Percentile"
+
+
+def tail_field(prefix, level):
+    """ Numele câmpului pentru o măsură de coadă (ex: "CVaR_5" pentru nivelul 0.05). """
+    return f"{prefix}_{level * 100:g}"
+
+
+def batch_statistics(outcomes, loss_threshold, quantiles=DEFAULT_QUANTILES, cvar_level=DEFAULT_CVAR_LEVEL, axis=0):
+    """
+    Toate statisticile pentru fiecare coloană a matricei de rezultate, într-un singur apel.
+
+    Pentru fiecare coloană se face o singură partiție (np.partition cu toate pozițiile
+    necesare): rangurile vecine fiecărei percentile și limita cozii de jos. Percentilele
+    sunt interpolate liniar exact ca np.percentile; VaR este valoarea de la limita cozii
+    (a ceil(cvar_level * n)-a cea mai mică valoare), iar CVaR media valorilor până la ea
+    (ca lower_tail_mean).
+
+    Args:
+        outcomes (np.ndarray): Rezultatele, ex: (traiectorii x seturi de ponderi).
+        loss_threshold (float): Pragul pentru Prob_Loss (de obicei investiția inițială).
+        quantiles (sequence): Percentilele raportate (0-100); duplicatele sunt ignorate.
+        cvar_level (float): Nivelul cozii pentru VaR și CVaR.
+        axis (int): Axa traiectoriilor.
+
+    Returns:
+        np.ndarray: Tablou structurat cu forma celorlalte axe și câmpurile Mean,
+            Median și celelalte percentile (vezi percentile_field), Prob_Loss, CVaR_<nivel>,
+            Std și VaR_<nivel>.
+    """
+    values = np.moveaxis(np.asarray(outcomes, dtype=float), axis, 0)
+    n = len(values)
+    if not n:
+        raise ValueError("Nu a fost primită nicio valoare.")
+    quantiles = np.asarray(quantiles, dtype=float).ravel()
+    # Percentilele repetate (ex: [50, 50]) dau un singur câmp; ordinea primei apariții se păstrează
+    quantiles = quantiles[np.sort(np.unique(quantiles, return_index=True)[1])]
+    tail_count = max(1, int(np.ceil(cvar_level * n)))
+    virtual = (n - 1) * (quantiles / 100)
+    previous = np.minimum(np.floor(virtual), n - 1).astype(np.intp)
+    following = np.minimum(previous + 1, n - 1)
+    gamma = virtual - np.floor(virtual)
+
+    # Ordinea cheilor din acumulatori (Mediana prima), apoi Std și VaR
+    percentile_fields = sorted((percentile_field(q) for q in quantiles), key=lambda field: field != "Median")
+    fields = (["Mean"] + percentile_fields + ["Prob_Loss", tail_field("CVaR", cvar_level), "Std", tail_field("VaR", cvar_level)])
+    stats = np.empty(values.shape[1:], dtype=[(field, np.float64) for field in fields])
+    stats["Mean"] = np.mean(values, axis=0)
+    stats["Std"] = np.std(values, axis=0)
+    stats["Prob_Loss"] = np.mean(values < loss_threshold, axis=0)
+
+    ordered = np.partition(values, np.unique(np.concatenate((previous, following, [tail_count - 1]))), axis=0)
+    for q, low, high, t in zip(quantiles, ordered[previous], ordered[following], gamma):
+        # Interpolarea din np.percentile (numpy _lerp), ca rezultatele să fie identice
+        diff = high - low
+        stats[percentile_field(q)] = high - diff * (1 - t) if t >= 0.5 else low + diff * t
+    stats[tail_field("VaR", cvar_level)] = ordered[tail_count - 1]
+    stats[tail_field("CVaR", cvar_level)] = np.mean(ordered[:tail_count], axis=0)
+    return stats
+
+
+def stats_records(stats):
+    """ Tabloul structurat al batch_statistics ca listă de dicționare (float Python), pentru JSON. """
+    return [dict(zip(stats.dtype.names, row)) for row in np.atleast_1d(stats).tolist()]
+
+
+def lower_tail_mean(values, level=DEFAULT_CVAR_LEVEL, axis=0):
+    """ Media celor mai mici ceil(level * n) valori (CVaR / expected shortfall pe coada de jos). """
+    values = np.asarray(values, dtype=float)
+    n = values.shape[axis]
+    tail_count = max(1, int(np.ceil(level * n)))
+    tail = np.partition(values, tail_count - 1, axis=axis)
+    return np.mean(np.take(tail, np.arange(tail_count), axis=axis), axis=axis)
+
+
+class ExactStats:
+    """ Păstrează toate valorile primite; statisticile sunt exacte (memorie O(n)). """
+
+    def __init__(self, loss_threshold, cvar_level=DEFAULT_CVAR_LEVEL):
+        self.loss_threshold = loss_threshold
+        self.cvar_level = cvar_level
+        self._batches = []
+
+    def update(self, values):
+        self._batches.append(np.asarray(values, dtype=float).ravel())
+
+    def result(self):
+        values = self._batches[0] if len(self._batches) == 1 else np.concatenate(self._batches)
+        return stats_records(batch_statistics(values, self.loss_threshold, cvar_level=self.cvar_level))[0]
+
+
+class HistogramStats:
+    """
+    Statistici într-o singură trecere, cu memorie fixă (num_bins numărători și sume).
+
+    Domeniul histogramei este stabilit din primul lot și dublat ori de câte ori apare o
+    valoare în afara lui; la dublare perechile de intervale vecine se contopesc, deci
+    marginile vechi rămân margini și nu se pierde nicio informație deja acumulată.
+
+    Garanții (w = lățimea finală a unui interval, vezi error_bound()):
+        - Mean, Std, Prob_Loss: exacte (sume și numărătoare separate).
+        - Percentile: fiecare statistică de ordine este estimată în interiorul intervalului
+          care o conține, iar percentila se interpolează liniar între două statistici de
+          ordine (ca np.percentile), deci |estimare - percentila eșantionului| <= w; la fel VaR_5.
+        - CVaR_5: intervalele aflate complet în coadă contribuie cu sumele lor exacte; doar
+          intervalul de la limita cozii este aproximat prin media lui, deci eroarea <= w.
+    De obicei w ≈ 1.5-3 × (max - min) / num_bins.
+    """
+
+    def __init__(self, loss_threshold, cvar_level=DEFAULT_CVAR_LEVEL, num_bins=4096):
+        if num_bins < 2 or num_bins % 2:
+            raise ValueError(f"num_bins trebuie să fie un număr par >= 2 (primit: {num_bins}).")
+        self.loss_threshold = loss_threshold
+        self.cvar_level = cvar_level
+        self.num_bins = num_bins
+        self.counts = np.zeros(num_bins, dtype=np.int64)
+        self.sums = np.zeros(num_bins)
+        self.lower = None
+        self.width = None
+        self.count = 0
+        self.total = 0.0
+        self.m2 = 0.0
+        self.loss_count = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def error_bound(self):
+        """ Eroarea maximă a percentilelor și a CVaR (lățimea unui interval). """
+        return 0.0 if self.width is None else self.width
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        if not len(values):
+            return
+        batch_min, batch_max = values.min(), values.max()
+        if self.lower is None:
+            span = batch_max - batch_min
+            self.width = (1.5 * span if span > 0 else max(abs(batch_min), 1.0) * 1e-9) / self.num_bins
+            self.lower = batch_min - 0.25 * span
+        self._grow(batch_min, batch_max)
+
+        bins = np.clip(((values - self.lower) / self.width).astype(np.int64), 0, self.num_bins - 1)
+        self.counts += np.bincount(bins, minlength=self.num_bins)
+        self.sums += np.bincount(bins, weights=values, minlength=self.num_bins)
+        # Suma pătratelor abaterilor, combinată pe loturi (Chan et al.), pentru Std
+        batch_mean = values.mean()
+        if self.count:
+            delta = batch_mean - self.total / self.count
+            self.m2 += delta * delta * self.count * len(values) / (self.count + len(values))
+        self.m2 += np.sum((values - batch_mean) ** 2)
+        self.count += len(values)
+        self.total += values.sum()
+        self.loss_count += int(np.count_nonzero(values < self.loss_threshold))
+        self.min = min(self.min, batch_min)
+        self.max = max(self.max, batch_max)
+
+    def _grow(self, batch_min, batch_max):
+        half = self.num_bins // 2
+        while batch_min < self.lower or batch_max >= self.lower + self.num_bins * self.width:
+            merged_counts = self.counts.reshape(half, 2).sum(axis=1)
+            merged_sums = self.sums.reshape(half, 2).sum(axis=1)
+            self.counts[:] = 0
+            self.sums[:] = 0.0
+            if batch_max >= self.lower + self.num_bins * self.width:
+                # Domeniul se extinde în sus: intervalele vechi ocupă prima jumătate
+                self.counts[:half] = merged_counts
+                self.sums[:half] = merged_sums
+            else:
+                # Domeniul se extinde în jos: intervalele vechi ocupă a doua jumătate
+                self.counts[half:] = merged_counts
+                self.sums[half:] = merged_sums
+                self.lower -= self.num_bins * self.width
+            self.width *= 2
+
+    def _order_statistics(self, ranks):
+        """ Estimează statisticile de ordine (ranguri de la 0), fiecare în intervalul ei. """
+        cumulative = np.cumsum(self.counts)
+        bins = np.searchsorted(cumulative, ranks, side='right')
+        before = cumulative[bins] - self.counts[bins]
+        position = (ranks - before + 0.5) / self.counts[bins]
+        return np.clip(self.lower + (bins + position) * self.width, self.min, self.max)
+
+    def _percentile(self, q):
+        rank = q / 100 * (self.count - 1)
+        low, high = self._order_statistics(np.array([np.floor(rank), np.ceil(rank)]))
+        return low + (rank - np.floor(rank)) * (high - low)
+
+    def _lower_tail_mean(self):
+        tail_count = max(1, int(np.ceil(self.cvar_level * self.count)))
+        cumulative = np.cumsum(self.counts)
+        edge = int(np.searchsorted(cumulative, tail_count, side='left'))
+        taken_before = cumulative[edge] - self.counts[edge]
+        edge_mean = self.sums[edge] / self.counts[edge]
+        return (self.sums[:edge].sum() + (tail_count - taken_before) * edge_mean) / tail_count
+
+    def result(self):
+        if not self.count:
+            raise ValueError("Nu a fost primită nicio valoare.")
+        return {
+            "Mean": self.total / self.count,
+            "Median": self._percentile(50),
+            "5th_Percentile": self._percentile(5),
+            "95th_Percentile": self._percentile(95),
+            "Prob_Loss": self.loss_count / self.count,
+            "CVaR_5": self._lower_tail_mean(),
+            "Std": np.sqrt(self.m2 / self.count),
+            "VaR_5": self._order_statistics(np.array([max(1, int(np.ceil(self.cvar_level * self.count))) - 1]))[0]
+        }
+
+
+class BatchQuantileErrors:
+    """
+    Eroarea standard a percentilelor prin metoda loturilor (batch means / sectioning).
+
+    Percentilele sunt calculate separat pe fiecare lot de traiectorii; loturile sunt
+    independente (și cu variabile antitetice sau Sobol randomizat, perechile / punctele
+    rămân în același lot), deci eroarea standard a estimării pe toate cele B loturi este
+    aproximativ abaterea standard a percentilelor pe loturi / sqrt(B). Aproximarea este
+    bună pentru loturi mari (mii de traiectorii) și cel puțin ~10 loturi.
+    """
+
+    def __init__(self, percentiles=(5, 95)):
+        self.percentiles = list(percentiles)
+        self._batch_quantiles = []
+
+    @property
+    def num_batches(self):
+        return len(self._batch_quantiles)
+
+    def update(self, values):
+        self._batch_quantiles.append(np.percentile(values, self.percentiles))
+
+    def standard_errors(self):
+        """ Eroarea standard pentru fiecare percentilă (inf cu mai puțin de două loturi). """
+        if self.num_batches < 2:
+            return np.full(len(self.percentiles), np.inf)
+        return np.std(self._batch_quantiles, axis=0, ddof=1) / np.sqrt(self.num_batches)
+
+    def confidence_intervals(self, estimates, level=DEFAULT_CONFIDENCE_LEVEL):
+        """ Intervalele [estimare - z·SE, estimare + z·SE]; None cu mai puțin de două loturi. """
+        if self.num_batches < 2:
+            return [None] * len(self.percentiles)
+        z = NormalDist().inv_cdf(0.5 + level / 2)
+        return [[estimate - z * se, estimate + z * se] for estimate, se in zip(estimates, self.standard_errors())]
+
+
+STATS_ACCUMULATORS = {
+    "exact": ExactStats,
+    "histogram": HistogramStats
+}
+
+
+def make_stats_accumulator(kind, loss_threshold, **options):
+    """
+    Creează un acumulator după nume (vezi STATS_ACCUMULATORS).
+
+    Numele (și nu clasa) este transmis shard-urilor, ca parametrii să poată fi trimiși
+    altor procese și salvați în checkpoint; un acumulator nou se înregistrează în dicționar.
+    """
+    if kind not in STATS_ACCUMULATORS:
+        raise ValueError(f"Acumulator necunoscut '{kind}'. Opțiuni: {', '.join(STATS_ACCUMULATORS)}.")
+    return STATS_ACCUMULATORS[kind](loss_threshold, **options)
+
+
+# Metrici dependente de traiectorie, calculate online, pe măsură ce traiectoriile sunt compuse.
+# Pentru fiecare traiectorie se păstrează doar câteva valori curente (vârful, scăderea maximă,
+# durata curentă și maximă sub vârf, valoarea minimă, valoarea de la începutul anului), deci
+# memoria este O(traiectorii), indiferent de numărul de pași.
+PATH_RISK_KEYS = ("Max_Drawdown", "Underwater_Years", "Min_Value", "Worst_Year_Return")
+
+
+class PathRiskReducer:
+    """
+    Reducerile per traiectorie, actualizate la fiecare pas cu valorile portofoliului.
+
+    Valorile pot avea orice formă (traiectorii, ...), ex: (simulări, seturi de ponderi) în
+    modul cu numere aleatoare comune. checkpoint() salvează o copie a metricilor curente
+    (ex: la fiecare orizont); lista lor este în `checkpoints`.
+
+    Args:
+        initial_values (array-like): Valoarea inițială a fiecărei traiectorii.
+        steps_per_year (int): Numărul de pași într-un an (1 pentru pași anuali, 252 zilnic).
+    """
+
+    def __init__(self, initial_values, steps_per_year=1):
+        initial_values = np.array(initial_values, dtype=float)
+        self.steps_per_year = steps_per_year
+        self.step = 0
+        self.peak = initial_values.copy()
+        self.min_value = initial_values.copy()
+        self.year_start = initial_values.copy()
+        self.max_drawdown = np.zeros_like(initial_values)
+        self.underwater = np.zeros(initial_values.shape, dtype=np.int64)
+        self.max_underwater = np.zeros(initial_values.shape, dtype=np.int64)
+        self.worst_year_return = np.full(initial_values.shape, np.inf)
+        self.checkpoints = []
+
+    def update(self, values):
+        """ Adaugă un pas: valorile portofoliului după pas, aceeași formă ca initial_values. """
+        self.step += 1
+        np.maximum(self.peak, values, out=self.peak)
+        np.minimum(self.min_value, values, out=self.min_value)
+        np.maximum(self.max_drawdown, 1.0 - values / self.peak, out=self.max_drawdown)
+        below_peak = values < self.peak
+        self.underwater += 1
+        self.underwater[~below_peak] = 0
+        np.maximum(self.max_underwater, self.underwater, out=self.max_underwater)
+        if self.step % self.steps_per_year == 0:
+            np.minimum(self.worst_year_return, values / self.year_start - 1.0, out=self.worst_year_return)
+            self.year_start[...] = values
+
+    def per_path_metrics(self):
+        """ Metricile curente ale fiecărei traiectorii (copii), cu cheile din PATH_RISK_KEYS. """
+        return {
+            "Max_Drawdown": self.max_drawdown.copy(),
+            "Underwater_Years": self.max_underwater / self.steps_per_year,
+            "Min_Value": self.min_value.copy(),
+            # Fără niciun an complet, randamentul celui mai slab an nu este definit
+            "Worst_Year_Return": np.where(np.isinf(self.worst_year_return), np.nan, self.worst_year_return)
+        }
+
+    def checkpoint(self):
+        self.checkpoints.append(self.per_path_metrics())
+
+
+def concatenate_path_metrics(metrics_list):
+    """ Unește metricile per traiectorie ale mai multor loturi (de-a lungul primei axe). """
+    if len(metrics_list) == 1:
+        return metrics_list[0]
+    return {key: np.concatenate([metrics[key] for metrics in metrics_list]) for key in PATH_RISK_KEYS}
+
+
+def _json_values(values):
+    """ Float-uri Python (sau listă, pe coloane), cu None în loc de NaN: json.dump ar scrie NaN, care nu este JSON valid. """
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 0:
+        return None if np.isnan(values) else float(values)
+    return [None if np.isnan(v) else v for v in values.tolist()]
+
+
+def summarize_path_metrics(metrics, axis=0):
+    """
+    Distribuția metricilor de traiectorie (pe axa traiectoriilor), pentru înregistrările de rezultate.
+
+    Pentru scădere și durata sub vârf se raportează media, mediana și percentila 95 (coada
+    nefavorabilă); pentru valoarea minimă și cel mai slab an, mediana și percentila 5.
+    Valorile nedefinite (ex: cel mai slab an pe un orizont fără niciun an complet) sunt None.
+
+    Returns:
+        dict: Ex: "Max_Drawdown_Mean", "Max_Drawdown_Median", "Max_Drawdown_95th_Percentile", ...
+            Valorile sunt float-uri, sau liste (câte una per coloană) pentru metrici 2D.
+    """
+    summary = {}
+    for key in ("Max_Drawdown", "Underwater_Years"):
+        summary[f"{key}_Mean"] = np.mean(metrics[key], axis=axis)
+        summary[f"{key}_Median"], summary[f"{key}_95th_Percentile"] = np.percentile(metrics[key], [50, 95], axis=axis)
+    for key in ("Min_Value", "Worst_Year_Return"):
+        with warnings.catch_warnings():
+            # Coloanele fără nicio valoare definită dau NaN (apoi None)
+            warnings.simplefilter("ignore", RuntimeWarning)
+            summary[f"{key}_5th_Percentile"], summary[f"{key}_Median"] = np.nanpercentile(metrics[key], [5, 50], axis=axis)
+    return {name: _json_values(values) for name, values in summary.items()}
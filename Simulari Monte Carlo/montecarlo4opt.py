@@ -1,6 +1,18 @@
+import argparse
 import numpy as np
 import json
+import os
 import sys # NEW: Added for progress bar
+from mc_bootstrap import BlockBootstrap
+from mc_engine import (STEPS_PER_YEAR, bootstrap_asset_returns, iter_common_random_final_values, simulate_asset_returns,
+                       simulate_shard_records, summarize_final_values_matrix)
+from mc_runner import load_checkpoint, run_sharded
+
+# Grila de ponderi (weight_grid.py) și încărcarea istoricului (return_panel.py, backtest.py) se află în "Alte Date si Python"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Alte Date si Python"))
+from backtest import common_window
+from return_panel import build_calendar_panel, load_log_returns
+from weight_grid import weight_grid
 
 # Parametrii portofoliului și simulării
 initial_investment = 100000  # Investiție inițială în EUR
@@ -22,32 +34,78 @@ corr_matrix_risky = np.array([
     [0.11, 0.17, 1.00]   # ETH vs (Vestas, Wise, ETH)
 ])
 
+# Scenariile: "gaussian" - randamente normale din mean_returns, volatilities și corr_matrix_risky;
+# "bootstrap" - blocuri de BOOTSTRAP_BLOCK_DAYS zile consecutive din randamentele istorice
+# (mc_bootstrap.py) ale CSV-urilor de mai jos, aliniate pe calendarul comun; titlurile de stat
+# păstrează randamentul fix. Doar cu pasul anual și eșantionarea "pseudo".
+SCENARIOS = "gaussian"
+BOOTSTRAP_BLOCK_DAYS = 21
+HISTORY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Randament & Volatilitate + Date Istorice")
+# Istoricul activelor riscante, în ordinea din mean_returns (Vestas, Wise, ETH)
+history_specs = [
+    {"file_path": os.path.join(HISTORY_DIR, file_name), "date_col_name": 'Price', "price_col_name": 'Close',
+     "date_format": '%Y-%m-%d', "skiprows_config": [1, 2]}
+    for file_name in ("vestas_history.csv", "wise_3y_history.csv", "eth-usd_3y_history.csv")
+]
+
 num_years = 5
 num_simulations = 10000
-
-# NEW: Load quadruplets from JSON
-QUADRUPLET_FILE = "quadruplets_divisible_by_5.json"
-try:
-    with open(QUADRUPLET_FILE, "r") as f:
-        quadruplets_data = json.load(f)
-    if 'quadruplets_divisible_by_5' not in quadruplets_data:
-        raise ValueError("JSON file must contain 'quadruplets_divisible_by_5' key")
-    loaded_quadruplets = quadruplets_data['quadruplets_divisible_by_5']
-    if not loaded_quadruplets: # Check if the list is empty
-        raise ValueError("No quadruplets found in the JSON file (list is empty).")
-    if not isinstance(loaded_quadruplets, list) or not all(isinstance(q, list) for q in loaded_quadruplets):
-        raise ValueError("Quadruplets must be a list of lists.")
-except FileNotFoundError:
-    print(f"EROARE: Fișierul {QUADRUPLET_FILE} nu a fost găsit.")
-    exit(1)
-except json.JSONDecodeError:
-    print(f"EROARE: Fișierul {QUADRUPLET_FILE} nu este un JSON valid.")
-    exit(1)
-except ValueError as ve:
-    print(f"EROARE în structura datelor din {QUADRUPLET_FILE}: {ve}")
-    exit(1)
-
-all_simulation_results = []
+# Orizonturile raportate (ani): valorile cumulate la fiecare orizont sunt luate din aceleași
+# traiectorii, deci costul este cel al simulării celui mai lung orizont. Cu o listă (ex:
+# [1, 3, 5, 10]) num_years devine cel mai lung orizont, iar rezultatele au câte o înregistrare
+# per (set de ponderi, orizont), cu cheia "Horizon". None = doar valoarea după num_years.
+HORIZONS = None
+if HORIZONS:
+    num_years = max(HORIZONS)
+# Metricile de traiectorie (scăderea maximă, anii sub vârf, valoarea minimă, cel mai slab an),
+# calculate online în timpul compunerii, fără a păstra traiectoriile; rezultatele primesc
+# distribuția lor pe simulări (ex: "Max_Drawdown_Median", "Underwater_Years_95th_Percentile").
+PATH_RISK_METRICS = True
+# Pasul de timp: "annual" păstrează modelul anual (randamente normale, reechilibrare implicită
+# în fiecare an); "monthly" sau "daily" simulează pas cu pas (randamente lognormale, vezi
+# mc_engine.simulate_stepped_values) cu politica REBALANCING: "buy_and_hold", "calendar"
+# (la fiecare REBALANCE_EVERY_STEPS pași; None = anual) sau "threshold" (când o pondere se
+# abate cu mai mult de REBALANCE_THRESHOLD de la țintă). Doar în modul cu shard-uri.
+TIME_STEP = "annual"
+REBALANCING = "calendar"
+REBALANCE_EVERY_STEPS = None
+REBALANCE_THRESHOLD = 0.05
+STEPPING = None if TIME_STEP == "annual" else {
+    "steps_per_year": STEPS_PER_YEAR[TIME_STEP], "rebalancing": REBALANCING,
+    "rebalance_every": REBALANCE_EVERY_STEPS, "threshold": REBALANCE_THRESHOLD
+}
+# Semința rădăcină; None alege entropie nouă, afișată la rulare ca rezultatele să poată fi reproduse
+SEED = None
+# Grila este împărțită în shard-uri de SHARD_SIZE seturi de ponderi, rulate pe NUM_WORKERS procese.
+# Fiecare shard are propriul generator (SeedSequence.spawn), deci rezultatele nu depind de NUM_WORKERS.
+NUM_WORKERS = os.cpu_count() or 1
+SHARD_SIZE = 16
+OUTPUT_JSON_FILE = "monte_carlo_simulations_output.json"
+# Shard-urile terminate sunt salvate periodic aici; cu --resume rularea continuă de unde a rămas,
+# cu aceleași fluxuri aleatoare. Fișierul este șters după salvarea rezultatelor finale.
+CHECKPOINT_FILE = "monte_carlo_checkpoint.json"
+CHECKPOINT_INTERVAL_SECONDS = 60
+# Modul cu numere aleatoare comune: traiectoriile activelor sunt simulate o singură dată
+# și refolosite pentru toate seturile de ponderi (comparații mult mai puțin zgomotoase).
+USE_COMMON_RANDOM_NUMBERS = False
+# Statisticile fiecărui portofoliu (mc_stats.py): "exact" păstrează toate valorile finale,
+# "histogram" le agregă într-o singură trecere cu memorie fixă (eroare <= lățimea unui interval).
+# Traiectoriile sunt simulate în loturi de SIMULATION_BATCH_SIZE (None = toate deodată).
+STATS_ACCUMULATOR = "exact"
+HISTOGRAM_BINS = 4096
+SIMULATION_BATCH_SIZE = None
+# Reducerea varianței: "pseudo", "antithetic" sau "sobol" (Sobol randomizat, necesită scipy).
+SAMPLING = "pseudo"
+# Oprire la convergență: cu o țintă (EUR) și SIMULATION_BATCH_SIZE setat, fiecare portofoliu
+# primește loturi noi doar până când eroarea standard a P5 și P95 scade sub țintă (minim
+# MIN_BATCHES loturi); num_simulations rămâne plafonul. Ex: TARGET_STANDARD_ERROR = 500.
+TARGET_STANDARD_ERROR = None
+MIN_BATCHES = 10
+
+# Grila de ponderi: toate quadrupletele de procente pozitive, multipli de WEIGHT_STEP, care
+# însumează 100 (969 de seturi pentru pasul 5). Este generată direct, fără fișier JSON.
+WEIGHT_STEP = 5
+weight_grid_pct = weight_grid(len(asset_names), step=WEIGHT_STEP)
 
 # Pregătirea pentru generarea randamentelor corelate (doar pentru activele riscante)
 # Activele riscante sunt Vestas, Wise, ETH (indecșii 1, 2, 3 în array-urile principale)
@@ -61,105 +119,126 @@ except np.linalg.LinAlgError:
     print("Se continuă simularea presupunând corelație zero între activele riscante.")
     cholesky_decomp_risky = np.eye(len(mean_returns_risky))
 
-
-# NEW: Loop over each quadruplet to use as weights
-print("Inițiere procesare Monte Carlo pentru seturile de ponderi...") # NEW: Initial message
-total_quadruplets = len(loaded_quadruplets)
-processed_quadruplets_count = 0
-
-for idx, quadruplet_values in enumerate(loaded_quadruplets):
-    if not isinstance(quadruplet_values, list) or len(quadruplet_values) != len(asset_names):
-        print(f"\nAVERTISMENT: Quadrupletul invalid {quadruplet_values} la indexul {idx} va fi omis (format incorect sau număr greșit de elemente).")
-        total_quadruplets -= 1 # Adjust total count if one is skipped early
-        continue
-    
-    current_weights = np.array(quadruplet_values) / 100.0
-    
-    if not np.isclose(np.sum(current_weights), 1.0):
-        print(f"\nAVERTISMENT: Ponderile {current_weights.tolist()} din quadrupletul {quadruplet_values} (index {idx}) nu însumează 1.0 după normalizare. Se omite.")
-        total_quadruplets -= 1 # Adjust total count
-        continue
-
-    # Calculul teoretic al randamentului și volatilității portofoliului (pentru ponderile curente)
-    theoretical_mean_return_p = np.sum(current_weights * mean_returns)
-    
-    # Varianța portofoliului (doar componenta riscantă contează, volatilitatea[0] este 0)
-    var_p_manual = (current_weights[1]**2 * volatilities[1]**2) + \
-                   (current_weights[2]**2 * volatilities[2]**2) + \
-                   (current_weights[3]**2 * volatilities[3]**2) + \
-                   2 * current_weights[1] * current_weights[2] * volatilities[1] * volatilities[2] * corr_matrix_risky[0,1] + \
-                   2 * current_weights[1] * current_weights[3] * volatilities[1] * volatilities[3] * corr_matrix_risky[0,2] + \
-                   2 * current_weights[2] * current_weights[3] * volatilities[2] * volatilities[3] * corr_matrix_risky[1,2]
-    theoretical_std_dev_p = np.sqrt(var_p_manual)
-
-    current_run_final_portfolio_values = [] # NEW: Stores final values for this specific quadruplet's simulations
-
-    # Rularea simulărilor Monte Carlo
-    for _ in range(num_simulations): # MODIFIED - loop variable i to _
-        portfolio_value = initial_investment
-        for _ in range(num_years): # MODIFIED - loop variable year to _
-            # Generarea randamentelor anuale aleatoare
-            ts_return_annual = mean_returns[0] # Este determinist
-            
-            uncorrelated_randoms_risky = np.random.normal(0, 1, len(mean_returns_risky))
-            correlated_randoms_risky = np.dot(cholesky_decomp_risky, uncorrelated_randoms_risky)
-            risky_asset_returns_annual = mean_returns_risky + volatilities_risky * correlated_randoms_risky
-            
-            all_asset_returns_annual = np.concatenate(([ts_return_annual], risky_asset_returns_annual))
-            portfolio_return_annual = np.sum(current_weights * all_asset_returns_annual) # MODIFIED - uses current_weights
-            
-            portfolio_value *= (1 + portfolio_return_annual)
-        
-        current_run_final_portfolio_values.append(portfolio_value) # MODIFIED - appends to local list
-
-    current_final_portfolio_values_np = np.array(current_run_final_portfolio_values)
-
-    # Calculul statisticilor cheie din simulare pentru acest set de ponderi
-    mean_final_val = np.mean(current_final_portfolio_values_np)
-    median_final_val = np.median(current_final_portfolio_values_np)
-    p5_val = np.percentile(current_final_portfolio_values_np, 5)
-    p95_val = np.percentile(current_final_portfolio_values_np, 95)
-    std_dev_final_val = np.std(current_final_portfolio_values_np)
-    prob_loss = np.sum(current_final_portfolio_values_np < initial_investment) / num_simulations * 100
-
-    result_for_quadruplet = {
-        "Weights": quadruplet_values, # MODIFIED: Use original quadruplet values and capitalized key
-        "Mean": mean_final_val, # MODIFIED: Key name change
-        "Median": median_final_val, # MODIFIED: Key name change
-        "5th_Percentile": p5_val, # MODIFIED: Key name change
-        "95th_Percentile": p95_val # MODIFIED: Key name change
-        # REMOVED: theoretical_annual_mean_return
-        # REMOVED: theoretical_annual_std_dev
-        # REMOVED: simulated_final_values (full list)
-        # REMOVED: simulated_std_dev_final_value
-        # REMOVED: simulated_probability_of_loss_percent
-    }
-    all_simulation_results.append(result_for_quadruplet)
-    processed_quadruplets_count += 1
-
-    # NEW: Progress bar logic
-    percent_done = (processed_quadruplets_count / total_quadruplets) * 100 if total_quadruplets > 0 else 100
-    bar_length = 40
-    filled_length = int(bar_length * processed_quadruplets_count // total_quadruplets) if total_quadruplets > 0 else bar_length
-    bar = '#' * filled_length + '-' * (bar_length - filled_length)
-    sys.stdout.write(f'\rProcesare: [{bar}] {percent_done:.2f}% ({processed_quadruplets_count}/{total_quadruplets})')
-    sys.stdout.flush()
-
-if total_quadruplets > 0: # Ensure we print a newline only if progress was shown
-    sys.stdout.write('\n') # NEW: Newline after progress bar is complete
-sys.stdout.flush() # Ensure the newline is printed
-
-# NEW: Salvarea tuturor rezultatelor într-un fișier JSON
-OUTPUT_JSON_FILE = "monte_carlo_simulations_output.json"
-with open(OUTPUT_JSON_FILE, "w") as f_out:
-    json.dump(all_simulation_results, f_out, indent=4)
-
-# MODIFIED: Ensure this print is on a new line and clear
-if not all_simulation_results and loaded_quadruplets: # If all valid quadruplets were skipped
-    print(f"\nNiciun set de ponderi valid nu a fost procesat. Verificati fisierul {QUADRUPLET_FILE}.")
-elif not loaded_quadruplets: # If the input file was empty to begin with
-    print(f"\nFișierul de intrare {QUADRUPLET_FILE} nu conține niciun quadruplet.")
-elif all_simulation_results:
-    print(f"Procesare finalizată.\nToate rezultatele simulărilor Monte Carlo ({len(all_simulation_results)} seturi de ponderi procesate) au fost salvate în: {OUTPUT_JSON_FILE}")
-else: # Catch-all for other scenarios, e.g. if loaded_quadruplets was initially empty and total_quadruplets became 0
-    print(f"\nNicio simulare nu a fost efectuată. Verificati fisierul {QUADRUPLET_FILE} și setările.")
+def main():
+    parser = argparse.ArgumentParser(description="Simulări Monte Carlo pentru grila de ponderi.")
+    parser.add_argument("--resume", action="store_true",
+                        help=f"continuă rularea întreruptă din {CHECKPOINT_FILE} (doar modul cu shard-uri)")
+    args = parser.parse_args()
+
+    if USE_COMMON_RANDOM_NUMBERS and STEPPING is not None:
+        raise ValueError("Modul cu numere aleatoare comune folosește doar pasul anual (TIME_STEP = \"annual\").")
+    print("Inițiere procesare Monte Carlo pentru seturile de ponderi...") # NEW: Initial message
+    valid_quadruplets = weight_grid_pct.tolist()
+    total_quadruplets = len(valid_quadruplets)
+    weights_matrix = weight_grid_pct / 100.0
+
+    # Istoricul pentru bootstrap este încărcat doar în procesul principal: generatorul ajunge la
+    # workeri prin argumentele task-ului, deci importul modulului (spawn/forkserver) nu recitește CSV-urile
+    bootstrap = None
+    if SCENARIOS == "bootstrap":
+        history_dates, history_panel, _ = build_calendar_panel([load_log_returns(spec) for spec in history_specs])
+        history_start, history_end = common_window(history_panel)
+        bootstrap = BlockBootstrap.from_panel(history_dates[history_start:history_end], history_panel[history_start:history_end],
+                                              BOOTSTRAP_BLOCK_DAYS)
+
+    def print_progress(processed_quadruplets_count):
+        # NEW: Progress bar logic
+        percent_done = (processed_quadruplets_count / total_quadruplets) * 100 if total_quadruplets > 0 else 100
+        bar_length = 40
+        filled_length = int(bar_length * processed_quadruplets_count // total_quadruplets) if total_quadruplets > 0 else bar_length
+        bar = '#' * filled_length + '-' * (bar_length - filled_length)
+        sys.stdout.write(f'\rProcesare: [{bar}] {percent_done:.2f}% ({processed_quadruplets_count}/{total_quadruplets})')
+        sys.stdout.flush()
+
+    all_simulation_results = []
+    resume_state = None
+    if args.resume and USE_COMMON_RANDOM_NUMBERS:
+        parser.error("--resume este disponibil doar în modul cu shard-uri (USE_COMMON_RANDOM_NUMBERS = False).")
+    if args.resume:
+        resume_state = load_checkpoint(CHECKPOINT_FILE)
+        if resume_state is None:
+            print(f"Nu există checkpoint ({CHECKPOINT_FILE}); se pornește o rulare nouă.")
+        else:
+            print(f"Reluare din {CHECKPOINT_FILE}: {len(resume_state['completed_shards'])} shard-uri deja terminate.")
+    # La reluare semința rădăcină vine din checkpoint, ca shard-urile rămase să aibă aceleași fluxuri
+    seed_sequence = np.random.SeedSequence(resume_state["entropy"] if resume_state else SEED)
+    print(f"Semința rădăcină: {seed_sequence.entropy}")
+
+    if USE_COMMON_RANDOM_NUMBERS:
+        # Traiectoriile activelor nu depind de ponderi: le simulăm o singură dată și
+        # le refolosim pentru toate seturile de ponderi (aceleași scenarii pentru toți).
+        rng = np.random.default_rng(seed_sequence)
+        if bootstrap is not None:
+            common_asset_returns = bootstrap_asset_returns(rng, bootstrap, num_simulations, num_years, mean_returns, volatilities)
+        else:
+            common_asset_returns = simulate_asset_returns(rng, num_simulations, num_years, mean_returns, volatilities,
+                                                          cholesky_decomp_risky, SAMPLING)
+        for chunk, chunk_values, *chunk_paths in iter_common_random_final_values(common_asset_returns, weights_matrix, initial_investment,
+                                                                                 horizons=HORIZONS, path_risk=PATH_RISK_METRICS):
+            path_metrics = chunk_paths[0] if chunk_paths else [None] * len(set(HORIZONS or [num_years]))
+            if HORIZONS:
+                # Câte o înregistrare per orizont, grupate pe set de ponderi (ca în modul cu shard-uri)
+                per_horizon = [summarize_final_values_matrix(valid_quadruplets[chunk], horizon_values, initial_investment, horizon=horizon,
+                                                             path_metrics=horizon_paths)
+                               for horizon, horizon_values, horizon_paths in zip(sorted(set(HORIZONS)), chunk_values, path_metrics)]
+                all_simulation_results.extend(record for records in zip(*per_horizon) for record in records)
+            else:
+                all_simulation_results.extend(summarize_final_values_matrix(valid_quadruplets[chunk], chunk_values, initial_investment,
+                                                                            path_metrics=path_metrics[0]))
+            print_progress(chunk.stop)
+    else:
+        # Rularea simulărilor Monte Carlo: pentru fiecare set de ponderi întregul tensor de șocuri
+        # (simulări x ani x active riscante) este generat dintr-o dată, iar shard-urile rulează în paralel.
+        model_parameters = {
+            "mean_returns": mean_returns,
+            "volatilities": volatilities,
+            "cholesky_risky": cholesky_decomp_risky,
+            "num_years": num_years,
+            "num_simulations": num_simulations,
+            "initial_investment": initial_investment,
+            "stats_kind": STATS_ACCUMULATOR,
+            "stats_options": {"num_bins": HISTOGRAM_BINS} if STATS_ACCUMULATOR == "histogram" else {},
+            "batch_size": SIMULATION_BATCH_SIZE,
+            "sampling": SAMPLING,
+            "target_standard_error": TARGET_STANDARD_ERROR,
+            "min_batches": MIN_BATCHES,
+            "horizons": HORIZONS,
+            "path_risk": PATH_RISK_METRICS,
+            "stepping": STEPPING,
+            "bootstrap": bootstrap
+        }
+        all_simulation_results = run_sharded(
+            simulate_shard_records, valid_quadruplets, weights_matrix, model_parameters, seed_sequence.entropy,
+            shard_size=SHARD_SIZE, num_workers=NUM_WORKERS, progress_callback=print_progress,
+            checkpoint_path=CHECKPOINT_FILE, checkpoint_interval=CHECKPOINT_INTERVAL_SECONDS,
+            resume_state=resume_state,
+            run_signature={"num_years": num_years, "num_simulations": num_simulations, "weight_step": WEIGHT_STEP,
+                           "mean_returns": mean_returns.tolist(), "volatilities": volatilities.tolist(),
+                           "stats": [STATS_ACCUMULATOR, model_parameters["stats_options"], SIMULATION_BATCH_SIZE],
+                           "sampling": [SAMPLING, TARGET_STANDARD_ERROR, MIN_BATCHES], "horizons": HORIZONS,
+                           "path_risk": PATH_RISK_METRICS, "stepping": STEPPING,
+                           "scenarios": [SCENARIOS, BOOTSTRAP_BLOCK_DAYS]}
+        )
+
+    if total_quadruplets > 0: # Ensure we print a newline only if progress was shown
+        sys.stdout.write('\n') # NEW: Newline after progress bar is complete
+    sys.stdout.flush() # Ensure the newline is printed
+
+    # NEW: Salvarea tuturor rezultatelor într-un fișier JSON
+    with open(OUTPUT_JSON_FILE, "w") as f_out:
+        json.dump(all_simulation_results, f_out, indent=4)
+    if os.path.exists(CHECKPOINT_FILE):
+        os.remove(CHECKPOINT_FILE)
+
+    # MODIFIED: Ensure this print is on a new line and clear
+    if all_simulation_results:
+        # Cu mai multe orizonturi, aceleași traiectorii apar în înregistrarea fiecărui orizont
+        total_paths = sum(record["Paths"] for record in all_simulation_results) // (len(set(HORIZONS)) if HORIZONS else 1)
+        print(f"Traiectorii simulate: {total_paths:,} (plafon: {total_quadruplets * num_simulations:,})")
+        print(f"Procesare finalizată.\nToate rezultatele simulărilor Monte Carlo ({total_quadruplets} seturi de ponderi procesate, {len(all_simulation_results)} înregistrări) au fost salvate în: {OUTPUT_JSON_FILE}")
+    else:
+        print(f"\nNicio simulare nu a fost efectuată. Verificati grila de ponderi (WEIGHT_STEP = {WEIGHT_STEP}) și setările.")
+
+
+if __name__ == "__main__":
+    main()
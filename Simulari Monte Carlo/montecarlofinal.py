@@ -1,6 +1,8 @@
 import numpy as np
 import json
 import matplotlib.pyplot as plt # Added for plotting
+from mc_engine import analytic_single_period_records, compare_stat_records
+from mc_stats import batch_statistics, stats_records
 
 # Portfolio Parameters
 # Assets: 0: Titluri de stat (Government Bonds), 1: Vestas, 2: Wise, 3: ETH
@@ -47,6 +49,11 @@ cov_matrix = np.outer(volatilities, volatilities) * correlation_matrix
 num_simulations = 100000
 initial_investment = 100000
 T = 5  # Investment horizon in years (e.g., 5 years)
+# Extra horizons (years) reported in closed form next to T, e.g. [1, 3, 5, 10]; None = only T
+HORIZONS = None
+# The projected values come from the exact closed form (the final value is normal).
+# The Monte Carlo run is only a validation step: it reports the difference and draws the histogram.
+VALIDATE_WITH_MONTE_CARLO = True
 
 # Time-adjusted parameters
 expected_returns_T = expected_returns * T
@@ -74,32 +81,30 @@ except np.linalg.LinAlgError as e:
         exit()
 
 
-# Run Monte Carlo simulation
-print(f"Running {num_simulations} Monte Carlo simulations for {T} years...")
-portfolio_values = np.zeros(num_simulations)
-num_assets = len(asset_names)
-
-for i in range(num_simulations):
-    # Generate random normal variables
-    random_normals = np.random.normal(size=num_assets)
-    
-    # Calculate correlated returns for the period T
-    # Formula: R_T = E[R_T] + L * Z
-    # where Z is a vector of standard normal random variables
-    correlated_period_returns = expected_returns_T + L @ random_normals
-    
-    # Calculate portfolio return for the period T
-    portfolio_period_return = np.dot(weights, correlated_period_returns)
-    
-    # Calculate final portfolio value
-    final_value = initial_investment * (1 + portfolio_period_return)
-    portfolio_values[i] = final_value
-
-# Calculate statistics
-mean_val = np.mean(portfolio_values)
-median_val = np.median(portfolio_values)
-percentile_5 = np.percentile(portfolio_values, 5)
-percentile_95 = np.percentile(portfolio_values, 95)
+# Closed-form statistics
+analytic_stats = analytic_single_period_records([weights.tolist()], weights, expected_returns_T, cov_matrix_T, initial_investment)[0]
+mean_val = analytic_stats["Mean"]
+median_val = analytic_stats["Median"]
+percentile_5 = analytic_stats["5th_Percentile"]
+percentile_95 = analytic_stats["95th_Percentile"]
+
+portfolio_values = None
+if VALIDATE_WITH_MONTE_CARLO:
+    # Run Monte Carlo simulation
+    print(f"Running {num_simulations} Monte Carlo simulations for {T} years...")
+    num_assets = len(asset_names)
+
+    # Formula: R_T = E[R_T] + L * Z, for all simulations at once
+    # where Z is a matrix of standard normal random variables
+    random_normals = np.random.normal(size=(num_simulations, num_assets))
+    correlated_period_returns = expected_returns_T + random_normals @ L.T
+    portfolio_values = initial_investment * (1 + correlated_period_returns @ weights)
+
+    # Toate statisticile dintr-o singură partiție a valorilor (mc_stats.batch_statistics)
+    simulated_stats = stats_records(batch_statistics(portfolio_values, initial_investment))[0]
+    print("\nValidation (Monte Carlo vs. closed form):")
+    for stat_name, diff in compare_stat_records([analytic_stats], [simulated_stats]).items():
+        print(f"- {stat_name}: simulated ${simulated_stats[stat_name]:,.2f}, difference ${diff['max_abs_diff']:,.2f} ({diff['max_rel_diff']:.4%})")
 
 # Output results
 print("\nSimulation Results:")
@@ -109,32 +114,45 @@ print("\nPortfolio Allocation:")
 for i in range(len(asset_names)):
     print(f"- {asset_names[i]}: {weights[i]*100:.1f}%")
 
-print("\nProjected Portfolio Value after {} years:".format(T))
+print("\nProjected Portfolio Value after {} years (closed form):".format(T))
 print(f"Mean: ${mean_val:,.2f}")
 print(f"Median: ${median_val:,.2f}")
 print(f"5th Percentile (Value at Risk estimate): ${percentile_5:,.2f}")
 print(f"95th Percentile: ${percentile_95:,.2f}")
 
-# Generate and save histogram
-plt.figure(figsize=(10, 6))
-plt.hist(portfolio_values, bins=100, alpha=0.75, color='skyblue', edgecolor='black')
-plt.axvline(mean_val, color='red', linestyle='dashed', linewidth=2, label=f'Mean: ${mean_val:,.2f}')
-plt.axvline(median_val, color='green', linestyle='dashed', linewidth=2, label=f'Median: ${median_val:,.2f}')
-plt.axvline(percentile_5, color='purple', linestyle='dashed', linewidth=2, label=f'5th Pctl: ${percentile_5:,.2f}')
-plt.axvline(percentile_95, color='orange', linestyle='dashed', linewidth=2, label=f'95th Pctl: ${percentile_95:,.2f}')
-
-plt.title(f'Monte Carlo Simulation of Portfolio Value ({num_simulations} Simulations, {T} Years)')
-plt.xlabel('Final Portfolio Value ($)')
-plt.ylabel('Frequency')
-plt.legend()
-plt.grid(True, linestyle='--', alpha=0.7)
-
-plot_file_path = "montecarlo_histogram.png"
-try:
-    plt.savefig(plot_file_path)
-    print(f"\nHistogram saved to '{plot_file_path}'")
-except Exception as e:
-    print(f"ERROR: Could not save histogram: {e}")
+horizon_stats = []
+if HORIZONS:
+    # Same closed form at each horizon h: mean and covariance scale with h
+    horizon_stats = [
+        analytic_single_period_records([weights.tolist()], weights, expected_returns * h, cov_matrix * h, initial_investment, horizon=h)[0]
+        for h in sorted(set(HORIZONS))
+    ]
+    print("\nProjected Portfolio Value by horizon (closed form):")
+    for stats in horizon_stats:
+        print(f"- {stats['Horizon']} years: Mean ${stats['Mean']:,.2f}, 5th Pctl ${stats['5th_Percentile']:,.2f}, "
+              f"95th Pctl ${stats['95th_Percentile']:,.2f}, Prob. loss {stats['Prob_Loss']:.2%}")
+
+if portfolio_values is not None:
+    # Generate and save histogram
+    plt.figure(figsize=(10, 6))
+    plt.hist(portfolio_values, bins=100, alpha=0.75, color='skyblue', edgecolor='black')
+    plt.axvline(mean_val, color='red', linestyle='dashed', linewidth=2, label=f'Mean: ${mean_val:,.2f}')
+    plt.axvline(median_val, color='green', linestyle='dashed', linewidth=2, label=f'Median: ${median_val:,.2f}')
+    plt.axvline(percentile_5, color='purple', linestyle='dashed', linewidth=2, label=f'5th Pctl: ${percentile_5:,.2f}')
+    plt.axvline(percentile_95, color='orange', linestyle='dashed', linewidth=2, label=f'95th Pctl: ${percentile_95:,.2f}')
+
+    plt.title(f'Monte Carlo Simulation of Portfolio Value ({num_simulations} Simulations, {T} Years)')
+    plt.xlabel('Final Portfolio Value ($)')
+    plt.ylabel('Frequency')
+    plt.legend()
+    plt.grid(True, linestyle='--', alpha=0.7)
+
+    plot_file_path = "montecarlo_histogram.png"
+    try:
+        plt.savefig(plot_file_path)
+        print(f"\nHistogram saved to '{plot_file_path}'")
+    except Exception as e:
+        print(f"ERROR: Could not save histogram: {e}")
 
 # plt.show() # Uncomment to display the plot interactively if running in a GUI environment
 
@@ -158,6 +176,16 @@ results_data = {
         "95th_percentile": percentile_95
     }
 }
+if horizon_stats:
+    results_data["projected_values_by_horizon"] = {
+        str(stats["Horizon"]): {
+            "mean": stats["Mean"],
+            "median": stats["Median"],
+            "5th_percentile": stats["5th_Percentile"],
+            "95th_percentile": stats["95th_Percentile"]
+        }
+        for stats in horizon_stats
+    }
 
 # Write results to a JSON file
 output_json_file_path = "montecarlo_results.json"
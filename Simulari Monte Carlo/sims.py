@@ -1,5 +1,14 @@
 import numpy as np
 import json # Import the json module
+import os
+import sys
+from mc_engine import (analytic_single_period_records, compare_stat_records, draw_standard_normals,
+                       iter_common_random_final_values, simulate_shard_records, summarize_final_values_matrix)
+from mc_runner import run_sharded
+
+# weight_grid.py lives in "Alte Date si Python"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Alte Date si Python"))
+from weight_grid import weight_grid
 # import matplotlib.pyplot as plt # Removed for no visual output
 
 # Portfolio parameters
@@ -16,96 +25,150 @@ cov_matrix = np.outer(volatilities, volatilities) * correlation_matrix
 num_simulations = 100000
 initial_investment = 100000
 T = 5  # Investment horizon in years
+# Report several horizons (years) from one run, e.g. [1, 3, 5, 10]: one record per (triplet, horizon),
+# with a "Horizon" key. The Monte Carlo paths are drawn once, year by year up to the longest
+# horizon, and the T-year return is the sum of the annual ones (same distribution as scaling by T).
+# None = only T, as before.
+HORIZONS = None
+# How the stats table is produced:
+#   "analytic"    - exact closed form (the single-period final value is normal)
+#   "monte_carlo" - simulated, as before
+#   "validate"    - closed form, plus a Monte Carlo run reporting the difference between the two
+EVALUATION_MODE = "analytic"
+# Common random numbers: simulate the asset returns once and reuse them for every triplet
+USE_COMMON_RANDOM_NUMBERS = False
+# Root seed (None picks fresh entropy, printed so the run can be reproduced). Without common random
+# numbers the triplets are split into shards of SHARD_SIZE run on NUM_WORKERS processes; each shard
+# has its own SeedSequence child, so the output does not depend on NUM_WORKERS.
+SEED = None
+NUM_WORKERS = os.cpu_count() or 1
+SHARD_SIZE = 16
+# Variance reduction for the Monte Carlo draws: "pseudo", "antithetic" or "sobol" (needs scipy).
+# With a batch size and a target standard error (EUR), each triplet stops drawing batches once the
+# standard error of P5 and P95 is below the target; num_simulations is then only the cap.
+SAMPLING = "pseudo"
+SIMULATION_BATCH_SIZE = None
+TARGET_STANDARD_ERROR = None
 
 expected_returns_T = expected_returns * T
 cov_matrix_T = cov_matrix * T
 L = np.linalg.cholesky(cov_matrix_T)
 
-# Load triplets from triplets.json
-triplets_file_path = "triplets.json"
-triplets = []
-try:
-    with open(triplets_file_path, 'r') as f:
-        data = json.load(f) # Load the entire JSON object
-        if isinstance(data, dict) and "triplets" in data and isinstance(data["triplets"], list):
-            triplets = data["triplets"] # Extract the list associated with the "triplets" key
-        else:
-            print(f"EROARE: '{triplets_file_path}' nu conține un obiect JSON cu cheia 'triplets' care să mapeze la o listă.")
-            triplets = [] # Ensure triplets is empty if format is wrong
-
-    # Validate that each item in the triplets list is a list/tuple of 3 numbers
-    if triplets and not all(isinstance(t, (list, tuple)) and len(t) == 3 and all(isinstance(n, (int, float)) for n in t) for t in triplets):
-        print(f"EROARE: Lista 'triplets' din '{triplets_file_path}' conține elemente care nu sunt liste/tupluri valide de 3 numere.")
-        triplets = [] # Reset to empty if content is invalid
-
-except FileNotFoundError:
-    print(f"EROARE: Fișierul '{triplets_file_path}' nu a fost găsit.")
-    triplets = [] # Reset to empty
-except json.JSONDecodeError:
-    print(f"EROARE: Nu s-a putut decoda JSON din '{triplets_file_path}'. Verificați formatul.")
-    triplets = [] # Reset to empty
-except Exception as e:
-    print(f"EROARE: O eroare neașteptată la citirea '{triplets_file_path}': {e}")
-    triplets = []
-
-# Monte Carlo Simulation for each triplet
-all_simulation_outputs = []
-
-if not triplets:
-    print("Nicio combinație validă (triplet) nu a fost încărcată sau fișierul nu a putut fi procesat. Se oprește simularea.")
-else:
-    num_assets = len(expected_returns) # Determine number of assets
-    total_triplets = len(triplets)
-    print(f"Se rulează simulările Monte Carlo pentru {total_triplets} combinații de ponderi...")
-
-    # Progress bar settings
-    bar_length = 50
-
-    for i, triplet_raw in enumerate(triplets):
-        weights = np.array(triplet_raw) / 100.0 # Assuming weights in triplets are percentages
-
-        if len(weights) != num_assets:
-            print(f"Atenționare: Tripletul {triplet_raw} (index {i}) nu are numărul corect de ponderi ({len(weights)} vs {num_assets}). Acest triplet va fi omis.")
-            continue
-
-        Z = np.random.multivariate_normal(np.zeros(num_assets), np.eye(num_assets), num_simulations)
-        simulated_asset_returns_T = expected_returns_T + Z @ L.T
-        portfolio_simulated_returns_T = simulated_asset_returns_T @ weights
-        final_portfolio_values = initial_investment * (1 + portfolio_simulated_returns_T)
-
-        # Calculate statistics
-        mean_val = np.mean(final_portfolio_values)
-        median_val = np.median(final_portfolio_values)
-        percentile_5 = np.percentile(final_portfolio_values, 5)
-        percentile_95 = np.percentile(final_portfolio_values, 95)
-
-        all_simulation_outputs.append({
-            "Weights": triplet_raw, # Store original triplet values
-            "Mean": mean_val,
-            "Median": median_val,
-            "5th_Percentile": percentile_5,
-            "95th_Percentile": percentile_95
-        })
-
-        # Update progress bar
-        progress = (i + 1) / total_triplets
-        filled_length = int(bar_length * progress)
-        bar = '█' * filled_length + '-' * (bar_length - filled_length)
-        print(f'Progres: |{bar}| {progress*100:.1f}% Complet ({i+1}/{total_triplets})', end='\r')
-
-    print() # Ensure the next print is on a new line
-    print("Simulările Monte Carlo au fost finalizate.") # Newline after progress bar
-
-    output_file_path = "finalmontesims.json"
-    try:
-        with open(output_file_path, 'w') as f:
-            json.dump(all_simulation_outputs, f, indent=4) # Save list directly
-        print(f"Rezultatele simulării Monte Carlo au fost salvate în '{output_file_path}'")
-    except IOError:
-        print(f"EROARE: Nu s-a putut scrie în fișierul '{output_file_path}'.")
-    except TypeError as e:
-        print(f"EROARE: Eroare de serializare JSON la salvarea rezultatelor: {e}")
-
-print("Scriptul de simulare a ajuns la final.")
+# Weight grid: every triplet of positive percentages (multiples of WEIGHT_STEP) summing to 100,
+# generated directly instead of parsing triplets.json
+WEIGHT_STEP = 1
+triplets = weight_grid(len(expected_returns), step=WEIGHT_STEP).tolist()
+
+def interleave_horizons(records_per_horizon):
+    """ Records ordered by triplet, then horizon (the order of simulate_shard_records). """
+    return [record for records in zip(*records_per_horizon) for record in records]
+
+def main():
+    # Monte Carlo Simulation for each triplet
+    all_simulation_outputs = []
+
+    if not triplets:
+        print("Nicio combinație validă (triplet) nu a fost generată. Se oprește simularea.")
+    else:
+        num_assets = len(expected_returns) # Determine number of assets
+        total_triplets = len(triplets)
+        weights_matrix = np.array(triplets, dtype=float) / 100.0
+
+        if EVALUATION_MODE in ("analytic", "validate"):
+            # Exact stats: the final value is normal, so no random draws are needed
+            if HORIZONS:
+                analytic_outputs = interleave_horizons([
+                    analytic_single_period_records(triplets, weights_matrix, expected_returns * h, cov_matrix * h, initial_investment, horizon=h)
+                    for h in sorted(set(HORIZONS))
+                ])
+            else:
+                analytic_outputs = analytic_single_period_records(triplets, weights_matrix, expected_returns_T, cov_matrix_T, initial_investment)
+            print(f"Statisticile exacte (formă închisă) au fost calculate pentru {total_triplets} combinații de ponderi.")
+
+        if EVALUATION_MODE in ("monte_carlo", "validate"):
+            print(f"Se rulează simulările Monte Carlo pentru {total_triplets} combinații de ponderi...")
+
+            # Progress bar settings
+            bar_length = 50
+
+            def print_progress(done):
+                progress = done / total_triplets
+                filled_length = int(bar_length * progress)
+                bar = '█' * filled_length + '-' * (bar_length - filled_length)
+                print(f'Progres: |{bar}| {progress*100:.1f}% Complet ({done}/{total_triplets})', end='\r')
+
+            seed_sequence = np.random.SeedSequence(SEED)
+            print(f"Semința rădăcină: {seed_sequence.entropy}")
+
+            if USE_COMMON_RANDOM_NUMBERS and HORIZONS:
+                # Annual draws up to the longest horizon, summed (not compounded) at each horizon
+                horizons = sorted(set(HORIZONS))
+                Z = draw_standard_normals(np.random.default_rng(seed_sequence), horizons[-1], num_simulations, num_assets, SAMPLING)
+                simulated_asset_returns = expected_returns + Z @ np.linalg.cholesky(cov_matrix).T
+                for chunk, values_chunk in iter_common_random_final_values(simulated_asset_returns, weights_matrix, initial_investment,
+                                                                           horizons=horizons, compound=False):
+                    all_simulation_outputs.extend(interleave_horizons([
+                        summarize_final_values_matrix(triplets[chunk], horizon_values, initial_investment, horizon=h)
+                        for h, horizon_values in zip(horizons, values_chunk)
+                    ]))
+                    print_progress(chunk.stop)
+            elif USE_COMMON_RANDOM_NUMBERS:
+                # The asset paths do not depend on the weights: draw them once, then get every
+                # portfolio with one (paths x assets) @ (assets x triplets) product per chunk.
+                Z = draw_standard_normals(np.random.default_rng(seed_sequence), 1, num_simulations, num_assets, SAMPLING)[0]
+                simulated_asset_returns_T = expected_returns_T + Z @ L.T
+                for chunk, final_values_chunk in iter_common_random_final_values(simulated_asset_returns_T[np.newaxis], weights_matrix, initial_investment):
+                    all_simulation_outputs.extend(summarize_final_values_matrix(triplets[chunk], final_values_chunk, initial_investment))
+                    print_progress(len(all_simulation_outputs))
+            else:
+                # Single period: R_T = E[R_T] + sqrt(T) * vol * (L_corr @ Z), one vectorized draw per triplet,
+                # with the shards running in parallel
+                model_parameters = {
+                    "mean_returns": expected_returns_T,
+                    "volatilities": volatilities * np.sqrt(T),
+                    "cholesky_risky": np.linalg.cholesky(correlation_matrix),
+                    "num_years": 1,
+                    "num_simulations": num_simulations,
+                    "initial_investment": initial_investment,
+                    "batch_size": SIMULATION_BATCH_SIZE,
+                    "sampling": SAMPLING,
+                    "target_standard_error": TARGET_STANDARD_ERROR
+                }
+                if HORIZONS:
+                    # Annual steps up to the longest horizon, summed at each horizon from the same draws
+                    model_parameters.update(mean_returns=expected_returns, volatilities=volatilities,
+                                            num_years=max(HORIZONS), horizons=HORIZONS, compound=False)
+                all_simulation_outputs = run_sharded(
+                    simulate_shard_records, triplets, weights_matrix, model_parameters, seed_sequence.entropy,
+                    shard_size=SHARD_SIZE, num_workers=NUM_WORKERS, progress_callback=print_progress
+                )
+
+            print() # Ensure the next print is on a new line
+            print("Simulările Monte Carlo au fost finalizate.") # Newline after progress bar
+
+        if EVALUATION_MODE == "validate":
+            print("\nValidare: diferența Monte Carlo vs. formă închisă")
+            for stat_name, diff in compare_stat_records(analytic_outputs, all_simulation_outputs).items():
+                print(f"  {stat_name}: max abs = {diff['max_abs_diff']:,.2f}, medie abs = {diff['mean_abs_diff']:,.2f}, max rel = {diff['max_rel_diff']:.4%}")
+
+        if EVALUATION_MODE != "monte_carlo":
+            all_simulation_outputs = analytic_outputs
+
+        output_file_path = "finalmontesims.json"
+        try:
+            with open(output_file_path, 'w') as f:
+                json.dump(all_simulation_outputs, f, indent=4) # Save list directly
+            print(f"Rezultatele au fost salvate în '{output_file_path}'")
+        except IOError:
+            print(f"EROARE: Nu s-a putut scrie în fișierul '{output_file_path}'.")
+        except TypeError as e:
+            print(f"EROARE: Eroare de serializare JSON la salvarea rezultatelor: {e}")
+
+    print("Scriptul de simulare a ajuns la final.")
+
+
+if __name__ == "__main__":
+    main()
+
 
 # Removed plotting and individual print statements for statistics
\ No newline at end of file
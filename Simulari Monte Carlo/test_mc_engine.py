@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from mc_engine import simulate_shard_records
+
+MODEL = {
+    "mean_returns": np.array([0.05, 0.3]),
+    "volatilities": np.array([0.0, 0.6]),
+    "cholesky_risky": np.ones((1, 1)),
+    "num_years": 2,
+    "initial_investment": 1000.0
+}
+
+
+def _paths(num_simulations, batch_size, sampling):
+    records = simulate_shard_records([[50, 50]], np.array([[0.5, 0.5]]), np.random.SeedSequence(7),
+                                     num_simulations=num_simulations, batch_size=batch_size, sampling=sampling, **MODEL)
+    return records[0]["Paths"]
+
+
+@pytest.mark.parametrize("num_simulations, batch_size, sampling", [
+    (1000, 300, "pseudo"),
+    (1000, 300, "antithetic"),
+    (1536, 512, "sobol"),
+    (1024, None, "sobol"),
+])
+def test_every_requested_path_is_simulated(num_simulations, batch_size, sampling):
+    if sampling == "sobol":
+        pytest.importorskip("scipy")
+    assert _paths(num_simulations, batch_size, sampling) == num_simulations
+
+
+@pytest.mark.parametrize("num_simulations, batch_size, sampling", [
+    (1001, 300, "antithetic"),
+    (1000, 299, "antithetic"),
+    (1000, 256, "sobol"),
+    (1000, None, "sobol"),
+])
+def test_unusable_batches_raise(num_simulations, batch_size, sampling):
+    with pytest.raises(ValueError):
+        _paths(num_simulations, batch_size, sampling)
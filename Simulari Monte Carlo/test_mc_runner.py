@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+import mc_runner
+from mc_engine import simulate_shard_records
+from mc_runner import inputs_digest, load_checkpoint, run_sharded
+
+WEIGHTS_PCT = np.array([[100, 0, 0], [50, 50, 0], [50, 0, 50], [0, 50, 50], [34, 33, 33], [0, 0, 100], [20, 40, 40]])
+MODEL = {
+    "mean_returns": np.array([0.05, 0.08, 0.3]),
+    "volatilities": np.array([0.0, 0.3, 0.6]),
+    "cholesky_risky": np.linalg.cholesky(np.array([[1.0, 0.2], [0.2, 1.0]])),
+    "num_years": 3,
+    "num_simulations": 200,
+    "initial_investment": 1000.0
+}
+
+
+def _run(model, checkpoint_path=None, resume_state=None, num_workers=1):
+    return run_sharded(simulate_shard_records, WEIGHTS_PCT.tolist(), WEIGHTS_PCT / 100.0, model, 1234,
+                       shard_size=2, num_workers=num_workers, checkpoint_path=checkpoint_path,
+                       checkpoint_interval=0.0, resume_state=resume_state, run_signature={"num_years": 3})
+
+
+def _interrupted_run(model, checkpoint_path, monkeypatch, fail_shard=2):
+    run_shard = mc_runner._run_shard
+
+    def flaky(task, shard_index, *args):
+        if shard_index == fail_shard:
+            raise KeyboardInterrupt
+        return run_shard(task, shard_index, *args)
+
+    monkeypatch.setattr(mc_runner, "_run_shard", flaky)
+    with pytest.raises(KeyboardInterrupt):
+        _run(model, checkpoint_path)
+    monkeypatch.setattr(mc_runner, "_run_shard", run_shard)
+
+
+def test_resume_equals_uninterrupted_run(tmp_path, monkeypatch):
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    _interrupted_run(MODEL, checkpoint_path, monkeypatch)
+    state = load_checkpoint(checkpoint_path)
+    assert sorted(state["completed_shards"]) == [0, 1]
+
+    assert _run(MODEL, checkpoint_path, resume_state=state) == _run(MODEL)
+
+
+def test_results_do_not_depend_on_worker_count():
+    assert _run(MODEL, num_workers=2) == _run(MODEL)
+
+
+@pytest.mark.parametrize("change", [
+    {"initial_investment": 2000.0},
+    {"cholesky_risky": np.linalg.cholesky(np.array([[1.0, 0.5], [0.5, 1.0]]))},
+])
+def test_resume_with_changed_model_is_rejected(tmp_path, monkeypatch, change):
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    _interrupted_run(MODEL, checkpoint_path, monkeypatch)
+    with pytest.raises(ValueError, match="inputs_digest"):
+        _run({**MODEL, **change}, checkpoint_path, resume_state=load_checkpoint(checkpoint_path))
+
+
+def test_inputs_digest_sees_array_contents():
+    a = np.array([[1.0, 0.1], [0.1, 1.0]])
+    assert inputs_digest({"x": a}) == inputs_digest({"x": a.copy()})
+    assert inputs_digest({"x": a}) != inputs_digest({"x": a.T * 1.0 + np.eye(2) * 1e-12})
+    assert inputs_digest([1, 2]) != inputs_digest([2, 1])
@@ -0,0 +1,53 @@
+import json
+
+import numpy as np
+import pytest
+
+from mc_stats import PathRiskReducer, batch_statistics, lower_tail_mean, percentile_field, summarize_path_metrics
+
+
+def test_undefined_path_metrics_are_json_null():
+    # Un orizont de 6 pași lunari nu conține niciun an complet
+    reducer = PathRiskReducer(np.full((20, 2), 100.0), steps_per_year=12)
+    for step in range(6):
+        reducer.update(np.full((20, 2), 100.0 + step))
+    summary = summarize_path_metrics(reducer.per_path_metrics())
+    assert summary["Worst_Year_Return_Median"] == [None, None]
+    assert summary["Min_Value_Median"] == [100.0, 100.0]
+    json.dumps(summary, allow_nan=False)
+
+
+def test_columns_are_summarized_independently():
+    worst = np.column_stack((np.full(10, np.nan), np.r_[np.nan, np.arange(9.0)]))
+    metrics = {key: np.ones((10, 2)) for key in ("Max_Drawdown", "Underwater_Years", "Min_Value")}
+    summary = summarize_path_metrics({**metrics, "Worst_Year_Return": worst})
+    assert summary["Worst_Year_Return_Median"] == [None, 4.0]
+    single = summarize_path_metrics({key: values[:, 1] for key, values in {**metrics, "Worst_Year_Return": worst}.items()})
+    assert single["Worst_Year_Return_Median"] == 4.0 and isinstance(single["Max_Drawdown_Mean"], float)
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 19, 20, 21, 100, 101, 1000, 1001])
+def test_batch_statistics_match_numpy(n):
+    rng = np.random.default_rng(n)
+    outcomes = rng.lognormal(7, 0.5, (n, 4))
+    outcomes[:, 3] = np.round(outcomes[:, 3], -2)   # valori egale
+    quantiles = (1, 5, 12.5, 50, 95, 99)
+    stats = batch_statistics(outcomes, 1000.0, quantiles=quantiles, cvar_level=0.05)
+
+    expected = np.percentile(outcomes, quantiles, axis=0)
+    for q, row in zip(quantiles, expected):
+        np.testing.assert_array_equal(stats[percentile_field(q)], row)
+    # Aceleași valori din coadă, dar însumate în altă ordine după partiție
+    np.testing.assert_allclose(stats["CVaR_5"], lower_tail_mean(outcomes, 0.05), rtol=1e-14)
+    tail_count = max(1, int(np.ceil(0.05 * n)))
+    np.testing.assert_array_equal(stats["VaR_5"], np.sort(outcomes, axis=0)[tail_count - 1])
+    np.testing.assert_allclose(stats["Mean"], outcomes.mean(axis=0), rtol=1e-14)
+    np.testing.assert_allclose(stats["Std"], outcomes.std(axis=0), rtol=1e-12)
+    np.testing.assert_array_equal(stats["Prob_Loss"], (outcomes < 1000.0).mean(axis=0))
+
+
+def test_batch_statistics_along_other_axis_and_duplicate_quantiles():
+    outcomes = np.random.default_rng(0).normal(size=(3, 200))
+    stats = batch_statistics(outcomes, 0.0, quantiles=[95, 50, 50.0, 95], axis=1)
+    assert stats.dtype.names[:3] == ("Mean", "Median", "95th_Percentile")
+    np.testing.assert_array_equal(stats["Median"], np.percentile(outcomes, 50, axis=1))